@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Add the columns and indexes that newer models declare to an existing database.
+init_db only creates whole tables, so databases created before these columns
+existed need this run once after upgrading. Safe to run again.
+
+Usage:
+    python add_missing_columns.py
+"""
+from sqlalchemy import inspect, text
+from dotenv import load_dotenv
+from models import Base, engine, init_db
+
+load_dotenv()
+
+# (table, column) added to tables that already existed; all nullable
+NEW_COLUMNS = [
+    ("papers", "seed"),
+    ("papers", "questions"),
+    ("papers", "block_count"),
+    ("users", "class_group"),
+    ("paper_attempts", "paper_id"),
+    ("paper_attempts", "payload_hash"),
+    ("paper_attempts", "answer_key"),
+]
+
+
+def add_missing_columns():
+    """Create missing tables, add the NEW_COLUMNS a table lacks, then create missing indexes."""
+    init_db()
+    inspector = inspect(engine)
+    for table_name, column_name in NEW_COLUMNS:
+        existing_columns = {column["name"] for column in inspector.get_columns(table_name)}
+        if column_name in existing_columns:
+            print(f"✅ Column '{table_name}.{column_name}' already exists")
+            continue
+        column_type = Base.metadata.tables[table_name].columns[column_name].type.compile(dialect=engine.dialect)
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+        print(f"✅ Column '{table_name}.{column_name}' added")
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    print("✅ Indexes up to date")
+
+
+if __name__ == "__main__":
+    try:
+        add_missing_columns()
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        raise SystemExit(1)
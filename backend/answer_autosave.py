@@ -0,0 +1,295 @@
+"""
+Answer Autosave for Paper Attempts
+PATCH requests carry only the answers that changed; they are coalesced in
+memory and written to paper_attempt_answers (one row per question) on an
+interval, so a burst of keystrokes costs one upsert per question.
+
+- Later deltas for the same question overwrite earlier ones before they
+  reach the database
+- Reads merge the stored rows with deltas that are still buffered
+- Submitting an attempt closes it: its autosaved answers are handed to the
+  submit handler and its rows are deleted in the submit's transaction; the
+  buffered deltas are only discarded once that commits (closed()), and a
+  failed submit reopens the attempt (reopen())
+- A write holds up only reads and submits of the attempts it contains;
+  flushes skip attempts that are being read or closed
+- Attempts idle for ANSWER_AUTOSAVE_IDLE_SECONDS are forgotten (their next
+  PATCH verifies them again), and deleted attempts are dropped
+"""
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from models import PaperAttempt, PaperAttemptAnswer, SessionLocal
+
+
+# ========== CONFIGURATION ==========
+ANSWER_AUTOSAVE_FLUSH_SECONDS = float(os.getenv("ANSWER_AUTOSAVE_FLUSH_SECONDS", "2"))
+ANSWER_AUTOSAVE_MAX_DELTAS = int(os.getenv("ANSWER_AUTOSAVE_MAX_DELTAS", "500"))  # Per request
+ANSWER_AUTOSAVE_IDLE_SECONDS = float(os.getenv("ANSWER_AUTOSAVE_IDLE_SECONDS", "3600"))  # Forget open attempts after
+ANSWER_MAX_LENGTH = 32
+
+UPSERT_BATCH_SIZE = 500  # Rows per INSERT (SQLite bound parameter limit)
+
+
+def normalize_answer(value) -> Optional[str]:
+    """
+    Compact stored form of an answer (None clears it).
+
+    Raises:
+        ValueError: If the answer is not a number or a short string
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError("Answers must be numbers or strings")
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    if len(value) > ANSWER_MAX_LENGTH:
+        raise ValueError(f"Answers must be at most {ANSWER_MAX_LENGTH} characters")
+    return value or None
+
+
+def decode_answer(value: str):
+    """Stored answer back in the form the frontend sends (a number when it is one)."""
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def upsert_answers(db: Session, rows: list):
+    """INSERT ... ON CONFLICT DO UPDATE for (attempt_id, question_id) rows."""
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        statement = insert(PaperAttemptAnswer).values(rows[start:start + UPSERT_BATCH_SIZE])
+        statement = statement.on_conflict_do_update(
+            index_elements=["attempt_id", "question_id"],
+            set_={"answer": statement.excluded.answer, "updated_at": statement.excluded.updated_at},
+        )
+        db.execute(statement)
+
+
+class AnswerAutosaveBuffer:
+    """Coalescing write buffer for autosaved answers, flushed on an interval."""
+    def __init__(self, flush_seconds: float = ANSWER_AUTOSAVE_FLUSH_SECONDS,
+                 idle_seconds: float = ANSWER_AUTOSAVE_IDLE_SECONDS, session_factory=SessionLocal):
+        self.flush_seconds = flush_seconds
+        self.idle_seconds = idle_seconds
+        self.session_factory = session_factory
+        self._pending: Dict[int, Dict[str, Optional[str]]] = {}  # attempt_id -> question_id -> answer
+        self._open: Dict[int, tuple] = {}  # attempt_id -> (user_id, question ids), verified open attempts
+        self._last_used: Dict[int, float] = {}  # attempt_id -> monotonic time of its last PATCH
+        self._closing: Dict[int, Optional[tuple]] = {}  # attempt_id -> its _open entry, while its submit commits
+        self._reading: Dict[int, int] = {}  # attempt_id -> reads of its stored rows in progress
+        self._writing: Set[int] = set()  # Attempts in the write in flight
+        self._lock = threading.Lock()  # Never held across a query
+        self._written = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()  # One flush at a time
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the interval and write whatever is still buffered."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                import traceback
+                print(f"❌ [AUTOSAVE] Flush failed: {str(e)}")
+                print(traceback.format_exc())
+            self.evict_idle()
+
+    def is_open(self, attempt_id: int, user_id: int) -> bool:
+        """Whether this attempt was already verified as open and owned by the user."""
+        entry = self._open.get(attempt_id)
+        return entry is not None and entry[0] == user_id
+
+    def open(self, attempt_id: int, user_id: int, question_ids):
+        with self._lock:
+            if attempt_id in self._closing:
+                return  # Being submitted: add() refuses it
+            self._open[attempt_id] = (user_id, frozenset(question_ids))
+            self._last_used[attempt_id] = time.monotonic()
+
+    def add(self, attempt_id: int, answers: dict) -> int:
+        """
+        Buffer answer deltas for an open attempt.
+
+        Raises:
+            KeyError: If the attempt is not open (closed by a submit meanwhile)
+            ValueError: For unknown question ids or invalid answers
+        """
+        _, question_ids = self._open[attempt_id]
+        deltas = {}
+        for question_id, value in answers.items():
+            question_id = str(question_id)
+            if question_id not in question_ids:
+                raise ValueError(f"Unknown question id: {question_id}")
+            deltas[question_id] = normalize_answer(value)
+        with self._lock:
+            if attempt_id not in self._open:
+                raise KeyError(attempt_id)
+            self._pending.setdefault(attempt_id, {}).update(deltas)
+            self._last_used[attempt_id] = time.monotonic()
+        return len(deltas)
+
+    def evict_idle(self) -> int:
+        """Forget open attempts with no PATCH for idle_seconds and nothing buffered; returns how many."""
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [attempt_id for attempt_id, used in self._last_used.items()
+                    if used < cutoff and attempt_id not in self._pending]
+            for attempt_id in idle:
+                self._open.pop(attempt_id, None)
+                self._last_used.pop(attempt_id, None)
+        return len(idle)
+
+    def drop(self, attempt_ids: Iterable[int]):
+        """Forget attempts that are being deleted, discarding their buffered deltas."""
+        attempt_ids = set(attempt_ids)
+        with self._lock:
+            self._written.wait_for(lambda: not attempt_ids & self._writing)  # Wait out a write of their rows
+            for attempt_id in attempt_ids:
+                self._open.pop(attempt_id, None)
+                self._last_used.pop(attempt_id, None)
+                self._pending.pop(attempt_id, None)
+                self._closing.pop(attempt_id, None)
+
+    def flush(self) -> int:
+        """Write buffered deltas; returns the number of rows upserted."""
+        with self._write_lock:
+            with self._lock:
+                # Attempts being read or submitted keep their deltas buffered until then
+                batch = {attempt_id: deltas for attempt_id, deltas in self._pending.items()
+                         if attempt_id not in self._reading and attempt_id not in self._closing}
+                if not batch:
+                    return 0
+                for attempt_id in batch:
+                    del self._pending[attempt_id]
+                self._writing = set(batch)
+            try:
+                return self._write(batch)
+            finally:
+                with self._lock:
+                    self._writing = set()
+                    self._written.notify_all()
+
+    def _write(self, batch: dict) -> int:
+        now = datetime.utcnow()
+        rows = [
+            {"attempt_id": attempt_id, "question_id": question_id, "answer": answer, "updated_at": now}
+            for attempt_id, deltas in batch.items()
+            for question_id, answer in deltas.items()
+        ]
+        db = self.session_factory()
+        try:
+            upsert_answers(db, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._requeue(db, batch)
+            raise
+        finally:
+            db.close()
+        return len(rows)
+
+    def _requeue(self, db: Session, batch: dict):
+        """
+        After a failed write, put the batch back underneath anything newer,
+        except for attempts that no longer exist (deleted meanwhile): their
+        rows would fail every later write too.
+        """
+        try:
+            existing = {attempt_id for (attempt_id,) in db.query(PaperAttempt.id).filter(
+                PaperAttempt.id.in_(list(batch))
+            )}
+        except Exception:
+            db.rollback()
+            existing = set(batch)  # Database unreachable: keep everything for the next try
+        gone = set(batch) - existing
+        with self._lock:
+            for attempt_id, deltas in batch.items():
+                if attempt_id in gone:
+                    self._open.pop(attempt_id, None)
+                    self._last_used.pop(attempt_id, None)
+                    self._pending.pop(attempt_id, None)
+                    self._closing.pop(attempt_id, None)
+                elif attempt_id in self._open or attempt_id in self._closing:
+                    self._pending[attempt_id] = {**deltas, **self._pending.get(attempt_id, {})}
+        if gone:
+            print(f"⚠️ [AUTOSAVE] Dropped buffered answers of {len(gone)} deleted attempt(s)")
+
+    def saved_answers(self, db: Session, attempt_id: int) -> dict:
+        """Autosaved answers of an attempt: stored rows overlaid with buffered deltas."""
+        with self._lock:
+            # Every delta is either stored or buffered: wait out a write of this attempt's
+            # rows, and keep flushes off them until the buffer is read too
+            self._written.wait_for(lambda: attempt_id not in self._writing)
+            self._reading[attempt_id] = self._reading.get(attempt_id, 0) + 1
+        try:
+            rows = db.query(PaperAttemptAnswer.question_id, PaperAttemptAnswer.answer).filter(
+                PaperAttemptAnswer.attempt_id == attempt_id
+            ).all()
+        finally:
+            with self._lock:
+                buffered = dict(self._pending.get(attempt_id, {}))
+                self._reading[attempt_id] -= 1
+                if not self._reading[attempt_id]:
+                    del self._reading[attempt_id]
+        answers = {question_id: answer for question_id, answer in rows}
+        answers.update(buffered)
+        return {question_id: decode_answer(answer) for question_id, answer in answers.items() if answer is not None}
+
+    def close(self, db: Session, attempt_id: int) -> dict:
+        """
+        Stop autosaving an attempt (on submit) and return its autosaved answers.
+        Its rows are deleted in the caller's transaction; call closed() once
+        that commits, or reopen() if it fails. Until then its buffered deltas
+        are kept (and not written).
+        """
+        with self._lock:
+            self._closing[attempt_id] = self._open.pop(attempt_id, None)
+            self._last_used.pop(attempt_id, None)
+        answers = self.saved_answers(db, attempt_id)
+        db.query(PaperAttemptAnswer).filter(PaperAttemptAnswer.attempt_id == attempt_id).delete()
+        return answers
+
+    def closed(self, attempt_id: int):
+        """The submit committed: discard the attempt's buffered deltas."""
+        with self._lock:
+            self._closing.pop(attempt_id, None)
+            self._pending.pop(attempt_id, None)
+
+    def reopen(self, attempt_id: int):
+        """The submit failed: autosave the attempt again (the next flush writes its buffered deltas)."""
+        with self._lock:
+            entry = self._closing.pop(attempt_id, None)
+            if entry is not None:
+                self._open[attempt_id] = entry
+                self._last_used[attempt_id] = time.monotonic()
+
+
+answer_autosave = AnswerAutosaveBuffer()
@@ -0,0 +1,96 @@
+"""
+Answer Keys for Paper Attempts
+Built once when an attempt starts and stored with it, so grading does not
+walk the generated blocks JSON again on submit.
+
+- Stored as parallel arrays: {"ids": [...], "answers": [...]}
+- Grading aligns the submitted answers to the key once, then compares all
+  of them in one vectorized pass (numpy when available)
+"""
+import math
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Optional: grade with the pure Python path
+    np = None
+
+
+ANSWER_TOLERANCE = 0.01  # Floating point answers (decimals, percentages)
+
+UNANSWERED = math.nan  # Skipped questions count as neither correct nor wrong
+UNPARSEABLE = math.inf  # Non-numeric and non-finite answers are always wrong
+
+
+def build_answer_key(generated_blocks: List[dict]) -> dict:
+    """
+    Parallel arrays of question ids and correct answers (None if a question has none).
+    Ids are strings, matching the keys of submitted answer maps.
+    """
+    ids = []
+    answers = []
+    for block in generated_blocks:
+        for question in block.get("questions", []):
+            ids.append(str(question.get("id")))
+            answer = question.get("answer")
+            answers.append(float(answer) if answer is not None else None)
+    return {"ids": ids, "answers": answers}
+
+
+def _to_float(value) -> float:
+    if value is None or value == "":
+        return UNANSWERED
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return UNPARSEABLE
+    return number if math.isfinite(number) else UNPARSEABLE
+
+
+def align_answers(answer_key: dict, answers: Optional[dict]) -> list:
+    """Submitted answers in answer key order, as given (None where missing)."""
+    answers = answers or {}
+    if any(not isinstance(question_id, str) for question_id in answers):
+        answers = {str(question_id): value for question_id, value in answers.items()}
+    return list(map(answers.get, answer_key["ids"]))
+
+
+def grade_answers(answer_key: dict, answers: Optional[dict]) -> Tuple[int, int]:
+    """
+    Grade submitted answers against an answer key.
+
+    Returns:
+        (correct, wrong); unanswered questions and questions without an answer are not counted
+    """
+    submitted = align_answers(answer_key, answers)
+
+    if np is not None:
+        expected = np.array(answer_key["answers"], dtype=float)  # None -> nan
+        try:
+            values = np.array(submitted, dtype=float)  # Numbers, numeric strings, None -> nan
+        except (TypeError, ValueError):
+            # Blank or non-numeric answers somewhere: convert one by one
+            values = np.array([_to_float(value) for value in submitted], dtype=float)
+        else:
+            # "nan" parses to nan as well, but only a missing answer is unanswered
+            for index in np.flatnonzero(np.isnan(values)):
+                if submitted[index] is not None:
+                    values[index] = UNPARSEABLE
+        graded = ~(np.isnan(values) | np.isnan(expected))
+        with np.errstate(invalid="ignore"):
+            correct = graded & (np.abs(values - expected) < ANSWER_TOLERANCE)
+        correct_count = int(np.count_nonzero(correct))
+        return correct_count, int(np.count_nonzero(graded)) - correct_count
+
+    correct_count = wrong_count = 0
+    for user_answer, correct_answer in zip(submitted, answer_key["answers"]):
+        if correct_answer is None:
+            continue
+        user_answer = _to_float(user_answer)
+        if math.isnan(user_answer):
+            continue
+        if abs(user_answer - correct_answer) < ANSWER_TOLERANCE:
+            correct_count += 1
+        else:
+            wrong_count += 1
+    return correct_count, wrong_count
@@ -0,0 +1,59 @@
+"""
+Rebuild the segment points (per operation type and paper level) from
+practice sessions and completed paper attempts, for databases that predate
+them (or to repair them). Group boards need no backfill: they read
+User.total_points.
+
+Usage:
+    python backfill_segment_points.py
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from dotenv import load_dotenv
+from models import PracticeSession, PaperAttempt, SegmentPoints, get_db
+from add_missing_columns import add_missing_columns
+from leaderboard_segments import earned_segments, segment_boards
+
+load_dotenv()
+
+BATCH_SIZE = 1000
+
+
+def backfill_segment_points():
+    """Replace every operation/level segment row with totals summed from history."""
+    add_missing_columns()  # Creates segment_points and adds users.class_group on older databases
+    db = next(get_db())
+
+    try:
+        totals = defaultdict(int)  # (segment, user_id) -> points
+        sources = (
+            ("operation", PracticeSession, PracticeSession.operation_type, PracticeSession.points_earned.isnot(None)),
+            ("level", PaperAttempt, PaperAttempt.paper_level, PaperAttempt.completed_at.isnot(None)),
+        )
+        for kind, model, value, earned in sources:
+            query = db.query(model.user_id, value, model.points_earned).filter(earned, model.points_earned != 0)
+            count = 0
+            for user_id, segment_value, points in query.yield_per(BATCH_SIZE):
+                for segment in earned_segments(kind, segment_value):
+                    totals[(segment, user_id)] += points or 0
+                    count += 1
+            print(f"📊 {model.__tablename__}: {count} row(s)")
+
+        deleted = db.query(SegmentPoints).delete(synchronize_session=False)
+        now = datetime.utcnow()
+        rows = [
+            {"segment": segment, "user_id": user_id, "points": points, "updated_at": now}
+            for (segment, user_id), points in totals.items()
+        ]
+        for start in range(0, len(rows), BATCH_SIZE):
+            db.execute(SegmentPoints.__table__.insert(), rows[start:start + BATCH_SIZE])
+        db.commit()
+        segment_boards.clear()
+        print(f"✅ Replaced {deleted} segment row(s) with {len(rows)} across {len({segment for segment, _ in totals})} segment(s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill_segment_points()
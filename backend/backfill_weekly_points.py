@@ -0,0 +1,74 @@
+"""
+Rebuild the weekly points buckets from practice sessions and completed
+paper attempts, for databases that predate them (or to repair them).
+Points count towards the ISO week the session or attempt was completed in.
+
+Usage:
+    python backfill_weekly_points.py            # Rebuild every week
+    python backfill_weekly_points.py --weeks 4  # Only the last 4 weeks (including this one)
+"""
+
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from sqlalchemy import func
+from models import PracticeSession, PaperAttempt, WeeklyPoints, get_db, init_db
+from leaderboard_service import iso_week, week_start, reconcile_leaderboards
+
+load_dotenv()
+
+BATCH_SIZE = 1000
+
+
+def backfill_weekly_points(weeks=None):
+    """Replace the buckets of the covered weeks with totals summed from history."""
+    init_db()  # Creates the weekly_points table on older databases
+    db = next(get_db())
+    since = week_start() - timedelta(weeks=weeks - 1) if weeks else None
+
+    try:
+        totals = defaultdict(int)  # (user_id, iso_week) -> points
+        sources = (
+            (PracticeSession, func.coalesce(PracticeSession.completed_at, PracticeSession.started_at)),
+            (PaperAttempt, PaperAttempt.completed_at),
+        )
+        for model, earned_at in sources:
+            query = db.query(model.user_id, earned_at, model.points_earned).filter(
+                earned_at.isnot(None), model.points_earned != 0
+            )
+            if since:
+                query = query.filter(earned_at >= since)
+            count = 0
+            for user_id, when, points in query.yield_per(BATCH_SIZE):
+                totals[(user_id, iso_week(when))] += points or 0
+                count += 1
+            print(f"📊 {model.__tablename__}: {count} row(s)")
+
+        covered = db.query(WeeklyPoints)
+        if since:
+            covered = covered.filter(WeeklyPoints.iso_week.in_(
+                [iso_week(since + timedelta(weeks=offset)) for offset in range(weeks)]
+            ))
+        deleted = covered.delete(synchronize_session=False)
+
+        now = datetime.utcnow()
+        rows = [
+            {"user_id": user_id, "iso_week": week, "points": points, "updated_at": now}
+            for (user_id, week), points in totals.items()
+        ]
+        for start in range(0, len(rows), BATCH_SIZE):
+            db.execute(WeeklyPoints.__table__.insert(), rows[start:start + BATCH_SIZE])
+        db.commit()
+        print(f"✅ Replaced {deleted} bucket(s) with {len(rows)} across {len({week for _, week in totals})} week(s)")
+
+        drift = reconcile_leaderboards(db)
+        print(f"✅ Leaderboards rebuilt ({drift['weekly']} weekly row(s) changed)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    weeks = int(arguments[arguments.index("--weeks") + 1]) if "--weeks" in arguments else None
+    backfill_weekly_points(weeks)
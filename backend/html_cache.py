@@ -0,0 +1,113 @@
+"""
+Cached HTML Previews
+Keeps rendered generate_html output in an in-memory LRU keyed by a hash of
+its inputs, together with gzip and brotli encodings computed once.
+
+- Strong ETags (one per encoding) so browsers and nginx can revalidate with 304
+- Encodings picked from Accept-Encoding (br > gzip > identity)
+"""
+import gzip
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # Optional: fall back to gzip only
+    brotli = None
+
+
+# ========== CONFIGURATION ==========
+HTML_CACHE_MAX_ENTRIES = int(os.getenv("HTML_CACHE_MAX_ENTRIES", "256"))
+HTML_CACHE_MAX_BYTES = int(os.getenv("HTML_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # All encodings
+HTML_PREVIEW_MAX_AGE = int(os.getenv("HTML_PREVIEW_MAX_AGE", "86400"))
+
+
+class HtmlPreview:
+    """One rendered preview and its pre-compressed encodings."""
+    def __init__(self, html: str):
+        self.identity = html.encode("utf-8")
+        self.digest = hashlib.sha256(self.identity).hexdigest()[:32]
+        self.encodings = {
+            "identity": self.identity,
+            "gzip": gzip.compress(self.identity, compresslevel=9, mtime=0),
+        }
+        if brotli is not None:
+            self.encodings["br"] = brotli.compress(self.identity, quality=11)
+
+    @property
+    def size(self) -> int:
+        return sum(len(body) for body in self.encodings.values())
+
+    def etag(self, encoding: str) -> str:
+        """Strong ETag; each encoding is a different representation."""
+        suffix = "" if encoding == "identity" else f"-{encoding}"
+        return f'"{self.digest}{suffix}"'
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether If-None-Match names any representation of this preview."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return any(self.etag(encoding) in tags for encoding in self.encodings)
+
+    def negotiate(self, accept_encoding: Optional[str]) -> str:
+        """Best available encoding the client accepts."""
+        accepted = {}
+        for part in (accept_encoding or "").lower().split(","):
+            name, _, params = part.strip().partition(";")
+            quality = 1.0
+            if params.strip().startswith("q="):
+                try:
+                    quality = float(params.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+            if name:
+                accepted[name] = quality
+        for encoding in ("br", "gzip"):
+            if encoding in self.encodings and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding
+        return "identity"
+
+
+class HtmlPreviewCache:
+    """LRU of HtmlPreview objects bounded by entry count and total bytes."""
+    def __init__(self, max_entries: int = HTML_CACHE_MAX_ENTRIES, max_bytes: int = HTML_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, HtmlPreview]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Cache key from the inputs that determine the HTML."""
+        payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[HtmlPreview]:
+        preview = self._entries.get(key)
+        if preview is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return preview
+
+    def put(self, key: str, preview: HtmlPreview):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        self._entries[key] = preview
+        self._bytes += preview.size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+
+
+html_preview_cache = HtmlPreviewCache()
@@ -23,6 +23,134 @@ def format_number(num: float) -> str:
     return str(num)
 
 
+_MISSING = object()
+
+
+def is_vertical_question(question) -> bool:
+    """Whether a question is laid out vertically (operands stacked in a column)."""
+    # Only fall back to is_vertical when isVertical is missing (a failed attribute
+    # lookup on a pydantic model is slow, so do not evaluate it eagerly)
+    vertical = getattr(question, 'isVertical', _MISSING)
+    if vertical is _MISSING:
+        return getattr(question, 'is_vertical', False)
+    return vertical
+
+
+def is_decimal_operands(question) -> bool:
+    """Decimal add/sub questions store operands as integers * 10 (e.g. 70 for 7.0)."""
+    return all(op % 10 == 0 and op >= 10 and op <= 9990 for op in question.operands) if hasattr(question, 'operands') else False
+
+
+def vertical_operand_text(question, operand) -> str:
+    """Display value of one operand in the vertical table."""
+    return f"{(operand / 10):.1f}" if is_decimal_operands(question) else format_number(operand)
+
+
+def vertical_operator(question, row_idx: int) -> str:
+    """Operator shown to the left of operand row `row_idx` in the vertical table."""
+    operator = ""
+    if row_idx > 0:
+        # For add_sub questions, operators are in the operators list
+        if hasattr(question, 'operators') and question.operators and len(question.operators) > row_idx - 1:
+            operator = question.operators[row_idx - 1]
+        # For single operator questions (subtraction, etc.)
+        elif hasattr(question, 'operator') and question.operator and question.operator != "±":
+            if question.operator == "-":
+                operator = question.operator  # Show minus for subtraction
+            # For addition, operator is typically shown only on last line
+            elif question.operator == "+" and row_idx == len(question.operands) - 1:
+                operator = question.operator
+    return operator
+
+
+def horizontal_question_text(question) -> str:
+    """Question text for the horizontal layout (multiplication, division, etc.)."""
+    # Get operator to determine special formatting
+    operator = getattr(question, 'operator', '')
+    question_text = getattr(question, 'text', '')
+    
+    # Handle special operations that need custom formatting
+    if operator == "√" or operator == "∛":
+        # Square root or cube root - use text field directly (contains symbols)
+        return question_text
+    elif operator == "×" and question_text and "." in question_text:
+        # Decimal multiplication - use text field directly (contains decimals)
+        return question_text
+    elif question_text and (question_text.startswith("√") or question_text.startswith("∛") or "LCM" in question_text or "GCD" in question_text or "%" in question_text or "." in question_text):
+        # Use text field directly for operations that have special formatting (LCM, GCD, percentage, etc.)
+        return question_text
+    elif hasattr(question, 'operands') and question.operands:
+        # Standard format from operands
+        if len(question.operands) == 2:
+            op1 = format_number(question.operands[0])
+            op2 = format_number(question.operands[1])
+            operator = question.operator or "×"
+            return f"{op1} {operator} {op2} ="
+        else:
+            # Multiple operands
+            parts = [format_number(question.operands[0])]
+            for i in range(1, len(question.operands)):
+                op = question.operands[i]
+                operator = question.operators[i - 1] if hasattr(question, 'operators') and question.operators and len(question.operators) > i - 1 else "+"
+                parts.append(f"{operator} {format_number(op)}")
+            return f"{' '.join(parts)} ="
+    return question_text or ""
+
+
+def answer_key_question_text(q) -> str:
+    """Question text shown next to each answer in the answer key."""
+    question_text = ""
+    operator = getattr(q, 'operator', '')
+    text_field = getattr(q, 'text', '')
+    
+    # Handle special operations
+    if operator == "√" or operator == "∛":
+        # Use text field directly for root symbols
+        question_text = text_field.replace('\n', ' ') if text_field else ""
+    elif text_field and ("." in text_field or "LCM" in text_field or "GCD" in text_field or "%" in text_field or text_field.startswith("√") or text_field.startswith("∛")):
+        # Use text field directly for special operations (LCM, GCD, percentage, decimals, roots)
+        question_text = text_field.replace('\n', ' ')
+    elif text_field:
+        question_text = text_field.replace('\n', ' ')
+    elif hasattr(q, 'operands') and q.operands:
+        if len(q.operands) == 2:
+            op1 = format_number(q.operands[0])
+            op2 = format_number(q.operands[1])
+            operator = getattr(q, 'operator', '×')
+            question_text = f"{op1} {operator} {op2} ="
+        else:
+            # Multiple operands
+            parts = [format_number(q.operands[0])]
+            for i in range(1, len(q.operands)):
+                op = q.operands[i]
+                operator = q.operators[i - 1] if hasattr(q, 'operators') and q.operators and len(q.operators) > i - 1 else "+"
+                parts.append(f"{operator} {format_number(op)}")
+            question_text = " ".join(parts) + " ="
+    return question_text
+
+
+def split_columns(items: list, columns: int) -> List[list]:
+    """Split items into columns, filling the first column completely, then the next."""
+    per_column = (len(items) + columns - 1) // columns  # Ceiling division
+    return [items[i * per_column:(i + 1) * per_column] for i in range(columns)]
+
+
+def collect_answer_key(generated_blocks: List[GeneratedBlock]) -> List[dict]:
+    """Numbered answer key entries for every question that has an answer."""
+    all_answers = []
+    answer_counter = 1
+    for block in generated_blocks:
+        for q in block.questions:
+            if hasattr(q, 'answer') and q.answer is not None:
+                all_answers.append({
+                    'number': answer_counter,
+                    'question': answer_key_question_text(q),
+                    'answer': format_number(q.answer)
+                })
+                answer_counter += 1
+    return all_answers
+
+
 def render_vertical_question(question, show_answer: bool = False) -> str:
     """Render a vertical question (addition/subtraction)."""
     # Check if this is a decimal question
@@ -90,37 +218,7 @@ def render_horizontal_question(question, show_answer: bool = False) -> str:
     # Question text column
     html += '<td class="question-col">'
     
-    # Get operator to determine special formatting
-    operator = getattr(question, 'operator', '')
-    question_text = getattr(question, 'text', '')
-    
-    # Handle special operations that need custom formatting
-    if operator == "√" or operator == "∛":
-        # Square root or cube root - use text field directly (contains symbols)
-        html += f'<div class="question-text">{question_text}</div>'
-    elif operator == "×" and question_text and "." in question_text:
-        # Decimal multiplication - use text field directly (contains decimals)
-        html += f'<div class="question-text">{question_text}</div>'
-    elif question_text and (question_text.startswith("√") or question_text.startswith("∛") or "LCM" in question_text or "GCD" in question_text or "%" in question_text or "." in question_text):
-        # Use text field directly for operations that have special formatting (LCM, GCD, percentage, etc.)
-        html += f'<div class="question-text">{question_text}</div>'
-    elif hasattr(question, 'operands') and question.operands:
-        # Standard format from operands
-        if len(question.operands) == 2:
-            op1 = format_number(question.operands[0])
-            op2 = format_number(question.operands[1])
-            operator = question.operator or "×"
-            html += f'<div class="question-text">{op1} {operator} {op2} =</div>'
-        else:
-            # Multiple operands
-            parts = [format_number(question.operands[0])]
-            for i in range(1, len(question.operands)):
-                op = question.operands[i]
-                operator = question.operators[i - 1] if hasattr(question, 'operators') and question.operators and len(question.operators) > i - 1 else "+"
-                parts.append(f"{operator} {format_number(op)}")
-            html += f'<div class="question-text">{" ".join(parts)} =</div>'
-    else:
-        html += f'<div class="question-text">{question_text or ""}</div>'
+    html += f'<div class="question-text">{horizontal_question_text(question)}</div>'
     
     html += '</td>'
     
@@ -492,15 +590,11 @@ def generate_html(config: PaperConfig, generated_blocks: List[GeneratedBlock],
                 html += f'<h2 class="section-title">{block.config.title}</h2>'
             
             # Check if block has vertical questions
-            has_vertical = any(
-                getattr(q, 'isVertical', getattr(q, 'is_vertical', False))
-                for q in block.questions
-            ) if block.questions else False
+            has_vertical = any(is_vertical_question(q) for q in block.questions) if block.questions else False
             
             if has_vertical:
                 # Render vertical questions in table structure (matching preview exactly)
-                vertical_questions = [q for q in block.questions 
-                                     if getattr(q, 'isVertical', getattr(q, 'is_vertical', False))]
+                vertical_questions = [q for q in block.questions if is_vertical_question(q)]
                 
                 # Process in chunks of 10
                 for chunk_start in range(0, len(vertical_questions), 10):
@@ -526,25 +620,8 @@ def generate_html(config: PaperConfig, generated_blocks: List[GeneratedBlock],
                             html += '<tr>'
                             for q in chunk:
                                 if hasattr(q, 'operands') and row_idx < len(q.operands):
-                                    op = q.operands[row_idx]
-                                    # Check if decimal
-                                    is_decimal = all(op % 10 == 0 and op >= 10 and op <= 9990 for op in q.operands) if hasattr(q, 'operands') else False
-                                    
-                                    # Determine operator
-                                    operator = ""
-                                    if row_idx > 0:
-                                        # For add_sub questions, operators are in the operators list
-                                        if hasattr(q, 'operators') and q.operators and len(q.operators) > row_idx - 1:
-                                            operator = q.operators[row_idx - 1]
-                                        # For single operator questions (subtraction, etc.)
-                                        elif hasattr(q, 'operator') and q.operator and q.operator != "±":
-                                            if q.operator == "-":
-                                                operator = q.operator  # Show minus for subtraction
-                                            # For addition, operator is typically shown only on last line
-                                            elif q.operator == "+" and row_idx == len(q.operands) - 1:
-                                                operator = q.operator
-                                    
-                                    display_value = f"{(op / 10):.1f}" if is_decimal else format_number(op)
+                                    operator = vertical_operator(q, row_idx)
+                                    display_value = vertical_operand_text(q, q.operands[row_idx])
                                     html += f'<td class="operand-cell"><div class="operand-content">'
                                     html += '<div class="operand-wrapper">'
                                     if operator:
@@ -581,13 +658,10 @@ def generate_html(config: PaperConfig, generated_blocks: List[GeneratedBlock],
                     html += '</table>'
             else:
                 # Render horizontal questions in columns (fill first column, then second)
-                horizontal_questions = [q for q in block.questions 
-                                      if not getattr(q, 'isVertical', getattr(q, 'is_vertical', False))]
+                horizontal_questions = [q for q in block.questions if not is_vertical_question(q)]
                 
                 # Split into two columns - fill first column completely, then second
-                mid_point = (len(horizontal_questions) + 1) // 2  # Ceiling division
-                column1 = horizontal_questions[:mid_point]
-                column2 = horizontal_questions[mid_point:]
+                column1, column2 = split_columns(horizontal_questions, 2)
                 
                 # Render row by row
                 max_rows = max(len(column1), len(column2))
@@ -661,53 +735,10 @@ def generate_html(config: PaperConfig, generated_blocks: List[GeneratedBlock],
         '''
         html += '</style>'
         
-        # Collect all answers first
-        all_answers = []
-        answer_counter = 1
-        for block in generated_blocks:
-            for q in block.questions:
-                if hasattr(q, 'answer') and q.answer is not None:
-                    # Build question text with proper formatting (same logic as render_horizontal_question)
-                    question_text = ""
-                    operator = getattr(q, 'operator', '')
-                    text_field = getattr(q, 'text', '')
-                    
-                    # Handle special operations
-                    if operator == "√" or operator == "∛":
-                        # Use text field directly for root symbols
-                        question_text = text_field.replace('\n', ' ') if text_field else ""
-                    elif text_field and ("." in text_field or "LCM" in text_field or "GCD" in text_field or "%" in text_field or text_field.startswith("√") or text_field.startswith("∛")):
-                        # Use text field directly for special operations (LCM, GCD, percentage, decimals, roots)
-                        question_text = text_field.replace('\n', ' ')
-                    elif text_field:
-                        question_text = text_field.replace('\n', ' ')
-                    elif hasattr(q, 'operands') and q.operands:
-                        if len(q.operands) == 2:
-                            op1 = format_number(q.operands[0])
-                            op2 = format_number(q.operands[1])
-                            operator = getattr(q, 'operator', '×')
-                            question_text = f"{op1} {operator} {op2} ="
-                        else:
-                            # Multiple operands
-                            parts = [format_number(q.operands[0])]
-                            for i in range(1, len(q.operands)):
-                                op = q.operands[i]
-                                operator = q.operators[i - 1] if hasattr(q, 'operators') and q.operators and len(q.operators) > i - 1 else "+"
-                                parts.append(f"{operator} {format_number(op)}")
-                            question_text = " ".join(parts) + " ="
-                    
-                    all_answers.append({
-                        'number': answer_counter,
-                        'question': question_text,
-                        'answer': format_number(q.answer)
-                    })
-                    answer_counter += 1
+        all_answers = collect_answer_key(generated_blocks)
         
         # Split into 3 columns - fill first column, then second, then third
-        items_per_column = (len(all_answers) + 2) // 3  # Ceiling division
-        column1 = all_answers[:items_per_column]
-        column2 = all_answers[items_per_column:items_per_column * 2]
-        column3 = all_answers[items_per_column * 2:]
+        column1, column2, column3 = split_columns(all_answers, 3)
         
         html += '<div class="answer-key-container">'
         # First column
@@ -0,0 +1,98 @@
+"""
+Cached Leaderboard Responses
+The serialized top-N JSON of each board is kept for a short TTL with a
+strong ETag, so dashboard polling is answered from memory or with a 304.
+
+- A board's entry is dropped as soon as a points change touches its top N
+  (the student is placed within N before or after the change)
+- Names and avatars can lag by up to the TTL
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+# ========== CONFIGURATION ==========
+LEADERBOARD_CACHE_TTL_SECONDS = float(os.getenv("LEADERBOARD_CACHE_TTL_SECONDS", "30"))
+LEADERBOARD_SIZE = 100  # Entries served by the leaderboard endpoints
+
+BOARDS = ("overall", "weekly")
+
+
+class CachedLeaderboard:
+    """One serialized board response."""
+    def __init__(self, entries: List[dict], ttl: float):
+        self.body = json.dumps(entries, separators=(",", ":")).encode("utf-8")
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.expires = time.monotonic() + ttl
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether If-None-Match names this response."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        return self.etag in {tag.strip() for tag in if_none_match.split(",")}
+
+
+class LeaderboardCache:
+    """Per-board response cache with TTL and rank-aware invalidation."""
+    def __init__(self, ttl: float = LEADERBOARD_CACHE_TTL_SECONDS, size: int = LEADERBOARD_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._entries: Dict[str, CachedLeaderboard] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def generation(self, board: str) -> int:
+        """Read before building a response; put() discards it if the board changed meanwhile."""
+        with self._lock:
+            return self._generations.get(board, 0)
+
+    def get(self, board: str) -> Optional[CachedLeaderboard]:
+        with self._lock:
+            cached = self._entries.get(board)
+            if cached is None or cached.expires <= time.monotonic():
+                self._entries.pop(board, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return cached
+
+    def put(self, board: str, entries: List[dict], generation: int) -> CachedLeaderboard:
+        """Serialize entries; cached only if nothing was invalidated since generation."""
+        cached = CachedLeaderboard(entries, self.ttl)
+        with self._lock:
+            if self._generations.get(board, 0) == generation:
+                self._entries[board] = cached
+        return cached
+
+    def invalidate(self, board: Optional[str] = None, position: Optional[int] = None):
+        """
+        Drop cached responses of board (all boards if None). With position (a
+        1-based place on the board), only when it is within the served top N.
+        """
+        if position is not None and position > self.size:
+            return
+        with self._lock:
+            for name in ([board] if board else BOARDS):
+                self._generations[name] = self._generations.get(name, 0) + 1
+                if self._entries.pop(name, None) is not None:
+                    self.invalidations += 1
+
+    def metrics(self) -> dict:
+        return {
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+leaderboard_cache = LeaderboardCache()
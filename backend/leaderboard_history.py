@@ -0,0 +1,99 @@
+"""
+Weekly Leaderboard History
+Once a week is over, its board is archived from the weekly points buckets
+into weekly_leaderboard_snapshots: one row per week holding the rank-ordered
+user ids and their points as two parallel arrays.
+
+- A past week's top-K is one primary-key read
+- A user's rank history is one range read over the latest weeks
+- Ranks are competition ranks (ties share one), recomputed from the points
+"""
+from typing import List, Optional
+
+from sqlalchemy import desc
+from sqlalchemy.orm import Session
+
+from models import User, WeeklyPoints, WeeklyLeaderboardSnapshot
+from leaderboard_service import iso_week
+
+
+def _rank_at(points: List[int], index: int) -> int:
+    """Competition rank of the entry at index (board order)."""
+    while index > 0 and points[index - 1] == points[index]:
+        index -= 1
+    return index + 1
+
+
+def archive_week(db: Session, week: str) -> Optional[WeeklyLeaderboardSnapshot]:
+    """Archive one finished week's board from its buckets (no-op if already archived)."""
+    if db.get(WeeklyLeaderboardSnapshot, week) is not None:
+        return None
+    rows = db.query(WeeklyPoints.user_id, WeeklyPoints.points).join(
+        User, User.id == WeeklyPoints.user_id
+    ).filter(
+        WeeklyPoints.iso_week == week, WeeklyPoints.points > 0, User.role == "student"
+    ).order_by(desc(WeeklyPoints.points), WeeklyPoints.user_id).all()
+    snapshot = WeeklyLeaderboardSnapshot(
+        iso_week=week, user_ids=[user_id for user_id, _ in rows], points=[points for _, points in rows]
+    )
+    db.add(snapshot)
+    db.commit()
+    return snapshot
+
+
+def archive_finished_weeks(db: Session) -> List[str]:
+    """Archive every finished week that has buckets but no snapshot yet; returns the weeks archived."""
+    archived = {week for (week,) in db.query(WeeklyLeaderboardSnapshot.iso_week)}
+    finished = [
+        week for (week,) in db.query(WeeklyPoints.iso_week).filter(
+            WeeklyPoints.iso_week < iso_week()
+        ).distinct().order_by(WeeklyPoints.iso_week)
+        if week not in archived
+    ]
+    for week in finished:
+        snapshot = archive_week(db, week)
+        if snapshot is not None:
+            print(f"✅ [LEADERBOARD] Archived week {week} ({len(snapshot.user_ids)} students)")
+    return finished
+
+
+def get_week_top(db: Session, week: str, limit: int = 100) -> Optional[dict]:
+    """Top entries of an archived week with names, or None if the week is not archived."""
+    snapshot = db.get(WeeklyLeaderboardSnapshot, week)
+    if snapshot is None:
+        return None
+    user_ids = snapshot.user_ids[:limit]
+    users = {
+        user.id: user for user in db.query(User.id, User.name, User.avatar_url).filter(User.id.in_(user_ids))
+    }
+    entries = []
+    for index, user_id in enumerate(user_ids):
+        user = users.get(user_id)
+        entries.append({
+            "rank": _rank_at(snapshot.points, index),
+            "user_id": user_id,
+            "name": user.name if user else None,  # None once the account is deleted
+            "avatar_url": user.avatar_url if user else None,
+            "points": snapshot.points[index]
+        })
+    return {"iso_week": week, "total_students": len(snapshot.user_ids), "entries": entries}
+
+
+def get_rank_history(db: Session, user_id: int, weeks: int = 12) -> List[dict]:
+    """A user's weekly rank and points over the latest archived weeks, newest first."""
+    snapshots = db.query(WeeklyLeaderboardSnapshot).order_by(
+        desc(WeeklyLeaderboardSnapshot.iso_week)
+    ).limit(weeks).all()
+    history = []
+    for snapshot in snapshots:
+        try:
+            index = snapshot.user_ids.index(user_id)
+        except ValueError:
+            index = None  # Earned nothing that week
+        history.append({
+            "iso_week": snapshot.iso_week,
+            "rank": _rank_at(snapshot.points, index) if index is not None else None,
+            "points": snapshot.points[index] if index is not None else 0,
+            "total_students": len(snapshot.user_ids)
+        })
+    return history
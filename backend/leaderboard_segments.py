@@ -0,0 +1,244 @@
+"""
+Segmented Leaderboards
+Boards per practice operation type, paper level and class/group, with the
+same rank queries as the global boards (top-K, rank, neighbors).
+
+- operation:<operation_type>  points earned in practice sessions of that type
+- level:<paper_level>         points earned in paper attempts of that level
+- group:<class_group>         total points of the students in that group
+
+Operation and level points are kept in segment_points, one row per user
+and segment they earned points in (no ranks are stored, so storage grows
+only with points actually earned). Group boards come straight from
+User.total_points. Segments are loaded into RankedBoards on first use and
+kept in an LRU of hot segments (empty ones are never cached); points
+changes update the cached ones.
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import User, SegmentPoints
+from ranked_board import RankedBoard
+
+
+# ========== CONFIGURATION ==========
+LEADERBOARD_SEGMENT_CACHE_SIZE = int(os.getenv("LEADERBOARD_SEGMENT_CACHE_SIZE", "64"))  # Hot segments in memory
+
+SEGMENT_KINDS = ("operation", "level", "group")
+
+
+def segment_key(kind: str, value: str) -> str:
+    """
+    Raises:
+        ValueError: For unknown kinds or empty values
+    """
+    if kind not in SEGMENT_KINDS:
+        raise ValueError(f"Unknown segment kind: {kind}")
+    value = (value or "").strip()
+    if not value:
+        raise ValueError("Segment value is required")
+    return f"{kind}:{value}"
+
+
+def earned_segments(kind: str, value: Optional[str]) -> List[str]:
+    """Segments points earned under value count towards (none for a blank value)."""
+    return [segment_key(kind, value)] if (value or "").strip() else []
+
+
+def add_segment_points(db: Session, user_id: int, segments: List[str], points: int) -> Dict[str, int]:
+    """
+    Add earned points to the user's operation/level segments in the caller's
+    transaction. Returns each segment's new total, for SegmentBoards.update
+    once committed.
+    """
+    if not points:
+        return {}
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    now = datetime.utcnow()
+    totals = {}
+    for segment in segments:
+        statement = insert(SegmentPoints).values(segment=segment, user_id=user_id, points=points, updated_at=now)
+        statement = statement.on_conflict_do_update(
+            index_elements=["segment", "user_id"],
+            set_={"points": SegmentPoints.points + statement.excluded.points, "updated_at": statement.excluded.updated_at},
+        ).returning(SegmentPoints.points)
+        totals[segment] = db.execute(statement).scalar()
+    return totals
+
+
+def segment_standings(db: Session, segment: str) -> List[tuple]:
+    """(user_id, points) of every student on a segment's board."""
+    kind, _, value = segment.partition(":")
+    if kind == "group":
+        return db.query(User.id, func.coalesce(User.total_points, 0)).filter(
+            User.role == "student", User.class_group == value
+        ).all()
+    return db.query(SegmentPoints.user_id, SegmentPoints.points).join(
+        User, User.id == SegmentPoints.user_id
+    ).filter(SegmentPoints.segment == segment, User.role == "student").all()
+
+
+def list_segments(db: Session) -> Dict[str, List[str]]:
+    """Values that have a board, per kind."""
+    segments = {kind: [] for kind in SEGMENT_KINDS}
+    for (segment,) in db.query(SegmentPoints.segment).distinct().order_by(SegmentPoints.segment):
+        kind, _, value = segment.partition(":")
+        segments.setdefault(kind, []).append(value)
+    segments["group"] = [
+        group for (group,) in db.query(User.class_group).filter(
+            User.role == "student", User.class_group.isnot(None)
+        ).distinct().order_by(User.class_group)
+    ]
+    return segments
+
+
+class _Loading:
+    """A segment being loaded: other readers wait on it, updates are replayed onto it."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.updates: List[Tuple[int, Optional[int]]] = []  # (user_id, points or None to remove)
+
+
+class SegmentBoards:
+    """LRU of hot segment boards, loaded on demand and updated in place."""
+    def __init__(self, max_segments: int = LEADERBOARD_SEGMENT_CACHE_SIZE):
+        self.max_segments = max_segments
+        self._boards: "OrderedDict[str, RankedBoard]" = OrderedDict()
+        self._loading: Dict[str, _Loading] = {}
+        self._lock = threading.Lock()  # Never held across a query
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _board(self, db: Session, segment: str) -> RankedBoard:
+        """
+        Cached board of a segment, loading it if needed. Segments with nobody
+        on them are not cached, so unknown values can't evict hot boards.
+        """
+        while True:
+            with self._lock:
+                board = self._boards.get(segment)
+                if board is not None:
+                    self._boards.move_to_end(segment)
+                    self.hits += 1
+                    return board
+                loading = self._loading.get(segment)
+                if loading is None:
+                    loading = self._loading[segment] = _Loading()
+                    self.misses += 1
+                    break
+            loading.done.wait()  # Someone else is loading it; use theirs
+
+        try:
+            standings = segment_standings(db, segment)
+        except Exception:
+            with self._lock:
+                del self._loading[segment]
+            loading.done.set()
+            raise
+        board = RankedBoard(standings)
+        with self._lock:
+            del self._loading[segment]
+            # Updates committed while the query ran (absolute values, so
+            # replaying ones it already saw is harmless)
+            for user_id, points in loading.updates:
+                if points is None:
+                    board.remove(user_id)
+                else:
+                    board.set(user_id, points)
+            if len(board):
+                self._boards[segment] = board
+                while len(self._boards) > self.max_segments:
+                    self._boards.popitem(last=False)
+                    self.evictions += 1
+        loading.done.set()
+        return board
+
+    def top(self, db: Session, segment: str, count: int) -> List[Tuple[int, int, int]]:
+        board = self._board(db, segment)
+        with self._lock:
+            return board.top(count)
+
+    def around(self, db: Session, segment: str, user_id: int, count: int) -> Tuple[Optional[int], List[Tuple[int, int, int]]]:
+        board = self._board(db, segment)
+        with self._lock:
+            return board.rank(user_id), board.around(user_id, count)
+
+    def update(self, user: User, totals: Dict[str, int]):
+        """
+        After commit: set the user's new totals (from add_segment_points) on
+        cached boards, and their group board to their total points.
+        """
+        if user.role != "student":
+            return
+        if user.class_group:
+            totals = {**totals, segment_key("group", user.class_group): user.total_points or 0}
+        with self._lock:
+            for segment, points in totals.items():
+                self._apply(segment, user.id, points)
+
+    def remove_user(self, user_id: int, segment: Optional[str] = None):
+        """Drop a user from one cached board, or all of them (deleted students)."""
+        with self._lock:
+            for name in list(self._boards) + list(self._loading):
+                if segment is None or name == segment:
+                    self._apply(name, user_id, None)
+
+    def _apply(self, segment: str, user_id: int, points: Optional[int]):
+        """Set (or remove, for None) a user on a cached or loading board (call holding _lock)."""
+        board = self._boards.get(segment)
+        if board is not None:
+            if points is None:
+                board.remove(user_id)
+            else:
+                board.set(user_id, points)
+        elif segment in self._loading:
+            self._loading[segment].updates.append((user_id, points))
+
+    def clear(self):
+        """Forget every cached board (they reload on next use)."""
+        with self._lock:
+            self._boards.clear()
+
+    def metrics(self) -> dict:
+        return {
+            "cached_segments": len(self._boards),
+            "max_segments": self.max_segments,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+segment_boards = SegmentBoards()
+
+
+def _with_names(db: Session, ranked_entries: List[Tuple[int, int, int]]) -> List[dict]:
+    users = {
+        user.id: user for user in db.query(User.id, User.name, User.avatar_url).filter(
+            User.id.in_([user_id for user_id, _, _ in ranked_entries])
+        )
+    }
+    return [
+        {"rank": rank, "user_id": user_id, "name": users[user_id].name,
+         "avatar_url": users[user_id].avatar_url, "points": points}
+        for user_id, points, rank in ranked_entries if user_id in users
+    ]
+
+
+def get_segment_leaderboard(db: Session, segment: str, limit: int = 100) -> List[dict]:
+    return _with_names(db, segment_boards.top(db, segment, limit))
+
+
+def get_segment_standing(db: Session, segment: str, user_id: int, window: int = 5) -> dict:
+    rank, entries = segment_boards.around(db, segment, user_id, window)
+    return {"rank": rank, "entries": _with_names(db, entries)}
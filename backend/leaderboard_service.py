@@ -1,133 +1,789 @@
-"""Leaderboard calculation and management."""
+"""Leaderboard calculation and management.
+
+Ranks are competition ranks over points (descending): tied students share a
+rank and the next rank skips past them (1, 2, 2, 4), as SQL RANK() gives.
+A points change only moves the students between the old and new points (one
+UPDATE); a periodic full rebuild recomputes everything from the source data
+in one set-based statement per board, repairs drift and resets weekly points
+when a new week starts. Rebuilds use window functions, so SQLite needs 3.25+.
+
+While the app runs, both boards live in memory (LiveLeaderboards): points
+changes and reads go to RankedBoards, and the leaderboard table is written
+from them by a background snapshot. The SQL paths above are used whenever
+the in-memory boards are not loaded (scripts, startup failures).
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
-from models import User, Leaderboard, PracticeSession
+from sqlalchemy import desc, func, and_, case, literal, select
+from models import User, Leaderboard, WeeklyPoints, SessionLocal
 from datetime import datetime, timedelta
-from typing import List, Optional
-
-
-def update_leaderboard(db: Session) -> None:
-    """Update overall leaderboard rankings."""
-    # Get all users ordered by total points
-    users = db.query(User).filter(User.role == "student").order_by(
-        desc(User.total_points)
-    ).all()
-    
-    # Update or create leaderboard entries
-    for rank, user in enumerate(users, start=1):
-        leaderboard = db.query(Leaderboard).filter(
-            Leaderboard.user_id == user.id
-        ).first()
-        
-        if leaderboard:
-            leaderboard.total_points = user.total_points
-            leaderboard.rank = rank
-            leaderboard.last_updated = datetime.utcnow()
-        else:
-            leaderboard = Leaderboard(
-                user_id=user.id,
-                total_points=user.total_points,
-                rank=rank
-            )
-            db.add(leaderboard)
-    
+from typing import Dict, List, Optional, Tuple
+from ranked_board import RankedBoard
+from leaderboard_cache import leaderboard_cache
+from leaderboard_stream import leaderboard_stream
+
+
+# ========== CONFIGURATION ==========
+LEADERBOARD_RECONCILE_SECONDS = float(os.getenv("LEADERBOARD_RECONCILE_SECONDS", "900"))
+LEADERBOARD_SNAPSHOT_SECONDS = float(os.getenv("LEADERBOARD_SNAPSHOT_SECONDS", "5"))  # Longest a change waits
+LEADERBOARD_SNAPSHOT_MAX_CHANGES = int(os.getenv("LEADERBOARD_SNAPSHOT_MAX_CHANGES", "200"))  # Write sooner after this many
+
+UPSERT_BATCH_SIZE = 500  # Rows per INSERT (SQLite bound parameter limit)
+
+# (points column, rank column) of the two boards
+OVERALL = (Leaderboard.total_points, Leaderboard.rank)
+WEEKLY = (Leaderboard.weekly_points, Leaderboard.weekly_rank)
+
+
+def week_start(now: Optional[datetime] = None) -> datetime:
+    """Start of the current leaderboard week (Monday 00:00 UTC)."""
+    today = (now or datetime.utcnow()).date()
+    return datetime.combine(today - timedelta(days=today.weekday()), datetime.min.time())
+
+
+def iso_week(now: Optional[datetime] = None) -> str:
+    """Key of the current week's points bucket, e.g. "2026-W07"."""
+    year, week, _ = (now or datetime.utcnow()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def add_weekly_points(db: Session, user_id: int, points: int, now: Optional[datetime] = None):
+    """
+    Add earned points to the user's bucket for this week, in the caller's
+    transaction (commit together with User.total_points).
+    """
+    if not points:
+        return
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    now = now or datetime.utcnow()
+    statement = insert(WeeklyPoints).values(user_id=user_id, iso_week=iso_week(now), points=points, updated_at=now)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["user_id", "iso_week"],
+        set_={"points": WeeklyPoints.points + statement.excluded.points, "updated_at": statement.excluded.updated_at},
+    ))
+
+
+def _ranked_students(board, user_id: int):
+    """Other students placed on the board."""
+    return and_(
+        board[1].isnot(None),
+        Leaderboard.user_id != user_id,
+        Leaderboard.user_id.in_(select(User.id).where(User.role == "student"))
+    )
+
+
+def _shift_ranks(db: Session, board, user_id: int, condition, step: int) -> int:
+    """Move the ranks of the other students matching condition by step."""
+    rank_column = board[1]
+    return db.query(Leaderboard).filter(
+        _ranked_students(board, user_id), condition
+    ).update({rank_column: rank_column + step}, synchronize_session=False)
+
+
+def _place(db: Session, board, user_id: int, old_points: int, old_rank: Optional[int], new_points: int) -> int:
+    """
+    Shift only the students whose count of higher scores changes; returns the
+    new rank (one more than the number of students with more points).
+    """
+    points_column = board[0]
+    if old_rank is None:
+        # Entering the board: everyone with fewer points moves down one
+        _shift_ranks(db, board, user_id, points_column < new_points, 1)
+    elif new_points > old_points:
+        _shift_ranks(db, board, user_id, and_(points_column >= old_points, points_column < new_points), 1)
+    elif new_points < old_points:
+        _shift_ranks(db, board, user_id, and_(points_column >= new_points, points_column < old_points), -1)
+    else:
+        return old_rank
+    ahead = db.query(func.count(Leaderboard.id)).filter(
+        _ranked_students(board, user_id), points_column > new_points
+    ).scalar()
+    return ahead + 1
+
+
+def update_user_ranking(db: Session, user: User, weekly_points_delta: int = 0) -> None:
+    """
+    Sync one student's leaderboard row with their points and move them on both
+    boards. Call after User.total_points has been updated; weekly_points_delta
+    is the points just earned this week (added to the bucket by add_weekly_points).
+    """
+    if user.role != "student":
+        return
+    if live_leaderboards.loaded:
+        live_leaderboards.apply(user.id, user.total_points or 0, weekly_points_delta)
+        return
+    leaderboard = db.query(Leaderboard).filter(Leaderboard.user_id == user.id).first()
+    if not leaderboard:
+        leaderboard = Leaderboard(user_id=user.id, total_points=0, weekly_points=0)
+        db.add(leaderboard)
+        db.flush()
+
+    old_total = leaderboard.total_points or 0
+    old_weekly = leaderboard.weekly_points or 0
+    new_total = user.total_points or 0
+    new_weekly = max(0, old_weekly + weekly_points_delta)
+
+    old_ranks = (leaderboard.rank, leaderboard.weekly_rank)
+    leaderboard.rank = _place(db, OVERALL, user.id, old_total, leaderboard.rank, new_total)
+    leaderboard.weekly_rank = _place(db, WEEKLY, user.id, old_weekly, leaderboard.weekly_rank, new_weekly)
+    leaderboard.total_points = new_total
+    leaderboard.weekly_points = new_weekly
+    leaderboard.last_updated = datetime.utcnow()
+    db.commit()
+    leaderboard_cache.invalidate()
+    if (new_total, new_weekly) != (old_total, old_weekly):
+        leaderboard_stream.publish("overall", user.id, leaderboard.rank, old_ranks[0], new_total, new_weekly)
+        leaderboard_stream.publish("weekly", user.id, leaderboard.weekly_rank, old_ranks[1], new_total, new_weekly)
+
+
+def remove_from_rankings(db: Session, user_id: int) -> None:
+    """Close the gap a student leaves on both boards (call before deleting them)."""
+    if live_leaderboards.loaded:
+        live_leaderboards.remove(user_id)
+        return
+    leaderboard = db.query(Leaderboard).filter(Leaderboard.user_id == user_id).first()
+    if not leaderboard:
+        return
+    for board, points, rank in ((OVERALL, leaderboard.total_points, leaderboard.rank),
+                                (WEEKLY, leaderboard.weekly_points, leaderboard.weekly_rank)):
+        if rank is not None:
+            _shift_ranks(db, board, user_id, board[0] < (points or 0), -1)
+    leaderboard_stream.publish("overall", user_id, None, leaderboard.rank)
+    leaderboard_stream.publish("weekly", user_id, None, leaderboard.weekly_rank)
+    leaderboard.rank = None
+    leaderboard.weekly_rank = None
+    db.flush()
+    leaderboard_cache.invalidate()
+
+
+def _rebuild_board(db: Session, board, points, source) -> int:
+    """
+    Rewrite one board in a single INSERT ... SELECT ... ON CONFLICT DO UPDATE.
+
+    points is the SQL expression for each user's points over source (users,
+    optionally joined). Students are ranked with RANK() OVER; users that are
+    no longer students but still have a row are unranked. Missing rows are
+    created, and only rows whose points or rank differ are written, so the
+    statement's rowcount is the number of rows that had to change.
+    """
+    points_column, rank_column = board
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    rank = case(
+        (User.role == "student", func.rank().over(partition_by=User.role, order_by=points.desc())),
+        else_=None
+    )
+    ranked = select(
+        User.id, points, rank, literal(datetime.utcnow())
+    ).select_from(source).where(
+        # A WHERE clause is also what lets SQLite parse the ON CONFLICT after a SELECT
+        (User.role == "student") | User.id.in_(select(Leaderboard.user_id))
+    )
+    statement = insert(Leaderboard).from_select(
+        ["user_id", points_column.key, rank_column.key, "last_updated"], ranked
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={
+            points_column.key: statement.excluded[points_column.key],
+            rank_column.key: statement.excluded[rank_column.key],
+            "last_updated": statement.excluded.last_updated,
+        },
+        where=points_column.is_distinct_from(statement.excluded[points_column.key])
+        | rank_column.is_distinct_from(statement.excluded[rank_column.key])
+    )
+    changed = db.execute(statement).rowcount
     db.commit()
+    if changed:
+        leaderboard_cache.invalidate()
+        leaderboard_stream.reset()
+    return changed
+
+
+def update_leaderboard(db: Session) -> int:
+    """Rebuild overall leaderboard rankings from User.total_points."""
+    return _rebuild_board(db, OVERALL, func.coalesce(User.total_points, 0), User.__table__)
+
+
+def _weekly_points_subquery():
+    """Each user's points this week, from their bucket."""
+    return select(
+        WeeklyPoints.user_id,
+        WeeklyPoints.points.label('weekly_points')
+    ).where(
+        WeeklyPoints.iso_week == iso_week()
+    ).subquery()
+
+
+def update_weekly_leaderboard(db: Session) -> int:
+    """Rebuild weekly leaderboard rankings from this week's points buckets."""
+    weekly_points_query = _weekly_points_subquery()
+    source = User.__table__.outerjoin(weekly_points_query, User.id == weekly_points_query.c.user_id)
+    return _rebuild_board(db, WEEKLY, func.coalesce(weekly_points_query.c.weekly_points, 0), source)
 
 
-def update_weekly_leaderboard(db: Session) -> None:
-    """Update weekly leaderboard rankings."""
-    # Calculate start of week (Monday)
-    today = datetime.utcnow().date()
-    days_since_monday = today.weekday()
-    week_start = today - timedelta(days=days_since_monday)
-    week_start_datetime = datetime.combine(week_start, datetime.min.time())
-    
-    # Get weekly points for each user
-    weekly_points_query = db.query(
-        PracticeSession.user_id,
-        func.sum(PracticeSession.points_earned).label('weekly_points')
-    ).filter(
-        PracticeSession.started_at >= week_start_datetime
-    ).group_by(PracticeSession.user_id).subquery()
-    
-    # Get all users with their weekly points
-    users_with_points = db.query(
-        User.id,
-        User.name,
-        User.avatar_url,
-        func.coalesce(weekly_points_query.c.weekly_points, 0).label('weekly_points')
+def overall_standings(db: Session, user_ids=None) -> List[tuple]:
+    """(user_id, points) of every student (or those of user_ids), from User.total_points."""
+    query = db.query(User.id, func.coalesce(User.total_points, 0)).filter(User.role == "student")
+    if user_ids is not None:
+        query = query.filter(User.id.in_(user_ids))
+    return query.all()
+
+
+def weekly_standings(db: Session, user_ids=None) -> List[tuple]:
+    """(user_id, points) of every student (or those of user_ids), from this week's points buckets."""
+    weekly_points_query = _weekly_points_subquery()
+    query = db.query(
+        User.id, func.coalesce(weekly_points_query.c.weekly_points, 0)
     ).outerjoin(
         weekly_points_query, User.id == weekly_points_query.c.user_id
-    ).filter(
-        User.role == "student"
-    ).order_by(
-        desc('weekly_points')
-    ).all()
-    
-    # Update weekly leaderboard
-    for rank, (user_id, name, avatar_url, weekly_points) in enumerate(users_with_points, start=1):
-        leaderboard = db.query(Leaderboard).filter(
-            Leaderboard.user_id == user_id
-        ).first()
-        
-        if leaderboard:
-            leaderboard.weekly_points = int(weekly_points or 0)
-            leaderboard.weekly_rank = rank
-        else:
-            leaderboard = Leaderboard(
-                user_id=user_id,
-                weekly_points=int(weekly_points or 0),
-                weekly_rank=rank
-            )
-            db.add(leaderboard)
-    
-    db.commit()
+    ).filter(User.role == "student")
+    if user_ids is not None:
+        query = query.filter(User.id.in_(user_ids))
+    return query.all()
 
 
-def get_overall_leaderboard(db: Session, limit: int = 100) -> List[dict]:
-    """Get overall leaderboard."""
-    leaderboard_entries = db.query(Leaderboard).join(User).filter(
-        User.role == "student"
-    ).order_by(
-        desc(Leaderboard.total_points)
-    ).limit(limit).all()
-    
+def _upsert_leaderboard_rows(db: Session, rows: List[dict]):
+    """INSERT ... ON CONFLICT (user_id) DO UPDATE of both boards' points and ranks."""
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        statement = insert(Leaderboard).values(rows[start:start + UPSERT_BATCH_SIZE])
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={key: statement.excluded[key] for key in
+                  ("total_points", "rank", "weekly_points", "weekly_rank", "last_updated")},
+        )
+        db.execute(statement)
+
+
+class LiveLeaderboards:
+    """
+    Both boards in memory, loaded at startup from the source data. Points
+    changes update them in O(log n) and reads are served from them; the
+    leaderboard table is a snapshot, written only for rows whose points or
+    rank changed since the last write.
+
+    Snapshots are debounced: changes only mark the boards dirty, and a single
+    worker writes once the oldest unwritten change is snapshot_seconds old, or
+    sooner once max_changes have piled up. A burst of submissions costs one
+    write.
+    """
+    def __init__(self, snapshot_seconds: float = LEADERBOARD_SNAPSHOT_SECONDS,
+                 max_changes: int = LEADERBOARD_SNAPSHOT_MAX_CHANGES, session_factory=SessionLocal):
+        self.snapshot_seconds = snapshot_seconds
+        self.max_changes = max_changes
+        self.session_factory = session_factory
+        self.overall = RankedBoard()
+        self.weekly = RankedBoard()
+        self.loaded = False
+        self._stored: Dict[int, tuple] = {}  # user_id -> (total_points, rank, weekly_points, weekly_rank) in the table
+        self._dirty = False
+        self._dirty_since: Optional[float] = None  # Monotonic time of the oldest unwritten change
+        self._changes = 0
+        self._loads: List[Dict[int, bool]] = []  # Per load in progress: user_id -> removed, changed since its queries began
+        self._lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._task: Optional[asyncio.Task] = None
+        self._event_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+        # Metrics
+        self.snapshots = 0
+        self.snapshot_failures = 0
+        self.last_snapshot: Optional[datetime] = None
+        self.last_snapshot_rows = 0
+        self._durations = deque(maxlen=200)  # Seconds per snapshot write
+        self._lags = deque(maxlen=200)  # Seconds from the oldest change to its write
+
+    async def start(self):
+        if self._task:
+            return
+        try:
+            await asyncio.to_thread(self.run_load)  # Before the first request is served
+        except Exception as e:
+            import traceback
+            print(f"❌ [LEADERBOARD] Loading in-memory boards failed, serving from the database: {str(e)}")
+            print(traceback.format_exc())
+        self._event_loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._snapshot_loop())
+
+    async def stop(self):
+        """Stop the worker and flush whatever is still unwritten."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.to_thread(self.snapshot)
+
+    async def _snapshot_loop(self):
+        while True:
+            self._wake.clear()
+            with self._lock:
+                dirty_since = self._dirty_since if self._dirty else None
+                changes = self._changes
+            timeout = None if dirty_since is None else dirty_since + self.snapshot_seconds - time.monotonic()
+            if dirty_since is not None and (timeout <= 0 or changes >= self.max_changes):
+                try:
+                    await asyncio.to_thread(self.snapshot)
+                except Exception as e:
+                    import traceback
+                    print(f"❌ [LEADERBOARD] Snapshot failed: {str(e)}")
+                    print(traceback.format_exc())
+                    await asyncio.sleep(self.snapshot_seconds)  # Back off before retrying
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _mark_dirty(self):
+        """Count a change (call holding _lock); wakes the worker on the first one and at max_changes."""
+        self._changes += 1
+        if not self._dirty:
+            self._dirty = True
+            self._dirty_since = time.monotonic()
+            self._wake_worker()
+        elif self._changes == self.max_changes:
+            self._wake_worker()
+
+    def _wake_worker(self):
+        if self._event_loop is not None and self._wake is not None:
+            try:
+                self._event_loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass  # Event loop already closed
+
+    def run_load(self) -> Optional[dict]:
+        db = self.session_factory()
+        try:
+            return self.load(db)
+        finally:
+            db.close()
+
+    def load(self, db: Session) -> Optional[dict]:
+        """
+        (Re)build both boards from the source data. Once loaded, returns how
+        many students' points each in-memory board had wrong.
+
+        Points committed while the queries run may or may not be in their
+        results, and weekly changes arrive as deltas (not safe to replay), so
+        the students changed meanwhile are re-read before the boards are
+        swapped in, until a re-read finishes with no newer changes. Removed
+        students stay off (remove() runs before their deletion commits).
+        """
+        changed: Dict[int, bool] = {}
+        with self._lock:
+            self._loads.append(changed)
+        try:
+            overall = dict(overall_standings(db))
+            weekly = dict(weekly_standings(db))
+            stored = {
+                row.user_id: (row.total_points, row.rank, row.weekly_points, row.weekly_rank)
+                for row in db.query(Leaderboard.user_id, Leaderboard.total_points, Leaderboard.rank,
+                                    Leaderboard.weekly_points, Leaderboard.weekly_rank)
+            }
+            while True:
+                with self._write_lock:
+                    with self._lock:
+                        if not changed:
+                            drift = None
+                            if self.loaded:
+                                drift = {"overall": _points_drift(self.overall, overall.items()),
+                                         "weekly": _points_drift(self.weekly, weekly.items())}
+                            self.overall.load(overall.items())
+                            self.weekly.load(weekly.items())
+                            self._stored = stored
+                            self._mark_dirty()
+                            self.loaded = True
+                            leaderboard_cache.invalidate()
+                            leaderboard_stream.reset()
+                            break
+                        reread = [user_id for user_id, removed in changed.items() if not removed]
+                        removed = [user_id for user_id, removed in changed.items() if removed]
+                        changed.clear()
+                for user_id in removed:
+                    stored.pop(user_id, None)  # Their row is being deleted
+                for user_id in removed + reread:
+                    overall.pop(user_id, None)
+                    weekly.pop(user_id, None)
+                # apply() runs after the commit, so these reads see every change recorded so far
+                if reread:
+                    overall.update(overall_standings(db, reread))
+                    weekly.update(weekly_standings(db, reread))
+        finally:
+            with self._lock:
+                self._loads = [other for other in self._loads if other is not changed]
+        print(f"✅ [LEADERBOARD] Loaded {len(overall)} students into the in-memory boards")
+        return drift
+
+    def apply(self, user_id: int, total_points: int, weekly_points_delta: int = 0):
+        with self._lock:
+            for changed in self._loads:
+                changed.setdefault(user_id, False)
+            boards = (("overall", self.overall), ("weekly", self.weekly))
+            before = {name: (board.position(user_id), board.rank(user_id)) for name, board in boards}
+            points_before = (self.overall.points(user_id), self.weekly.points(user_id))
+            self.overall.set(user_id, total_points)
+            self.weekly.set(user_id, max(0, (self.weekly.points(user_id) or 0) + weekly_points_delta))
+            self._mark_dirty()
+            # A board's response changes only if the student is shown on it before or after
+            for name, board in boards:
+                positions = [position for position in (before[name][0], board.position(user_id)) if position]
+                leaderboard_cache.invalidate(name, position=min(positions))
+            # Stream entries carry both boards' points, so either change is news on both boards
+            points = (self.overall.points(user_id), self.weekly.points(user_id))
+            if points != points_before:
+                for name, board in boards:
+                    leaderboard_stream.publish(name, user_id, board.rank(user_id), before[name][1], *points)
+
+    def remove(self, user_id: int):
+        """Drop a student; the caller deletes their leaderboard row."""
+        with self._write_lock:  # An in-flight snapshot finishes writing first
+            with self._lock:
+                for changed in self._loads:
+                    changed[user_id] = True
+                for name, board in (("overall", self.overall), ("weekly", self.weekly)):
+                    if user_id in board:
+                        leaderboard_cache.invalidate(name, position=board.position(user_id))
+                        leaderboard_stream.publish(name, user_id, None, board.rank(user_id))
+                self.overall.remove(user_id)
+                self.weekly.remove(user_id)
+                self._stored.pop(user_id, None)
+                self._mark_dirty()
+
+    def _entries(self, board: str, ranked_entries) -> List[dict]:
+        """(user_id, points, rank) of one board as entries with both boards' points (call holding _lock)."""
+        other = self.weekly if board == "overall" else self.overall
+        entries = []
+        for user_id, points, rank in ranked_entries:
+            other_points = other.points(user_id) or 0
+            entries.append({
+                "rank": rank,
+                "user_id": user_id,
+                "total_points": points if board == "overall" else other_points,
+                "weekly_points": other_points if board == "overall" else points,
+            })
+        return entries
+
+    def top(self, board: str, count: int) -> List[dict]:
+        """Top entries of "overall" or "weekly" with both boards' points."""
+        with self._lock:
+            ranked = self.overall if board == "overall" else self.weekly
+            return self._entries(board, ranked.top(count))
+
+    def around(self, board: str, user_id: int, count: int) -> Tuple[Optional[int], List[dict]]:
+        """A student's rank and the entries up to count places either side of them."""
+        with self._lock:
+            ranked = self.overall if board == "overall" else self.weekly
+            return ranked.rank(user_id), self._entries(board, ranked.around(user_id, count))
+
+    def snapshot(self) -> int:
+        """Write rows whose points or rank changed since the last write; returns how many."""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return 0
+                overall = self.overall.standings()
+                weekly = self.weekly.standings()
+                dirty_since = self._dirty_since
+                self._dirty = False
+                self._dirty_since = None
+                self._changes = 0
+            started = time.perf_counter()
+
+            current = {user_id: [points, rank, 0, None] for user_id, points, rank in overall}
+            for user_id, points, rank in weekly:
+                current.setdefault(user_id, [0, None, 0, None])[2:] = [points, rank]
+            for user_id, stored in self._stored.items():
+                if user_id not in current and (stored[1] is not None or stored[3] is not None):
+                    current[user_id] = [stored[0], None, stored[2], None]  # No longer a student
+
+            now = datetime.utcnow()
+            rows = [
+                {"user_id": user_id, "total_points": values[0], "rank": values[1],
+                 "weekly_points": values[2], "weekly_rank": values[3], "last_updated": now}
+                for user_id, values in current.items() if self._stored.get(user_id) != tuple(values)
+            ]
+            if rows:
+                db = self.session_factory()
+                try:
+                    _upsert_leaderboard_rows(db, rows)
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    with self._lock:
+                        self.snapshot_failures += 1
+                        self._dirty = True
+                        self._dirty_since = min(dirty_since, self._dirty_since or dirty_since)
+                    raise
+                finally:
+                    db.close()
+                for row in rows:
+                    self._stored[row["user_id"]] = (row["total_points"], row["rank"],
+                                                    row["weekly_points"], row["weekly_rank"])
+            self.snapshots += 1
+            self.last_snapshot = datetime.utcnow()
+            self.last_snapshot_rows = len(rows)
+            self._durations.append(time.perf_counter() - started)
+            self._lags.append(time.monotonic() - dirty_since)
+            return len(rows)
+
+    def metrics(self) -> dict:
+        """Snapshot staleness and write statistics (milliseconds)."""
+        with self._lock:
+            staleness = time.monotonic() - self._dirty_since if self._dirty else 0.0
+            pending_changes = self._changes
+            students = len(self.overall)
+
+        def percentiles(samples) -> dict:
+            samples = sorted(samples)
+            if not samples:
+                return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+            return {
+                "p50": round(samples[len(samples) // 2] * 1000, 1),
+                "p95": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 1),
+                "max": round(samples[-1] * 1000, 1),
+            }
+
+        return {
+            "loaded": self.loaded,
+            "students": students,
+            "pending_changes": pending_changes,
+            "staleness_ms": round(staleness * 1000, 1),
+            "snapshot_seconds": self.snapshot_seconds,
+            "max_changes": self.max_changes,
+            "snapshots": self.snapshots,
+            "snapshot_failures": self.snapshot_failures,
+            "last_snapshot": self.last_snapshot.isoformat() if self.last_snapshot else None,
+            "last_snapshot_rows": self.last_snapshot_rows,
+            "snapshot_ms": percentiles(self._durations),
+            "write_lag_ms": percentiles(self._lags),
+        }
+
+
+def _points_drift(board: RankedBoard, standings) -> int:
+    """Students whose points on the board differ from the source (or are missing from either)."""
+    expected = {user_id: int(points or 0) for user_id, points in standings}
+    wrong = sum(1 for user_id, points in expected.items() if board.points(user_id) != points)
+    return wrong + sum(1 for user_id, _, _ in board.standings() if user_id not in expected)
+
+
+live_leaderboards = LiveLeaderboards()
+
+
+def reconcile_leaderboards(db: Session) -> dict:
+    """
+    Full recompute of both boards; reports how many rows incremental updates got
+    wrong. With the in-memory boards loaded, they are reloaded from the source
+    data and snapshotted instead.
+    """
+    if live_leaderboards.loaded:
+        drift = live_leaderboards.load(db)
+        live_leaderboards.snapshot()
+    else:
+        drift = {"overall": update_leaderboard(db), "weekly": update_weekly_leaderboard(db)}
+    if drift["overall"] or drift["weekly"]:
+        print(f"⚠️ [LEADERBOARD] Reconciliation corrected {drift['overall']} overall and "
+              f"{drift['weekly']} weekly rows")
+    return drift
+
+
+class LeaderboardReconciler:
+    """
+    Runs reconcile_leaderboards at startup, every interval and at each week
+    start, and archives each finished week's board.
+    """
+    def __init__(self, interval: float = LEADERBOARD_RECONCILE_SECONDS):
+        self.interval = interval
+        self.last_run: Optional[datetime] = None
+        self.last_drift: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def run_once(self, reconcile: bool = True) -> Optional[dict]:
+        from leaderboard_history import archive_finished_weeks  # Imports this module
+
+        db = SessionLocal()
+        try:
+            if reconcile:
+                self.last_drift = reconcile_leaderboards(db)
+            archive_finished_weeks(db)
+            self.last_run = datetime.utcnow()
+            return self.last_drift
+        finally:
+            db.close()
+
+    async def _loop(self):
+        while True:
+            try:
+                # Loading the in-memory boards at startup just reconciled them
+                await asyncio.to_thread(self.run_once, not (self.last_run is None and live_leaderboards.loaded))
+            except Exception as e:
+                import traceback
+                print(f"❌ [LEADERBOARD] Reconciliation failed: {str(e)}")
+                print(traceback.format_exc())
+            now = datetime.utcnow()
+            next_week = week_start(now) + timedelta(days=7)
+            await asyncio.sleep(max(1.0, min(self.interval, (next_week - now).total_seconds())))
+
+
+leaderboard_reconciler = LeaderboardReconciler()
+
+
+def _with_user_details(db: Session, entries: List[dict]) -> List[dict]:
+    """Add names and avatars to in-memory board entries in one query."""
+    users = {
+        user.id: user for user in db.query(User.id, User.name, User.avatar_url).filter(
+            User.id.in_([entry["user_id"] for entry in entries])
+        )
+    }
     result = []
-    for entry in leaderboard_entries:
-        user = db.query(User).filter(User.id == entry.user_id).first()
+    for entry in entries:
+        user = users.get(entry["user_id"])
         if user:
             result.append({
-                "rank": entry.rank or 0,
+                "rank": entry["rank"],
                 "user_id": user.id,
                 "name": user.name,
                 "avatar_url": user.avatar_url,
-                "total_points": entry.total_points or 0,
-                "weekly_points": entry.weekly_points or 0  # Include weekly_points even for overall leaderboard
+                "total_points": entry["total_points"],
+                "weekly_points": entry["weekly_points"]
             })
-    
     return result
 
 
+def get_overall_leaderboard(db: Session, limit: int = 100) -> List[dict]:
+    """Get overall leaderboard."""
+    if live_leaderboards.loaded:
+        return _with_user_details(db, live_leaderboards.top("overall", limit))
+    # One projected query: no per-row user lookups
+    rows = db.query(
+        Leaderboard.user_id, Leaderboard.rank, Leaderboard.total_points, Leaderboard.weekly_points,
+        User.name, User.avatar_url
+    ).join(User).filter(
+        User.role == "student"
+    ).order_by(
+        desc(Leaderboard.total_points), Leaderboard.user_id
+    ).limit(limit).all()
+
+    return [
+        {
+            "rank": row.rank or 0,
+            "user_id": row.user_id,
+            "name": row.name,
+            "avatar_url": row.avatar_url,
+            "total_points": row.total_points or 0,
+            "weekly_points": row.weekly_points or 0  # Include weekly_points even for overall leaderboard
+        }
+        for row in rows
+    ]
+
+
 def get_weekly_leaderboard(db: Session, limit: int = 100) -> List[dict]:
     """Get weekly leaderboard."""
-    leaderboard_entries = db.query(Leaderboard).join(User).filter(
+    if live_leaderboards.loaded:
+        return _with_user_details(db, live_leaderboards.top("weekly", limit))
+    # One projected query: no per-row user lookups
+    rows = db.query(
+        Leaderboard.user_id, Leaderboard.weekly_rank, Leaderboard.total_points, Leaderboard.weekly_points,
+        User.name, User.avatar_url
+    ).join(User).filter(
         User.role == "student"
     ).order_by(
-        desc(Leaderboard.weekly_points)
+        desc(Leaderboard.weekly_points), Leaderboard.user_id
     ).limit(limit).all()
-    
-    result = []
-    for entry in leaderboard_entries:
-        user = db.query(User).filter(User.id == entry.user_id).first()
-        if user:
-            result.append({
-                "rank": entry.weekly_rank or 0,
-                "user_id": user.id,
-                "name": user.name,
-                "avatar_url": user.avatar_url,
-                "weekly_points": entry.weekly_points or 0,
-                "total_points": entry.total_points or 0  # Include total_points even for weekly leaderboard
-            })
-    
-    return result
 
+    return [
+        {
+            "rank": row.weekly_rank or 0,
+            "user_id": row.user_id,
+            "name": row.name,
+            "avatar_url": row.avatar_url,
+            "weekly_points": row.weekly_points or 0,
+            "total_points": row.total_points or 0  # Include total_points even for weekly leaderboard
+        }
+        for row in rows
+    ]
+
+
+
+def _neighbors(placed, points_column, points: int, user_id: int, window: int, ahead: bool) -> list:
+    """
+    Up to window rows next to (points, user_id) in board order, nearest first.
+    Ties on points and the rest of the board are separate range scans of the
+    (points DESC, user_id) index, which an OR of both conditions would defeat.
+    """
+    if ahead:
+        same = placed.filter(points_column == points, Leaderboard.user_id < user_id).order_by(desc(Leaderboard.user_id))
+        beyond = placed.filter(points_column > points).order_by(points_column, desc(Leaderboard.user_id))
+    else:
+        same = placed.filter(points_column == points, Leaderboard.user_id > user_id).order_by(Leaderboard.user_id)
+        beyond = placed.filter(points_column < points).order_by(desc(points_column), Leaderboard.user_id)
+    rows = same.limit(window).all() if window else []
+    if len(rows) < window:
+        rows += beyond.limit(window - len(rows)).all()
+    return rows
+
+
+def _standing_from_table(db: Session, board, user_id: int, window: int) -> Tuple[Optional[int], List[dict]]:
+    """
+    A student's stored rank and neighbors from the leaderboard table: a
+    lookup by user_id and index range scans walking away from them, so the
+    cost does not grow with the board.
+    """
+    points_column, rank_column = board
+    placed = db.query(
+        Leaderboard.user_id, rank_column.label("rank"), points_column.label("points"),
+        Leaderboard.total_points, Leaderboard.weekly_points, User.name, User.avatar_url
+    ).join(User).filter(User.role == "student", rank_column.isnot(None))
+    me = placed.filter(Leaderboard.user_id == user_id).first()
+    if me is None:
+        return None, []
+    ahead = _neighbors(placed, points_column, me.points, user_id, window, ahead=True)
+    behind = _neighbors(placed, points_column, me.points, user_id, window, ahead=False)
+    return me.rank, [
+        {
+            "rank": row.rank,
+            "user_id": row.user_id,
+            "name": row.name,
+            "avatar_url": row.avatar_url,
+            "total_points": row.total_points or 0,
+            "weekly_points": row.weekly_points or 0
+        }
+        for row in list(reversed(ahead)) + [me] + behind
+    ]
+
+
+def get_user_standing(db: Session, user_id: int, window: int = 5) -> dict:
+    """A student's overall and weekly rank with up to window neighbors on each side."""
+    result = {}
+    for name, board in (("overall", OVERALL), ("weekly", WEEKLY)):
+        if live_leaderboards.loaded:
+            rank, entries = live_leaderboards.around(name, user_id, window)
+            entries = _with_user_details(db, entries)
+        else:
+            rank, entries = _standing_from_table(db, board, user_id, window)
+        result[name] = {"rank": rank, "entries": entries}
+    return result
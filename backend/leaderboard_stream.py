@@ -0,0 +1,227 @@
+"""
+Live Leaderboard Stream
+Server-sent events for dashboards: instead of polling the boards, clients
+fetch them once and then apply the rank deltas pushed here.
+
+- One in-process hub: points changes are collected from any thread and
+  coalesced, then one event per board is encoded once and fanned out to
+  every client every flush_seconds at most
+- Only changes that touch a board's top LEADERBOARD_SIZE are pushed
+- Per-client backpressure: each client has a bounded queue; a client too
+  slow to drain it has its backlog replaced by a single "reset" event
+  (refetch the boards), so it never holds up the others or grows memory
+- A heartbeat comment keeps idle connections (and proxies) alive
+
+Events:
+    event: ready   data: {"size": 100}   connected; fetch the boards now
+    event: deltas  data: {"board": "overall", "entries": [{"user_id", "rank", "total_points", "weekly_points"}, ...]}
+                   rank is the student's new rank on that board (null once removed)
+    event: reset   data: {}   the boards were rebuilt or this client fell behind
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Set
+
+from leaderboard_cache import LEADERBOARD_SIZE
+
+
+# ========== CONFIGURATION ==========
+LEADERBOARD_STREAM_FLUSH_SECONDS = float(os.getenv("LEADERBOARD_STREAM_FLUSH_SECONDS", "0.5"))  # Coalescing window
+LEADERBOARD_STREAM_HEARTBEAT_SECONDS = float(os.getenv("LEADERBOARD_STREAM_HEARTBEAT_SECONDS", "15"))
+LEADERBOARD_STREAM_QUEUE_SIZE = int(os.getenv("LEADERBOARD_STREAM_QUEUE_SIZE", "32"))  # Events buffered per client
+LEADERBOARD_STREAM_MAX_CLIENTS = int(os.getenv("LEADERBOARD_STREAM_MAX_CLIENTS", "5000"))
+
+RETRY_MS = 5000  # EventSource reconnect delay
+
+
+def _event(name: str, data: dict) -> bytes:
+    return f"event: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+RESET_EVENT = _event("reset", {})
+HEARTBEAT = b": ping\n\n"
+
+
+class StreamClient:
+    """One connected dashboard."""
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.resets = 0
+
+
+class LeaderboardStream:
+    """In-process fan-out hub for leaderboard deltas."""
+    def __init__(self, flush_seconds: float = LEADERBOARD_STREAM_FLUSH_SECONDS,
+                 heartbeat_seconds: float = LEADERBOARD_STREAM_HEARTBEAT_SECONDS,
+                 queue_size: int = LEADERBOARD_STREAM_QUEUE_SIZE,
+                 max_clients: int = LEADERBOARD_STREAM_MAX_CLIENTS, size: int = LEADERBOARD_SIZE):
+        self.flush_seconds = flush_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        self.size = size
+        self._clients: Set[StreamClient] = set()  # Only touched on the event loop
+        self._pending: Dict[str, Dict[int, tuple]] = {}  # board -> user_id -> (rank, total_points, weekly_points)
+        self._reset_pending = False
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._event_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+        # Metrics
+        self.events_sent = 0
+        self.deltas = 0
+        self.resets = 0  # Slow clients whose backlog was dropped
+        self.rejected = 0
+        self.peak_clients = 0
+        self._fanouts = deque(maxlen=200)  # Seconds per broadcast
+
+    async def start(self):
+        if self._task:
+            return
+        self._event_loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the hub and end every open stream."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for client in list(self._clients):
+            self._drain(client)
+            client.queue.put_nowait(None)
+
+    def publish(self, board: str, user_id: int, rank: Optional[int], previous_rank: Optional[int],
+                total_points: Optional[int] = None, weekly_points: Optional[int] = None):
+        """
+        Record one student's move on "overall" or "weekly" (any thread), with
+        their points on both boards. rank is None when the student was removed.
+        """
+        if not self._clients:
+            return
+        if (rank is None or rank > self.size) and (previous_rank is None or previous_rank > self.size):
+            return  # Not shown on the board before or after
+        with self._lock:
+            first = not self._pending and not self._reset_pending
+            self._pending.setdefault(board, {})[user_id] = (rank, total_points, weekly_points)
+        if first:
+            self._wake_worker()
+
+    def reset(self):
+        """Tell every client to refetch (boards were rebuilt); pending deltas are moot."""
+        if not self._clients:
+            return
+        with self._lock:
+            self._pending.clear()
+            self._reset_pending = True
+        self._wake_worker()
+
+    def _wake_worker(self):
+        if self._event_loop is not None and self._wake is not None:
+            try:
+                self._event_loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass  # Event loop already closed
+
+    async def _flush_loop(self):
+        idle_since = time.monotonic()
+        while True:
+            timeout = idle_since + self.heartbeat_seconds - time.monotonic()
+            try:
+                await asyncio.wait_for(self._wake.wait(), max(0.0, timeout))
+            except asyncio.TimeoutError:
+                self._broadcast(HEARTBEAT)
+                idle_since = time.monotonic()
+                continue
+            await asyncio.sleep(self.flush_seconds)  # Let a burst of submissions coalesce
+            self._wake.clear()
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                reset, self._reset_pending = self._reset_pending, False
+            if reset:
+                self._broadcast(RESET_EVENT)
+            for board, moves in pending.items():
+                self.deltas += len(moves)
+                self._broadcast(_event("deltas", {
+                    "board": board,
+                    "entries": [{"user_id": user_id, "rank": rank, "total_points": total_points,
+                                 "weekly_points": weekly_points}
+                                for user_id, (rank, total_points, weekly_points) in moves.items()],
+                }))
+            idle_since = time.monotonic()
+
+    def _broadcast(self, message: bytes):
+        started = time.perf_counter()
+        for client in list(self._clients):
+            self._offer(client, message)
+        if message is not HEARTBEAT:
+            self.events_sent += 1
+            self._fanouts.append(time.perf_counter() - started)
+
+    def _offer(self, client: StreamClient, message: bytes):
+        try:
+            client.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            if message is HEARTBEAT:
+                return  # A full queue is traffic enough
+            # Too slow to keep up: replace its backlog with one reset
+            self._drain(client)
+            client.queue.put_nowait(RESET_EVENT)
+            client.resets += 1
+            self.resets += 1
+
+    @staticmethod
+    def _drain(client: StreamClient):
+        while not client.queue.empty():
+            client.queue.get_nowait()
+
+    def subscribe(self) -> Optional[StreamClient]:
+        """Register a client (on the event loop); None when the hub is full."""
+        if len(self._clients) >= self.max_clients:
+            self.rejected += 1
+            return None
+        client = StreamClient(self.queue_size)
+        self._clients.add(client)
+        self.peak_clients = max(self.peak_clients, len(self._clients))
+        return client
+
+    def unsubscribe(self, client: StreamClient):
+        self._clients.discard(client)
+
+    async def events(self, client: StreamClient):
+        """The client's SSE body; unsubscribes when the connection goes away."""
+        try:
+            yield f"retry: {RETRY_MS}\n".encode("utf-8") + _event("ready", {"size": self.size})
+            while True:
+                message = await client.queue.get()
+                if message is None:
+                    return
+                yield message
+        finally:
+            self.unsubscribe(client)
+
+    def metrics(self) -> dict:
+        fanouts = sorted(self._fanouts)
+        return {
+            "clients": len(self._clients),
+            "peak_clients": self.peak_clients,
+            "max_clients": self.max_clients,
+            "rejected": self.rejected,
+            "events": self.events_sent,
+            "deltas": self.deltas,
+            "slow_client_resets": self.resets,
+            "fanout_ms": {
+                "p50": round(fanouts[len(fanouts) // 2] * 1000, 2) if fanouts else None,
+                "max": round(fanouts[-1] * 1000, 2) if fanouts else None,
+            },
+        }
+
+
+leaderboard_stream = LeaderboardStream()
+
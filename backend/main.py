@@ -1,11 +1,13 @@
 """FastAPI main application."""
 from fastapi import FastAPI, Depends, HTTPException, status, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse, JSONResponse, FileResponse, Response
 from fastapi.exceptions import RequestValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, load_only
 from typing import List
 from datetime import datetime
+import asyncio
 import json
 import hashlib
 import random
@@ -15,19 +17,38 @@ import uvicorn
 
 from models import Paper, PaperAttempt, get_db, init_db
 from schemas import (
-    PaperCreate, PaperResponse, PaperConfig, PreviewResponse,
-    GeneratedBlock, BlockConfig
+    PaperCreate, PaperResponse, PaperListItem, PaperListResponse, PaperConfig, PreviewResponse,
+    GeneratedBlock, BlockConfig, BulkPdfRequest
 )
-from user_schemas import PaperAttemptCreate, PaperAttemptResponse, PaperAttemptDetailResponse, PaperAttemptSubmit
-from auth import get_current_user
+from user_schemas import (
+    PaperAttemptCreate, PaperAttemptResponse, PaperAttemptDetailResponse, PaperAttemptSubmit,
+    PaperAttemptAnswersPatch
+)
+from auth import get_current_user, get_current_admin
 from models import User
 from gamification import calculate_points, check_and_award_badges, update_streak, check_and_award_super_rewards
-from leaderboard_service import update_leaderboard, update_weekly_leaderboard
+from leaderboard_service import update_user_ranking, add_weekly_points, leaderboard_reconciler, live_leaderboards
+from leaderboard_cache import leaderboard_cache
+from leaderboard_stream import leaderboard_stream
+from leaderboard_segments import earned_segments, add_segment_points, segment_boards
 from math_generator import generate_block
 from pdf_generator import generate_pdf
 from pdf_generator_v2 import generate_pdf_v2
-from pdf_generator_playwright import generate_pdf_playwright
-from presets import get_preset_blocks
+from pdf_engines import select_engine, render_pdf, count_questions, PDF_ENGINE, ENGINE_AUTO
+from pdf_layout import plan_paper
+from pdf_streaming import pdf_response
+from pdf_bulk import merge_papers, PDF_BULK_MAX_PAPERS
+from pdf_admission import pdf_admission, AdmissionRejected
+from html_template import generate_html
+from html_cache import html_preview_cache, HtmlPreview, HtmlPreviewCache, HTML_PREVIEW_MAX_AGE
+from presets import get_preset_blocks, get_level_display_name
+from pdf_jobs import pdf_job_queue, job_events, JOB_DONE, JOB_FAILED
+from pdf_catalog import pdf_catalog, PDF_CATALOG_ENABLED
+from saved_papers import materialize_paper, load_paper
+from pagination import encode_cursor, decode_cursor
+from answer_key import build_answer_key, grade_answers
+from answer_autosave import answer_autosave, ANSWER_AUTOSAVE_MAX_DELTAS
+from question_payloads import store_payload, attempt_payload
 
 # Lazy import of user_routes to prevent startup failures
 user_router = None
@@ -87,6 +108,34 @@ async def startup_event():
         print(f"❌ [STARTUP] Database initialization failed: {str(e)}")
         print(traceback.format_exc())
         # Don't crash the app, but log the error
+    
+    await pdf_job_queue.start()
+    await answer_autosave.start()
+    await leaderboard_stream.start()
+    await live_leaderboards.start()
+    await leaderboard_reconciler.start()
+    if PDF_CATALOG_ENABLED:
+        await pdf_catalog.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await leaderboard_stream.stop()  # Ends open streams so shutdown isn't held up
+    await answer_autosave.stop()
+    await leaderboard_reconciler.stop()
+    await live_leaderboards.stop()
+    await pdf_job_queue.stop()
+    await pdf_catalog.stop()
+
+
+# PDF admission control rejections (429 queue full / 503 wait deadline)
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 
 # Handle validation errors
@@ -101,23 +150,50 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
-@app.get("/api/papers", response_model=List[PaperResponse])
-async def list_papers(db: Session = Depends(get_db)):
-    """Get all papers."""
-    papers = db.query(Paper).order_by(Paper.created_at.desc()).all()
-    return papers
+@app.get("/api/papers", response_model=PaperListResponse)
+def list_papers(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = None,
+    level: str = None,
+    db: Session = Depends(get_db)
+):
+    """List papers newest first, one page at a time (full configs come from /api/papers/{id})."""
+    query = db.query(
+        Paper.id, Paper.title, Paper.level, Paper.block_count, Paper.created_at
+    )
+    if level:
+        query = query.filter(Paper.level == level)
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.filter(tuple_(Paper.created_at, Paper.id) < (cursor_created_at, cursor_id))
+    rows = query.order_by(Paper.created_at.desc(), Paper.id.desc()).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return PaperListResponse(
+        items=[PaperListItem.model_validate(row) for row in rows],
+        nextCursor=next_cursor
+    )
 
 
 # IMPORTANT: This route must come BEFORE /api/papers/{paper_id} to avoid route conflicts
 @app.get("/api/papers/attempts", response_model=List[PaperAttemptResponse])
-async def get_paper_attempts(
+def get_paper_attempts(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     limit: int = Query(20, ge=1, le=100)
 ):
     """Get user's paper attempt history."""
     try:
-        attempts = db.query(PaperAttempt).filter(
+        # Only the summary columns: the question payload and answers stay in the database
+        attempts = db.query(PaperAttempt).options(
+            load_only(*[getattr(PaperAttempt, field) for field in PaperAttemptResponse.model_fields])
+        ).filter(
             PaperAttempt.user_id == current_user.id
         ).order_by(PaperAttempt.started_at.desc()).limit(limit).all()
         
@@ -146,8 +222,13 @@ async def get_paper_attempts(
 
 
 @app.get("/api/papers/{paper_id}", response_model=PaperResponse)
-async def get_paper(paper_id: int, db: Session = Depends(get_db)):
+def get_paper(paper_id: int, db: Session = Depends(get_db)):
     """Get a single paper by ID."""
+    return get_paper_or_404(db, paper_id)
+
+
+def get_paper_or_404(db: Session, paper_id: int) -> Paper:
+    """Load a saved paper (async handlers call this through asyncio.to_thread)."""
     paper = db.query(Paper).filter(Paper.id == paper_id).first()
     if not paper:
         raise HTTPException(status_code=404, detail="Paper not found")
@@ -155,17 +236,23 @@ async def get_paper(paper_id: int, db: Session = Depends(get_db)):
 
 
 @app.post("/api/papers", response_model=PaperResponse, status_code=status.HTTP_201_CREATED)
-async def create_paper(paper_data: PaperCreate, db: Session = Depends(get_db)):
+def create_paper(paper_data: PaperCreate, db: Session = Depends(get_db)):
     """Create a new paper."""
     # If using preset level, ensure blocks are populated
     config = paper_data.config
     if paper_data.level != "Custom" and (not config.blocks or len(config.blocks) == 0):
         config.blocks = get_preset_blocks(paper_data.level)
     
+    config_data = config.model_dump()
+    # Generate the questions once; downloads and attempts read them from the row
+    seed, questions = materialize_paper(config_data)
     paper = Paper(
         title=paper_data.title,
         level=paper_data.level,
-        config=config.model_dump()
+        config=config_data,
+        seed=seed,
+        questions=questions,
+        block_count=len(config_data["blocks"])
     )
     db.add(paper)
     db.commit()
@@ -174,10 +261,9 @@ async def create_paper(paper_data: PaperCreate, db: Session = Depends(get_db)):
 
 
 @app.get("/api/presets/{level}")
-async def get_preset_blocks(level: str):
+async def get_preset_blocks_endpoint(level: str):
     """Get preset blocks for a given level."""
     try:
-        from presets import get_preset_blocks
         blocks = get_preset_blocks(level)
         # Convert BlockConfig to dict for JSON serialization
         return [block.model_dump() for block in blocks]
@@ -189,25 +275,8 @@ async def get_preset_blocks(level: str):
         raise HTTPException(status_code=500, detail=error_msg)
 
 
-def get_level_display_name(level: str) -> str:
-    """Convert level code to display name."""
-    if level == "Custom":
-        return ""
-    if level.startswith("AB-"):
-        try:
-            level_num = int(level.split("-")[1])
-            if 1 <= level_num <= 6:
-                return f"Basic Level {level_num}"
-            elif 7 <= level_num <= 10:
-                return f"Advanced Level {level_num}"
-        except (ValueError, IndexError):
-            pass
-    # Fallback: return level as-is if format is unexpected
-    return level
-
-
 @app.post("/api/papers/preview", response_model=PreviewResponse)
-async def preview_paper(config: PaperConfig):
+def preview_paper(config: PaperConfig):
     """Generate preview of questions."""
     try:
         print(f"Received preview request: level={config.level}, title={config.title}, blocks={len(config.blocks)}")
@@ -284,17 +353,19 @@ async def preview_paper(config: PaperConfig):
         )
 
 
-@app.post("/api/papers/generate-pdf")
-async def generate_pdf_endpoint(
-    request_data: dict
-):
-    """Generate PDF from config."""
+def prepare_pdf_request(request_data: dict):
+    """
+    Resolve a generate-pdf request body into (config, blocks, with_answers, answers_only).
+
+    Accepts camelCase and snake_case keys. Questions are taken from the provided
+    generated blocks, or regenerated from the seed (md5 of the config if absent).
+    """
     config = PaperConfig(**request_data.get("config", {}))
     # Handle both camelCase and snake_case
     with_answers = request_data.get("with_answers") or request_data.get("withAnswers", False)
     answers_only = request_data.get("answers_only") or request_data.get("answersOnly", False)
     seed = request_data.get("seed")
-    generated_blocks_data = request_data.get("generated_blocks")
+    generated_blocks_data = request_data.get("generated_blocks") or request_data.get("generatedBlocks")
     
     # Resolve blocks
     blocks = config.blocks
@@ -324,88 +395,351 @@ async def generate_pdf_endpoint(
             final_blocks.append(gen_block)
             question_id_counter += block.count
     
-    # Generate PDF using Playwright (industry standard - pixel perfect)
+    return config, final_blocks, with_answers, answers_only
+
+
+def get_pdf_filename(title: str, with_answers: bool, answers_only: bool) -> str:
+    """Download filename for a rendered paper."""
+    if answers_only:
+        return f"{title.replace(' ', '_')}_answers_only.pdf"
+    elif with_answers:
+        return f"{title.replace(' ', '_')}_with_answers.pdf"
+    return f"{title.replace(' ', '_')}.pdf"
+
+
+def resolve_pdf_engine(requested, config, generated_blocks, with_answers: bool = False,
+                       answers_only: bool = False, bulk: bool = False) -> str:
+    """Pick the PDF engine for a request, raising 400 for unknown engine names."""
+    page_count = None
+    if not bulk and (requested or PDF_ENGINE).lower() == ENGINE_AUTO:
+        page_count = plan_paper(config, generated_blocks, with_answers, answers_only).page_count
     try:
-        pdf_buffer = await generate_pdf_playwright(config, final_blocks, with_answers, answers_only)
-        if answers_only:
-            filename = f"{config.title.replace(' ', '_')}_answers_only.pdf"
-        elif with_answers:
-            filename = f"{config.title.replace(' ', '_')}_with_answers.pdf"
-        else:
-            filename = f"{config.title.replace(' ', '_')}.pdf"
-        
-        return StreamingResponse(
-            pdf_buffer,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        return select_engine(requested, count_questions(generated_blocks), bulk, page_count)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/papers/plan")
+def plan_paper_endpoint(request_data: dict):
+    """
+    Predict the page count and the questions on each page without rendering.
+    Takes the same body as /api/papers/generate-pdf.
+    """
+    config, final_blocks, with_answers, answers_only = prepare_pdf_request(request_data)
+    plan = plan_paper(config, final_blocks, with_answers, answers_only)
+    return {
+        "page_count": plan.page_count,
+        "pages": [
+            {"page": page.page, "section": page.section, "question_ranges": page.question_ranges}
+            for page in plan.pages
+        ],
+    }
+
+
+@app.post("/api/papers/generate-pdf")
+async def generate_pdf_endpoint(
+    request_data: dict
+):
+    """Generate PDF from config. Optional "engine": auto | playwright | reportlab."""
+    config, final_blocks, with_answers, answers_only = prepare_pdf_request(request_data)
+    engine = resolve_pdf_engine(request_data.get("engine"), config, final_blocks, with_answers, answers_only)
+    await pdf_admission.acquire()
+    try:
+        pdf_file = await render_pdf(config, final_blocks, with_answers, answers_only, engine)
+        filename = get_pdf_filename(config.title, with_answers, answers_only)
+        return pdf_response(pdf_file, filename, {"X-PDF-Engine": engine})
     except Exception as e:
         import traceback
         error_msg = str(e)
         traceback_str = traceback.format_exc()
         print(f"PDF generation error: {error_msg}\n{traceback_str}")
         raise HTTPException(status_code=500, detail=f"Failed to generate PDF: {error_msg}")
+    finally:
+        pdf_admission.release()
+
+
+@app.get("/api/metrics/pdf")
+async def get_pdf_metrics():
+    """Render admission and job queue metrics for capacity planning."""
+    return {
+        "admission": pdf_admission.metrics(),
+        "jobs": {
+            "pending": pdf_job_queue.pending(),
+            "workers": pdf_job_queue.workers,
+            "max_pending": pdf_job_queue.max_pending,
+            "tracked": len(pdf_job_queue.jobs),
+        },
+    }
+
+
+@app.get("/api/metrics/leaderboard")
+async def get_leaderboard_metrics():
+    """In-memory leaderboard snapshot staleness, response cache, stream and reconciliation metrics."""
+    return {
+        "snapshots": live_leaderboards.metrics(),
+        "response_cache": leaderboard_cache.metrics(),
+        "segments": segment_boards.metrics(),
+        "stream": leaderboard_stream.metrics(),
+        "reconciliation": {
+            "last_run": leaderboard_reconciler.last_run.isoformat() if leaderboard_reconciler.last_run else None,
+            "last_drift": leaderboard_reconciler.last_drift,
+            "interval_seconds": leaderboard_reconciler.interval,
+        },
+    }
+
+
+@app.get("/api/catalog")
+async def get_pdf_catalog():
+    """Pre-rendered preset papers available today (seeds rotate nightly)."""
+    return pdf_catalog.listing()
+
+
+@app.get("/api/catalog/{level}/{seed}")
+async def download_catalog_paper(level: str, seed: int, with_answers: bool = False):
+    """Download a pre-rendered preset paper."""
+    entry = pdf_catalog.get(level, seed, with_answers)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Paper not in catalog")
+    return FileResponse(
+        entry["path"],
+        media_type="application/pdf",
+        filename=get_pdf_filename(entry["title"], with_answers, False),
+        headers={"Cache-Control": "public, max-age=86400", "X-PDF-Cache": "hit"}
+    )
+
+
+@app.post("/api/papers/pdf-jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_pdf_job(request_data: dict):
+    """
+    Queue a PDF render and return immediately with a job ID.
+    Takes the same body as /api/papers/generate-pdf.
+    """
+    config, final_blocks, with_answers, answers_only = prepare_pdf_request(request_data)
+    filename = get_pdf_filename(config.title, with_answers, answers_only)
+    engine = resolve_pdf_engine(request_data.get("engine"), config, final_blocks, with_answers, answers_only)
+    
+    async def render():
+        # Job workers share the render slots with direct requests
+        async with pdf_admission.slot(background=True):
+            return await render_pdf(config, final_blocks, with_answers, answers_only, engine)
+    
+    try:
+        job = pdf_job_queue.submit(render, filename)
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="PDF queue is full, please retry shortly",
+            headers={"Retry-After": "10"}
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return {**job.to_dict(), "engine": engine}
+
+
+def get_pdf_job_or_404(job_id: str):
+    """Look up a PDF job, raising 404 if it is unknown or has expired."""
+    job = pdf_job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="PDF job not found or expired")
+    return job
+
+
+@app.get("/api/papers/pdf-jobs/{job_id}")
+async def get_pdf_job_status(job_id: str):
+    """Poll the status of a PDF job."""
+    return get_pdf_job_or_404(job_id).to_dict()
+
+
+@app.get("/api/papers/pdf-jobs/{job_id}/events")
+async def stream_pdf_job_events(job_id: str):
+    """Server-sent events with status updates until the job finishes."""
+    job = get_pdf_job_or_404(job_id)
+    return StreamingResponse(
+        job_events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/papers/pdf-jobs/{job_id}/result")
+async def get_pdf_job_result(job_id: str):
+    """Download the finished PDF of a job."""
+    job = get_pdf_job_or_404(job_id)
+    if job.status == JOB_FAILED:
+        raise HTTPException(status_code=500, detail=f"Failed to generate PDF: {job.error}")
+    if job.status != JOB_DONE:
+        raise HTTPException(status_code=409, detail=f"PDF job is {job.status}")
+    return FileResponse(job.path, media_type="application/pdf", filename=job.filename)
+
+
+def build_saved_paper(paper: Paper, seed: int = None):
+    """Config and generated blocks for a saved paper (its materialized questions by default)."""
+    return load_paper(paper, seed)
+
+
+@app.get("/api/papers/{paper_id}/html")
+async def get_paper_html(
+    paper_id: int,
+    request: Request,
+    seed: int = None,
+    with_answers: bool = False,
+    answers_only: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    The exact generate_html output for a saved paper (what the PDF engines print).
+    Cached by input hash, pre-compressed (br/gzip), with strong ETags.
+    """
+    paper = await asyncio.to_thread(get_paper_or_404, db, paper_id)
+    
+    key = HtmlPreviewCache.key(paper.config, seed, with_answers, answers_only)
+    preview = html_preview_cache.get(key)
+    if preview is None:
+        config, generated_blocks = await asyncio.to_thread(build_saved_paper, paper, seed)
+        html = generate_html(config, generated_blocks, with_answers, answers_only)
+        # Brotli at quality 11 takes a while on big papers; keep it off the event loop
+        preview = await asyncio.to_thread(HtmlPreview, html)
+        html_preview_cache.put(key, preview)
+    
+    encoding = preview.negotiate(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": preview.etag(encoding),
+        "Cache-Control": f"public, max-age={HTML_PREVIEW_MAX_AGE}",
+        "Vary": "Accept-Encoding",
+    }
+    if preview.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(preview.encodings[encoding], media_type="text/html; charset=utf-8", headers=headers)
 
 
 @app.post("/api/papers/{paper_id}/download")
 async def download_paper_pdf(
     paper_id: int,
     with_answers: bool = False,
+    engine: str = None,
     db: Session = Depends(get_db)
 ):
-    """Download PDF for a saved paper."""
-    paper = db.query(Paper).filter(Paper.id == paper_id).first()
-    if not paper:
-        raise HTTPException(status_code=404, detail="Paper not found")
+    """Download PDF for a saved paper. Optional ?engine=auto|playwright|reportlab."""
+    paper = await asyncio.to_thread(get_paper_or_404, db, paper_id)
+    
+    config, generated_blocks = build_saved_paper(paper)
+    engine = resolve_pdf_engine(engine, config, generated_blocks, with_answers)
+    await pdf_admission.acquire()
+    try:
+        pdf_file = await render_pdf(config, generated_blocks, with_answers, False, engine)
+        filename = f"{paper.title.replace(' ', '_')}{'_answers' if with_answers else ''}.pdf"
+        return pdf_response(pdf_file, filename, {"X-PDF-Engine": engine})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to generate PDF: {str(e)}")
+    finally:
+        pdf_admission.release()
+
+
+@app.post("/api/papers/bulk-pdf")
+async def bulk_papers_pdf(
+    request_data: BulkPdfRequest,
+    current_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Render many papers into one PDF (admin only).
+    
+    Body:
+        papers: list of {"paper_id": 1} (saved papers) or generate-pdf bodies
+                ({"config": ..., "seed": ..., "generatedBlocks": ...})
+        with_answers / answers_only: defaults for every paper (overridable per paper)
+        bookmarks: add one outline entry per paper (default true)
+        engine: auto | playwright | reportlab (auto renders bulk packs with ReportLab)
+        title: filename of the merged PDF
+    """
+    items = request_data.papers
+    if not items:
+        raise HTTPException(status_code=400, detail="At least one paper is required")
+    if len(items) > PDF_BULK_MAX_PAPERS:
+        raise HTTPException(status_code=400, detail=f"At most {PDF_BULK_MAX_PAPERS} papers per request")
     
-    # Reconstruct config from stored data
-    config = PaperConfig(**paper.config)
+    # Load saved papers in one query
+    paper_ids = [item.paper_id for item in items if item.paper_id is not None]
+    saved_papers = {}
+    if paper_ids:
+        rows = await asyncio.to_thread(lambda: db.query(Paper).filter(Paper.id.in_(paper_ids)).all())
+        saved_papers = {paper.id: paper for paper in rows}
+    missing = [paper_id for paper_id in paper_ids if paper_id not in saved_papers]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Papers not found: {missing}")
     
-    # Generate questions (regenerate each time)
-    config_json = json.dumps(paper.config, sort_keys=True)
-    config_hash = int(hashlib.md5(config_json.encode()).hexdigest(), 16)
-    seed = abs(config_hash) % (2**31)
+    def prepare_papers():
+        """(config, blocks, with_answers, answers_only, engine) per paper; generating questions is CPU work."""
+        prepared = []
+        for item in items:
+            with_answers = request_data.with_answers if item.with_answers is None else item.with_answers
+            answers_only = request_data.answers_only if item.answers_only is None else item.answers_only
+            if item.paper_id is not None:
+                config, generated_blocks = build_saved_paper(saved_papers[item.paper_id])
+            else:
+                config, generated_blocks, with_answers, answers_only = prepare_pdf_request({
+                    **(item.model_extra or {}), "config": item.config.model_dump(),
+                    "with_answers": with_answers, "answers_only": answers_only,
+                })
+            engine = resolve_pdf_engine(request_data.engine, config, generated_blocks, with_answers, answers_only,
+                                        bulk=True)
+            prepared.append((config, generated_blocks, with_answers, answers_only, engine))
+        return prepared
     
-    question_id_counter = 1
-    generated_blocks = []
-    for block_config_dict in config.blocks:
-        block_config = BlockConfig(**block_config_dict)
-        gen_block = generate_block(block_config, question_id_counter, seed)
-        generated_blocks.append(gen_block)
-        question_id_counter += block_config.count
+    papers = []
+    for config, generated_blocks, with_answers, answers_only, engine in await asyncio.to_thread(prepare_papers):
+        async def render(config=config, generated_blocks=generated_blocks, with_answers=with_answers,
+                         answers_only=answers_only, engine=engine):
+            # Each paper takes a render slot; the pack as a whole is not held to the queue deadline
+            async with pdf_admission.slot(background=True):
+                return await render_pdf(config, generated_blocks, with_answers, answers_only, engine)
+        papers.append((config.title, render))
     
-    # Generate PDF using Playwright (industry standard - pixel perfect)
+    pdf_admission.ensure_capacity()
     try:
-        pdf_buffer = await generate_pdf_playwright(config, generated_blocks, with_answers, False)
-        filename = f"{paper.title.replace(' ', '_')}{'_answers' if with_answers else ''}.pdf"
-        
-        return StreamingResponse(
-            pdf_buffer,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+        merged = await merge_papers(papers, bookmarks=request_data.bookmarks)
     except Exception as e:
+        import traceback
+        print(f"❌ [PDF_BULK] Merge failed: {str(e)}\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Failed to generate PDF: {str(e)}")
+    title = request_data.title or "class_pack"
+    return pdf_response(merged, f"{title.replace(' ', '_')}.pdf", {"X-PDF-Papers": str(len(papers))})
 
 
 @app.post("/api/papers/attempt", response_model=PaperAttemptResponse)
-async def start_paper_attempt(
+def start_paper_attempt(
     attempt_data: PaperAttemptCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Start a new paper attempt."""
-    # Calculate total questions
-    total_questions = sum(len(block.get("questions", [])) for block in attempt_data.generated_blocks)
+    """Start a new paper attempt (pass paper_id to attempt a saved paper's materialized questions)."""
+    generated_blocks = attempt_data.generated_blocks
+    seed = attempt_data.seed
+    if attempt_data.paper_id is not None:
+        paper = get_paper_or_404(db, attempt_data.paper_id)
+        _, blocks = build_saved_paper(paper)
+        generated_blocks = [block.model_dump(mode="json") for block in blocks]
+        seed = paper.seed if paper.seed is not None else seed
+    if generated_blocks is None or seed is None:
+        raise HTTPException(status_code=400, detail="generated_blocks and seed are required without paper_id")
     
-    # Create paper attempt
+    answer_key = build_answer_key(generated_blocks)
+    total_questions = len(answer_key["ids"])
+    
+    # Create paper attempt (the questions are stored once per distinct payload)
     paper_attempt = PaperAttempt(
         user_id=current_user.id,
+        paper_id=attempt_data.paper_id,
         paper_title=attempt_data.paper_title,
         paper_level=attempt_data.paper_level,
-        paper_config=attempt_data.paper_config,
-        generated_blocks=attempt_data.generated_blocks,
-        seed=attempt_data.seed,
+        paper_config={},
+        generated_blocks=[],
+        payload_hash=store_payload(db, attempt_data.paper_config, generated_blocks),
+        seed=seed,
+        answer_key=answer_key,
         total_questions=total_questions,
         answers=attempt_data.answers or {}
     )
@@ -417,7 +751,7 @@ async def start_paper_attempt(
 
 
 @app.put("/api/papers/attempt/{attempt_id}", response_model=PaperAttemptResponse)
-async def submit_paper_attempt(
+def submit_paper_attempt(
     attempt_id: int,
     submit_data: PaperAttemptSubmit,
     current_user: User = Depends(get_current_user),
@@ -437,98 +771,84 @@ async def submit_paper_attempt(
     if paper_attempt.completed_at:
         raise HTTPException(status_code=400, detail="Attempt already completed")
     
-    # Calculate results
-    generated_blocks = paper_attempt.generated_blocks
-    correct_count = 0
-    wrong_count = 0
-    
-    # Flatten all questions from all blocks
-    all_questions = []
-    for block in generated_blocks:
-        for question in block.get("questions", []):
-            all_questions.append(question)
-    
-    # Check answers
-    for question in all_questions:
-        try:
-            question_id = question.get("id")
-            user_answer = answers.get(str(question_id)) or answers.get(question_id)
-            correct_answer = question.get("answer")
-            
-            if user_answer is not None and correct_answer is not None:
-                # Compare with tolerance for floating point
-                try:
-                    if abs(float(user_answer) - float(correct_answer)) < 0.01:
-                        correct_count += 1
-                    else:
-                        wrong_count += 1
-                except (ValueError, TypeError) as e:
-                    print(f"⚠️ [SUBMIT] Error comparing answers for question {question_id}: {e}")
-                    wrong_count += 1
-        except Exception as e:
-            print(f"⚠️ [SUBMIT] Error processing question: {e}")
-            continue
-    
-    # Calculate accuracy and score
-    total = paper_attempt.total_questions
-    accuracy = (correct_count / total * 100) if total > 0 else 0
-    score = correct_count
-    
-    # Calculate points for paper attempts: only correct answers count (marks * 10)
-    # Example: 39/50 = 390 points, 2/4 = 20 points
-    points_earned = calculate_points(
-        correct_answers=correct_count,
-        total_questions=total,
-        time_taken=time_taken,
-        difficulty_mode="custom",  # Papers are custom
-        accuracy=accuracy,
-        is_mental_math=False  # Paper attempt - only correct answers count
-    )
-    
-    # Update attempt
-    paper_attempt.answers = answers
-    paper_attempt.correct_answers = correct_count
-    paper_attempt.wrong_answers = wrong_count
-    paper_attempt.accuracy = accuracy
-    paper_attempt.score = score
-    paper_attempt.time_taken = time_taken
-    paper_attempt.points_earned = points_earned
-    paper_attempt.completed_at = datetime.utcnow()
-    
-    # Update user points (no streak update for paper attempts - only mental math counts)
-    current_user.total_points += points_earned
-    
-    # Check for SUPER badge rewards
-    super_rewards = check_and_award_super_rewards(db, current_user)
-    
-    # Check for badges (create a mock session for badge checking)
-    from models import PracticeSession
-    mock_session = PracticeSession(
-        user_id=current_user.id,
-        operation_type="paper",
-        difficulty_mode="custom",
-        total_questions=total,
-        correct_answers=correct_count,
-        wrong_answers=wrong_count,
-        accuracy=accuracy,
-        score=score,
-        time_taken=time_taken,
-        points_earned=points_earned
-    )
-    check_and_award_badges(db, current_user, mock_session)
-    
-    db.commit()
+    # Autosaved answers stay buffered until the submit commits (a failed submit keeps autosaving)
+    try:
+        # Answers autosaved during the attempt, overridden by the submitted map
+        answers = {**answer_autosave.close(db, attempt_id), **(answers or {})}
+        
+        # Grade against the answer key stored at start (older attempts build it now)
+        answer_key = paper_attempt.answer_key or build_answer_key(attempt_payload(paper_attempt)[1])
+        correct_count, wrong_count = grade_answers(answer_key, answers)
+        
+        # Calculate accuracy and score
+        total = paper_attempt.total_questions
+        accuracy = (correct_count / total * 100) if total > 0 else 0
+        score = correct_count
+        
+        # Calculate points for paper attempts: only correct answers count (marks * 10)
+        # Example: 39/50 = 390 points, 2/4 = 20 points
+        points_earned = calculate_points(
+            correct_answers=correct_count,
+            total_questions=total,
+            time_taken=time_taken,
+            difficulty_mode="custom",  # Papers are custom
+            accuracy=accuracy,
+            is_mental_math=False  # Paper attempt - only correct answers count
+        )
+        
+        # Update attempt
+        paper_attempt.answers = answers
+        paper_attempt.correct_answers = correct_count
+        paper_attempt.wrong_answers = wrong_count
+        paper_attempt.accuracy = accuracy
+        paper_attempt.score = score
+        paper_attempt.time_taken = time_taken
+        paper_attempt.points_earned = points_earned
+        paper_attempt.completed_at = datetime.utcnow()
+        
+        # Update user points and this week's bucket (no streak update for paper attempts - only mental math counts)
+        current_user.total_points += points_earned
+        add_weekly_points(db, current_user.id, points_earned)
+        segment_totals = add_segment_points(
+            db, current_user.id, earned_segments("level", paper_attempt.paper_level), points_earned
+        )
+        
+        # Check for SUPER badge rewards
+        super_rewards = check_and_award_super_rewards(db, current_user)
+        
+        # Check for badges (create a mock session for badge checking)
+        from models import PracticeSession
+        mock_session = PracticeSession(
+            user_id=current_user.id,
+            operation_type="paper",
+            difficulty_mode="custom",
+            total_questions=total,
+            correct_answers=correct_count,
+            wrong_answers=wrong_count,
+            accuracy=accuracy,
+            score=score,
+            time_taken=time_taken,
+            points_earned=points_earned
+        )
+        check_and_award_badges(db, current_user, mock_session)
+        
+        db.commit()
+    except BaseException:
+        db.rollback()
+        answer_autosave.reopen(attempt_id)
+        raise
+    answer_autosave.closed(attempt_id)
     db.refresh(paper_attempt)
     
-    # Update leaderboards
-    update_leaderboard(db)
-    update_weekly_leaderboard(db)
+    # Move this student on both leaderboards and their segments
+    update_user_ranking(db, current_user, weekly_points_delta=points_earned)
+    segment_boards.update(current_user, segment_totals)
     
     return PaperAttemptResponse.model_validate(paper_attempt)
 
 
 @app.get("/api/papers/attempt/{attempt_id}", response_model=PaperAttemptDetailResponse)
-async def get_paper_attempt(
+def get_paper_attempt(
     attempt_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -542,7 +862,47 @@ async def get_paper_attempt(
     if not paper_attempt:
         raise HTTPException(status_code=404, detail="Paper attempt not found")
     
-    return PaperAttemptDetailResponse.model_validate(paper_attempt)
+    response = PaperAttemptDetailResponse.model_validate(paper_attempt)
+    response.paper_config, response.generated_blocks = attempt_payload(paper_attempt)
+    if not paper_attempt.completed_at:
+        response.answers = {**(paper_attempt.answers or {}), **answer_autosave.saved_answers(db, attempt_id)}
+    return response
+
+
+@app.patch("/api/papers/attempt/{attempt_id}/answers")
+def autosave_paper_attempt_answers(
+    attempt_id: int,
+    patch_data: PaperAttemptAnswersPatch,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Autosave the answers that changed since the last save (null clears an answer)."""
+    if len(patch_data.answers) > ANSWER_AUTOSAVE_MAX_DELTAS:
+        raise HTTPException(status_code=400, detail=f"At most {ANSWER_AUTOSAVE_MAX_DELTAS} answers per request")
+    
+    # Ownership and question ids are checked once per attempt, not on every keystroke burst
+    if not answer_autosave.is_open(attempt_id, current_user.id):
+        row = db.query(PaperAttempt.completed_at, PaperAttempt.answer_key).filter(
+            PaperAttempt.id == attempt_id,
+            PaperAttempt.user_id == current_user.id
+        ).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Paper attempt not found")
+        if row.completed_at:
+            raise HTTPException(status_code=400, detail="Attempt already completed")
+        answer_key = row.answer_key
+        if answer_key is None:
+            attempt = db.query(PaperAttempt).filter(PaperAttempt.id == attempt_id).one()
+            answer_key = build_answer_key(attempt_payload(attempt)[1])
+        answer_autosave.open(attempt_id, current_user.id, answer_key["ids"])
+    
+    try:
+        accepted = answer_autosave.add(attempt_id, patch_data.answers)
+    except KeyError:
+        raise HTTPException(status_code=400, detail="Attempt already completed")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"accepted": accepted}
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8080))
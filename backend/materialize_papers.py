@@ -0,0 +1,54 @@
+"""
+Backfill generated questions (and block counts for listings) for saved
+papers created before they were materialized at create time.
+
+Usage:
+    python materialize_papers.py            # Papers without questions
+    python materialize_papers.py --all      # Regenerate every paper
+"""
+
+import sys
+from dotenv import load_dotenv
+from sqlalchemy import or_
+from models import Paper, get_db
+from add_missing_columns import add_missing_columns
+from saved_papers import materialize_paper
+
+load_dotenv()
+
+BATCH_SIZE = 100
+
+
+def materialize_papers(regenerate_all=False):
+    """Store seed and questions for saved papers, committing in batches."""
+    add_missing_columns()  # Older databases lack the seed/questions/block_count columns
+    db = next(get_db())
+    
+    try:
+        query = db.query(Paper)
+        if not regenerate_all:
+            query = query.filter(or_(Paper.questions.is_(None), Paper.block_count.is_(None)))
+        paper_ids = [paper_id for (paper_id,) in query.with_entities(Paper.id).order_by(Paper.id).all()]
+        print(f"📄 Papers to materialize: {len(paper_ids)}")
+        
+        done = failed = 0
+        for start in range(0, len(paper_ids), BATCH_SIZE):
+            batch = db.query(Paper).filter(Paper.id.in_(paper_ids[start:start + BATCH_SIZE])).all()
+            for paper in batch:
+                try:
+                    paper.seed, paper.questions = materialize_paper(paper.config, paper.seed)
+                    paper.block_count = len(paper.config.get("blocks") or [])
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"❌ Paper {paper.id} ({paper.title}): {e}")
+            db.commit()
+            print(f"✅ {done}/{len(paper_ids)} materialized")
+        
+        print(f"\n✅ Materialized {done} paper(s)" + (f", {failed} failed" if failed else ""))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    materialize_papers(regenerate_all="--all" in sys.argv[1:])
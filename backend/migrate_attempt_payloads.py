@@ -0,0 +1,59 @@
+"""
+Move paper attempt questions into the content-addressed question_payloads
+table. Attempts of the same paper end up sharing one payload row, and their
+inline paper_config / generated_blocks columns are emptied.
+
+Usage:
+    python migrate_attempt_payloads.py           # Migrate attempts without payload_hash
+    python migrate_attempt_payloads.py --prune   # Also delete payloads no attempt references
+"""
+
+import sys
+from dotenv import load_dotenv
+from models import PaperAttempt, QuestionPayload, get_db
+from add_missing_columns import add_missing_columns
+from question_payloads import store_payload
+
+load_dotenv()
+
+BATCH_SIZE = 100
+
+
+def migrate_attempt_payloads(prune=False):
+    """Store each attempt's payload once and point the attempt at it, committing in batches."""
+    add_missing_columns()  # Creates question_payloads and adds payload_hash to older databases
+    db = next(get_db())
+    
+    try:
+        attempt_ids = [
+            attempt_id for (attempt_id,) in
+            db.query(PaperAttempt.id).filter(PaperAttempt.payload_hash.is_(None)).order_by(PaperAttempt.id).all()
+        ]
+        print(f"📄 Attempts to migrate: {len(attempt_ids)}")
+        
+        hashes = set()
+        for start in range(0, len(attempt_ids), BATCH_SIZE):
+            batch = db.query(PaperAttempt).filter(PaperAttempt.id.in_(attempt_ids[start:start + BATCH_SIZE])).all()
+            for attempt in batch:
+                attempt.payload_hash = store_payload(db, attempt.paper_config or {}, attempt.generated_blocks or [])
+                attempt.paper_config = {}
+                attempt.generated_blocks = []
+                hashes.add(attempt.payload_hash)
+            db.commit()
+            print(f"✅ {min(start + BATCH_SIZE, len(attempt_ids))}/{len(attempt_ids)} migrated")
+        
+        print(f"\n✅ Migrated {len(attempt_ids)} attempt(s) into {len(hashes)} distinct payload(s)")
+        
+        if prune:
+            referenced = db.query(PaperAttempt.payload_hash).filter(PaperAttempt.payload_hash.isnot(None))
+            deleted = db.query(QuestionPayload).filter(
+                QuestionPayload.hash.notin_(referenced.scalar_subquery())
+            ).delete(synchronize_session=False)
+            db.commit()
+            print(f"🗑️  Pruned {deleted} unreferenced payload(s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    migrate_attempt_payloads(prune="--prune" in sys.argv[1:])
@@ -16,7 +16,15 @@ class Paper(Base):
     title = Column(String, nullable=False)
     level = Column(String, nullable=False)
     config = Column(JSON, nullable=False)  # Stores the full paper configuration
+    seed = Column(Integer, nullable=True)  # Seed the questions were generated with
+    questions = Column(JSON, nullable=True)  # Generated questions, one list per config block
+    block_count = Column(Integer, nullable=True)  # len(config["blocks"]), so listings can skip config
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_papers_created_id', 'created_at', 'id'),
+        Index('idx_papers_level_created_id', 'level', 'created_at', 'id'),
+    )
 
 
 class User(Base):
@@ -34,6 +42,7 @@ class User(Base):
     current_streak = Column(Integer, default=0, nullable=False)
     longest_streak = Column(Integer, default=0, nullable=False)
     last_practice_date = Column(DateTime, nullable=True)
+    class_group = Column(String, nullable=True, index=True)  # Optional class/group, set by admins
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -41,6 +50,8 @@ class User(Base):
     practice_sessions = relationship("PracticeSession", back_populates="user", cascade="all, delete-orphan")
     paper_attempts = relationship("PaperAttempt", back_populates="user", cascade="all, delete-orphan")
     rewards = relationship("Reward", back_populates="user", cascade="all, delete-orphan")
+    weekly_points = relationship("WeeklyPoints", cascade="all, delete-orphan")
+    segment_points = relationship("SegmentPoints", cascade="all, delete-orphan")
 
 
 class PracticeSession(Base):
@@ -112,11 +123,15 @@ class PaperAttempt(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    paper_id = Column(Integer, ForeignKey("papers.id"), nullable=True, index=True)  # Set for saved papers
     paper_title = Column(String, nullable=False)
     paper_level = Column(String, nullable=False)
-    paper_config = Column(JSON, nullable=False)  # Stores the full paper configuration
-    generated_blocks = Column(JSON, nullable=False)  # Stores the generated questions
+    # Legacy inline payload: {} / [] once the payload lives in question_payloads
+    paper_config = Column(JSON, nullable=False)
+    generated_blocks = Column(JSON, nullable=False)
+    payload_hash = Column(String, ForeignKey("question_payloads.hash"), nullable=True, index=True)
     seed = Column(Integer, nullable=False)  # Seed used for generation
+    answer_key = Column(JSON, nullable=True)  # {"ids": [...], "answers": [...]} built at start
     total_questions = Column(Integer, nullable=False)
     correct_answers = Column(Integer, default=0, nullable=False)
     wrong_answers = Column(Integer, default=0, nullable=False)
@@ -130,12 +145,34 @@ class PaperAttempt(Base):
     
     # Relationships
     user = relationship("User", back_populates="paper_attempts")
+    payload = relationship("QuestionPayload")
+    autosaved_answers = relationship("PaperAttemptAnswer", cascade="all, delete-orphan")
     
     __table_args__ = (
         Index('idx_paper_user_created', 'user_id', 'started_at'),
     )
 
 
+class QuestionPayload(Base):
+    """Paper config and generated questions shared by every attempt of the same paper."""
+    __tablename__ = "question_payloads"
+    
+    hash = Column(String, primary_key=True)  # sha256 of the canonical JSON of both fields
+    paper_config = Column(JSON, nullable=False)
+    generated_blocks = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class PaperAttemptAnswer(Base):
+    """Autosaved answer for one question of an in-progress paper attempt."""
+    __tablename__ = "paper_attempt_answers"
+    
+    attempt_id = Column(Integer, ForeignKey("paper_attempts.id"), primary_key=True)
+    question_id = Column(String, primary_key=True)
+    answer = Column(String, nullable=True)  # As typed; null when cleared
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class Leaderboard(Base):
     """Leaderboard entries for ranking users."""
     __tablename__ = "leaderboard"
@@ -151,9 +188,53 @@ class Leaderboard(Base):
     __table_args__ = (
         Index('idx_points_rank', 'total_points', 'rank'),
         Index('idx_weekly_points', 'weekly_points', 'weekly_rank'),
+        # Board order, for walking to a student's neighbors
+        Index('idx_leaderboard_overall_order', total_points.desc(), 'user_id'),
+        Index('idx_leaderboard_weekly_order', weekly_points.desc(), 'user_id'),
     )
 
 
+class WeeklyPoints(Base):
+    """Points a user earned in one ISO week (practice and papers), kept up to date as they are earned."""
+    __tablename__ = "weekly_points"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    iso_week = Column(String, primary_key=True)  # e.g. "2026-W07"; weeks start Monday 00:00 UTC
+    points = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_weekly_points_week', 'iso_week', 'points'),
+    )
+
+
+class SegmentPoints(Base):
+    """
+    Points a user earned within one leaderboard segment, e.g. "operation:add_sub"
+    or "level:junior". Only users who earned points in a segment have a row.
+    """
+    __tablename__ = "segment_points"
+    
+    segment = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    points = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_segment_points_segment', 'segment', 'points'),
+    )
+
+
+class WeeklyLeaderboardSnapshot(Base):
+    """Final weekly board of one finished ISO week, archived as parallel rank-ordered arrays."""
+    __tablename__ = "weekly_leaderboard_snapshots"
+    
+    iso_week = Column(String, primary_key=True)
+    user_ids = Column(JSON, nullable=False)  # Board order: points desc, then user id
+    points = Column(JSON, nullable=False)  # points[i] belongs to user_ids[i]
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 # Database setup
 DATABASE_URL = os.getenv("DATABASE_URL")
 
@@ -0,0 +1,157 @@
+"""
+Admission Control for PDF Rendering
+Caps the number of renders in flight (each Playwright render launches a
+Chromium) so a burst of PDF requests cannot starve the rest of the API.
+
+- Up to PDF_MAX_INFLIGHT renders run at once
+- Up to PDF_MAX_QUEUE requests wait for a slot, each for at most
+  PDF_QUEUE_TIMEOUT_SECONDS
+- A full queue is rejected immediately with 429, a wait past the deadline
+  with 503, both with Retry-After
+- Background work (job queue workers, catalog warm-up) waits without a
+  deadline and does not count against the request queue limit
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+# ========== CONFIGURATION ==========
+PDF_MAX_INFLIGHT = int(os.getenv("PDF_MAX_INFLIGHT", "4"))
+PDF_MAX_QUEUE = int(os.getenv("PDF_MAX_QUEUE", "16"))
+PDF_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PDF_QUEUE_TIMEOUT_SECONDS", "30"))
+PDF_RETRY_AFTER_SECONDS = int(os.getenv("PDF_RETRY_AFTER_SECONDS", "5"))
+
+WAIT_SAMPLES = 1000  # Recent wait times kept for percentiles
+
+
+class AdmissionRejected(Exception):
+    """Raised when a render cannot be admitted (mapped to an HTTP error by main)."""
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Counting limiter with a bounded FIFO wait queue and wait-time metrics."""
+    def __init__(self, max_inflight: int = PDF_MAX_INFLIGHT, max_queue: int = PDF_MAX_QUEUE,
+                 queue_timeout: float = PDF_QUEUE_TIMEOUT_SECONDS, retry_after: int = PDF_RETRY_AFTER_SECONDS):
+        self.max_inflight = max(1, max_inflight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self._waiters = deque()  # Futures, FIFO
+        self._request_waiters = 0
+        # Metrics
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.peak_in_flight = 0
+        self.peak_queue_depth = 0
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def _grant(self):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _release(self):
+        self.in_flight -= 1
+        # Hand the slot straight to the next live waiter
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._grant()
+                waiter.set_result(None)
+                break
+
+    def ensure_capacity(self):
+        """Fail fast with 429 when the request queue is already full."""
+        if self.in_flight >= self.max_inflight and self._request_waiters >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise AdmissionRejected(429, "PDF renderer is busy, please retry shortly", self.retry_after)
+
+    async def acquire(self, background: bool = False):
+        """
+        Wait for a render slot.
+
+        Raises:
+            AdmissionRejected: 429 if the queue is full, 503 if the deadline passes
+        """
+        started = time.perf_counter()
+        if self.in_flight < self.max_inflight and not self.queue_depth:
+            self._grant()
+        else:
+            if not background:
+                self.ensure_capacity()
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+            if not background:
+                self._request_waiters += 1
+            try:
+                await asyncio.wait_for(waiter, None if background else self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                raise AdmissionRejected(503, "Timed out waiting for a PDF renderer", self.retry_after)
+            except asyncio.CancelledError:
+                # Cancelled right after being handed a slot: give it back
+                if waiter.done() and not waiter.cancelled():
+                    self._release()
+                raise
+            finally:
+                if not background:
+                    self._request_waiters -= 1
+        self.admitted += 1
+        self._waits.append(time.perf_counter() - started)
+
+    def release(self):
+        self._release()
+
+    @asynccontextmanager
+    async def slot(self, background: bool = False):
+        """`async with controller.slot():` around a render."""
+        await self.acquire(background)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def metrics(self) -> dict:
+        """Current load and wait-time statistics (milliseconds)."""
+        waits = sorted(self._waits)
+
+        def percentile(fraction: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(len(waits) * fraction))] * 1000, 1)
+
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "peak_in_flight": self.peak_in_flight,
+            "peak_queue_depth": self.peak_queue_depth,
+            "wait_ms": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": percentile(1.0),
+                "samples": len(waits),
+            },
+        }
+
+
+pdf_admission = AdmissionController()
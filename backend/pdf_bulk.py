@@ -0,0 +1,202 @@
+"""
+Bulk PDF Merge (class packs)
+Renders many papers with bounded concurrency and concatenates them into one
+PDF, optionally with one outline entry (bookmark) per paper.
+
+- At most PDF_BULK_CONCURRENCY papers are rendered or waiting to be merged
+  at any time (sliding window, merged in request order)
+- Each rendered paper's pages are copied straight into the output spool as
+  soon as it is merged, and its reader and buffer released; only the object
+  offsets and page numbers of the pack are kept until the end
+- The page tree, outline and cross-reference table are written last
+"""
+import asyncio
+import copy
+import os
+from collections import deque
+from typing import Awaitable, BinaryIO, Callable, List, Optional, Tuple
+
+from pypdf import PdfReader
+from pypdf.generic import (
+    ArrayObject, DictionaryObject, IndirectObject, NullObject, StreamObject, create_string_object
+)
+
+from pdf_streaming import new_pdf_spool
+
+
+# ========== CONFIGURATION ==========
+PDF_BULK_CONCURRENCY = int(os.getenv("PDF_BULK_CONCURRENCY", "4"))
+PDF_BULK_MAX_PAPERS = int(os.getenv("PDF_BULK_MAX_PAPERS", "100"))
+
+
+class MergedPdf:
+    """
+    A PDF written front to back into a spool: each paper's pages (and the
+    objects they use) are renumbered and written out by add(), and finish()
+    adds the page tree, outline and xref that tie them together.
+    """
+    CATALOG = 1
+    PAGES = 2
+
+    def __init__(self, bookmarks: bool = True):
+        self.output = new_pdf_spool()
+        self.offsets: List[Optional[int]] = [None, None]  # Per object number - 1; catalog and pages come last
+        self.outlines = self._new_number() if bookmarks else None
+        self.kids: List[int] = []  # Page object numbers in order
+        self.outline: List[Tuple[str, int]] = []  # (title, first page object number)
+        self.output.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    def _new_number(self) -> int:
+        self.offsets.append(None)
+        return len(self.offsets)
+
+    def _write(self, text: str):
+        self.output.write(text.encode("latin-1"))
+
+    def _begin(self, number: int):
+        self.offsets[number - 1] = self.output.tell()
+        self._write(f"{number} 0 obj\n")
+
+    def _end(self):
+        self._write("\nendobj\n")
+
+    def add(self, pdf_file: BinaryIO, title: str) -> int:
+        """Copy one rendered paper's pages into the output and release its buffer; returns its page count."""
+        try:
+            pdf_file.seek(0)
+            reader = PdfReader(pdf_file)
+            numbers = {}  # (idnum, generation) in the paper -> object number in the pack
+            queue = deque()
+
+            def number_of(reference: IndirectObject, target=None) -> Optional[int]:
+                key = (reference.idnum, reference.generation)
+                if key not in numbers:
+                    target = target if target is not None else reference.get_object()
+                    if isinstance(target, DictionaryObject) and target.get("/Type") in ("/Pages", "/Catalog"):
+                        return None  # The paper's own page tree, replaced by the pack's
+                    numbers[key] = self._new_number()
+                    queue.append((numbers[key], target))
+                return numbers[key]
+
+            pages = set()
+            for page in reader.pages:  # Inherited attributes are already copied onto each page
+                number = number_of(page.indirect_reference, page)
+                pages.add(number)
+                self.kids.append(number)
+            while queue:
+                number, obj = queue.popleft()
+                self._begin(number)
+                self._renumbered(obj, number_of, page=number in pages).write_to_stream(self.output)
+                self._end()
+            if self.outlines is not None and reader.pages:
+                self.outline.append((title, self.kids[-len(reader.pages)]))
+            return len(reader.pages)
+        finally:
+            pdf_file.close()
+
+    def _renumbered(self, obj, number_of, page: bool = False):
+        """Copy of obj with references renumbered for the pack (unknown targets become null)."""
+        if isinstance(obj, IndirectObject):
+            number = number_of(obj)
+            return IndirectObject(number, 0, None) if number else NullObject()
+        if isinstance(obj, DictionaryObject):
+            # Streams keep their encoded data and /Filter as they are (pypdf writes /Length)
+            stream = isinstance(obj, StreamObject)
+            renumbered = copy.copy(obj) if stream else DictionaryObject()
+            for key, value in dict.items(obj):  # Raw items: references unresolved
+                if stream and key == "/Length":
+                    continue  # Possibly an indirect number; written from the data instead
+                if page and key == "/Parent":
+                    renumbered[key] = IndirectObject(self.PAGES, 0, None)
+                else:
+                    renumbered[key] = self._renumbered(value, number_of)
+            return renumbered
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._renumbered(value, number_of) for value in list.__iter__(obj))
+        return obj
+
+    def finish(self) -> BinaryIO:
+        """Write the page tree, outline, catalog and xref; returns the output rewound."""
+        if self.outlines is not None:
+            items = [self._new_number() for _ in self.outline]
+            for index, ((title, page), number) in enumerate(zip(self.outline, items)):
+                self._begin(number)
+                self._write("<</Title ")
+                create_string_object(title).write_to_stream(self.output)
+                self._write(f" /Parent {self.outlines} 0 R /Dest [{page} 0 R /Fit]")
+                if index > 0:
+                    self._write(f" /Prev {items[index - 1]} 0 R")
+                if index < len(items) - 1:
+                    self._write(f" /Next {items[index + 1]} 0 R")
+                self._write(">>")
+                self._end()
+            self._begin(self.outlines)
+            if items:
+                self._write(f"<</Type /Outlines /First {items[0]} 0 R /Last {items[-1]} 0 R /Count {len(items)}>>")
+            else:
+                self._write("<</Type /Outlines /Count 0>>")
+            self._end()
+
+        self._begin(self.PAGES)
+        self._write(f"<</Type /Pages /Count {len(self.kids)} /Kids [")
+        for number in self.kids:
+            self._write(f"{number} 0 R ")
+        self._write("]>>")
+        self._end()
+
+        self._begin(self.CATALOG)
+        self._write(f"<</Type /Catalog /Pages {self.PAGES} 0 R")
+        if self.outlines is not None:
+            self._write(f" /Outlines {self.outlines} 0 R /PageMode /UseOutlines")
+        self._write(">>")
+        self._end()
+
+        xref = self.output.tell()
+        self._write(f"xref\n0 {len(self.offsets) + 1}\n0000000000 65535 f \n")
+        for offset in self.offsets:
+            self._write(f"{offset:010d} 00000 n \n")
+        self._write(f"trailer\n<</Size {len(self.offsets) + 1} /Root {self.CATALOG} 0 R>>\n"
+                    f"startxref\n{xref}\n%%EOF\n")
+        self.output.seek(0)
+        return self.output
+
+
+async def merge_papers(papers: List[Tuple[str, Callable[[], Awaitable[BinaryIO]]]],
+                       bookmarks: bool = True, concurrency: int = PDF_BULK_CONCURRENCY) -> BinaryIO:
+    """
+    Render and concatenate papers in order.
+
+    Args:
+        papers: (title, render) pairs; render is an async callable returning a PDF file object
+        bookmarks: Add an outline entry pointing at the first page of each paper
+        concurrency: Maximum papers rendering or waiting to be merged at once
+
+    Returns:
+        Spooled file object containing the merged PDF
+    """
+    merged = MergedPdf(bookmarks)
+    window = deque()
+    total_pages = 0
+    try:
+        for title, render in papers:
+            window.append((title, asyncio.create_task(render())))
+            if len(window) >= max(1, concurrency):
+                title, task = window.popleft()
+                total_pages += await asyncio.to_thread(merged.add, await task, title)
+        while window:
+            title, task = window.popleft()
+            total_pages += await asyncio.to_thread(merged.add, await task, title)
+        output = await asyncio.to_thread(merged.finish)
+    except BaseException:
+        merged.output.close()
+        raise
+    finally:
+        # After a failure: stop the papers still rendering and close the ones already rendered
+        for _, task in window:
+            task.cancel()
+        for result in await asyncio.gather(*(task for _, task in window), return_exceptions=True):
+            if not isinstance(result, BaseException):
+                result.close()
+
+    print(f"✅ [PDF_BULK] Merged {len(papers)} papers ({total_pages} pages)")
+    return output
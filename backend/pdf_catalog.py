@@ -0,0 +1,189 @@
+"""
+Pre-rendered Preset Paper Catalog
+Renders K seeds of every preset level (question paper and with-answers
+variant) into a content-addressed PDF cache on disk, at startup and nightly.
+
+- Seeds rotate daily; seeds for a day are derived from the level and the date
+- Files are named by a hash of the rendered content (title, questions, flags),
+  so papers already on disk are reused when the catalog is warmed again
+- Catalog papers are requested by level and seed (GET /api/catalog lists
+  them) and served as static files
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from schemas import PaperConfig, GeneratedBlock
+from presets import PRESETS, get_preset_blocks, get_level_display_name
+from math_generator import generate_block
+from pdf_engines import select_engine, render_pdf, count_questions
+from pdf_jobs import write_pdf_file
+from pdf_admission import pdf_admission
+
+
+# ========== CONFIGURATION ==========
+PDF_CATALOG_ENABLED = os.getenv("PDF_CATALOG_ENABLED", "true").lower() == "true"
+PDF_CATALOG_DIR = os.getenv("PDF_CATALOG_DIR", os.path.join(tempfile.gettempdir(), "abacus_pdf_catalog"))
+PDF_CATALOG_SEEDS_PER_LEVEL = int(os.getenv("PDF_CATALOG_SEEDS_PER_LEVEL", "3"))
+PDF_CATALOG_TITLE = os.getenv("PDF_CATALOG_TITLE", "Math Practice Paper")
+PDF_CATALOG_REFRESH_HOUR = int(os.getenv("PDF_CATALOG_REFRESH_HOUR", "2"))  # Local time
+PDF_CATALOG_ENGINE = os.getenv("PDF_CATALOG_ENGINE")  # Defaults to PDF_ENGINE (auto -> reportlab for bulk)
+
+CATALOG_VARIANTS = (False, True)  # with_answers
+
+# Catalog files are named by pdf_cache_key; nothing else in PDF_CATALOG_DIR is ours
+CATALOG_FILE_RE = re.compile(r"^[0-9a-f]{64}\.pdf(\.part)?$")
+
+
+def pdf_cache_key(config: PaperConfig, generated_blocks: List[GeneratedBlock],
+                  with_answers: bool = False, answers_only: bool = False) -> str:
+    """Hash of everything that affects the rendered PDF."""
+    payload = json.dumps({
+        "title": config.title,
+        "blocks": [block.model_dump(mode="json") for block in generated_blocks],
+        "with_answers": bool(with_answers),
+        "answers_only": bool(answers_only),
+    }, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def catalog_seeds(level: str, day: date, count: int = PDF_CATALOG_SEEDS_PER_LEVEL) -> List[int]:
+    """Deterministic seeds for one level on one day (rotates every day)."""
+    return [
+        int(hashlib.md5(f"{level}:{day.isoformat()}:{index}".encode()).hexdigest(), 16) % (2**31)
+        for index in range(count)
+    ]
+
+
+def build_preset_paper(level: str, seed: int, title: str = PDF_CATALOG_TITLE):
+    """Config and generated blocks for a preset level, as /api/papers/generate-pdf builds them."""
+    config = PaperConfig(level=level, title=title, blocks=[])
+    level_display_name = get_level_display_name(level)
+    if level_display_name and level_display_name not in config.title:
+        config.title = f"{config.title} - {level_display_name}"
+    generated_blocks = []
+    question_id_counter = 1
+    for block in get_preset_blocks(level):
+        generated_blocks.append(generate_block(block, question_id_counter, seed))
+        question_id_counter += block.count
+    return config, generated_blocks
+
+
+class PdfCatalog:
+    """Disk-backed catalog of pre-rendered preset papers."""
+    def __init__(self, directory: str = PDF_CATALOG_DIR, seeds_per_level: int = PDF_CATALOG_SEEDS_PER_LEVEL,
+                 title: str = PDF_CATALOG_TITLE):
+        self.directory = directory
+        self.seeds_per_level = seeds_per_level
+        self.title = title
+        self.entries: Dict[tuple, dict] = {}  # (level, seed, with_answers) -> entry
+        self.generated_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Warm the catalog in the background, then refresh it nightly."""
+        if self._task:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.warm()
+            except Exception as e:
+                import traceback
+                print(f"❌ [PDF_CATALOG] Warm-up failed: {str(e)}")
+                print(traceback.format_exc())
+            await asyncio.sleep(seconds_until_hour(PDF_CATALOG_REFRESH_HOUR))
+
+    async def warm(self, day: Optional[date] = None) -> int:
+        """
+        Render today's catalog. Files that already exist (same content hash)
+        are reused; files from previous days are deleted afterwards.
+
+        Returns:
+            Number of PDFs rendered (not reused)
+        """
+        day = day or date.today()
+        started = time.perf_counter()
+        entries = {}
+        rendered = 0
+        for level in PRESETS:
+            for seed in catalog_seeds(level, day, self.seeds_per_level):
+                config, generated_blocks = await asyncio.to_thread(build_preset_paper, level, seed, self.title)
+                for with_answers in CATALOG_VARIANTS:
+                    key = pdf_cache_key(config, generated_blocks, with_answers)
+                    path = os.path.join(self.directory, f"{key}.pdf")
+                    if not os.path.exists(path):
+                        engine = select_engine(PDF_CATALOG_ENGINE, count_questions(generated_blocks), bulk=True)
+                        try:
+                            async with pdf_admission.slot(background=True):
+                                pdf_file = await render_pdf(config, generated_blocks, with_answers, False, engine)
+                            await asyncio.to_thread(write_pdf_file, pdf_file, path)
+                            rendered += 1
+                        except Exception as e:
+                            print(f"❌ [PDF_CATALOG] {level} seed {seed} failed: {str(e)}")
+                            continue
+                    entries[(level, seed, with_answers)] = {
+                        "level": level,
+                        "seed": seed,
+                        "with_answers": with_answers,
+                        "title": config.title,
+                        "size": os.path.getsize(path),
+                        "url": f"/api/catalog/{level}/{seed}" + ("?with_answers=true" if with_answers else ""),
+                        "path": path,
+                    }
+
+        # Swap in the new catalog, then drop files that rotated out
+        self.entries = entries
+        self.generated_at = time.time()
+        keep = {entry["path"] for entry in entries.values()}
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if CATALOG_FILE_RE.match(name) and path not in keep:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        print(f"✅ [PDF_CATALOG] {len(entries)} papers ready ({rendered} rendered) "
+              f"in {time.perf_counter() - started:.1f}s")
+        return rendered
+
+    def get(self, level: str, seed: int, with_answers: bool = False) -> Optional[dict]:
+        """Catalog entry for a level/seed/variant (None if not in today's catalog)."""
+        return self.entries.get((level, seed, with_answers))
+
+    def listing(self) -> dict:
+        """Public view of the catalog (no filesystem paths)."""
+        return {
+            "generated_at": self.generated_at,
+            "papers": [
+                {k: v for k, v in entry.items() if k != "path"}
+                for entry in self.entries.values()
+            ],
+        }
+
+
+def seconds_until_hour(hour: int, now: Optional[datetime] = None) -> float:
+    """Seconds from now until the next occurrence of hour:00 local time."""
+    now = now or datetime.now()
+    target = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+pdf_catalog = PdfCatalog()
@@ -0,0 +1,84 @@
+"""
+PDF Engine Selection
+Chooses between the Chromium (Playwright) and native ReportLab renderers.
+
+- "playwright": headless Chromium printing html_template (pixel-perfect preview match)
+- "reportlab": pdf_generator_v2, same layout drawn natively (no browser, much cheaper per page)
+- "auto": ReportLab for bulk jobs, papers above PDF_ENGINE_AUTO_THRESHOLD questions
+  and papers planned at more than PDF_ENGINE_AUTO_MAX_PAGES pages, Playwright otherwise
+
+The default comes from the PDF_ENGINE environment variable and can be
+overridden per request.
+"""
+import asyncio
+import os
+from typing import List, Optional
+
+from schemas import PaperConfig, GeneratedBlock
+from pdf_generator_v2 import generate_pdf_v2
+from pdf_generator_playwright import generate_pdf_playwright
+
+
+# ========== CONFIGURATION ==========
+ENGINE_AUTO = "auto"
+ENGINE_PLAYWRIGHT = "playwright"
+ENGINE_REPORTLAB = "reportlab"
+ENGINES = (ENGINE_AUTO, ENGINE_PLAYWRIGHT, ENGINE_REPORTLAB)
+
+PDF_ENGINE = os.getenv("PDF_ENGINE", ENGINE_AUTO).lower()
+PDF_ENGINE_AUTO_THRESHOLD = int(os.getenv("PDF_ENGINE_AUTO_THRESHOLD", "200"))
+PDF_ENGINE_AUTO_MAX_PAGES = int(os.getenv("PDF_ENGINE_AUTO_MAX_PAGES", "12"))
+
+
+def count_questions(generated_blocks: List[GeneratedBlock]) -> int:
+    """Total number of questions across all blocks."""
+    return sum(len(block.questions) for block in generated_blocks)
+
+
+def select_engine(requested: Optional[str], total_questions: int, bulk: bool = False,
+                  page_count: Optional[int] = None) -> str:
+    """
+    Resolve the engine for one render.
+
+    Args:
+        requested: Engine asked for by the client (None to use PDF_ENGINE)
+        total_questions: Number of questions in the paper
+        bulk: True when rendering many papers in one request
+        page_count: Planned page count (pdf_layout.plan_paper), if known
+
+    Returns:
+        ENGINE_PLAYWRIGHT or ENGINE_REPORTLAB
+
+    Raises:
+        ValueError: if the engine name is unknown
+    """
+    engine = (requested or PDF_ENGINE).lower()
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown PDF engine '{engine}'. Use one of: {', '.join(ENGINES)}")
+    if engine != ENGINE_AUTO:
+        return engine
+    if bulk or total_questions > PDF_ENGINE_AUTO_THRESHOLD:
+        return ENGINE_REPORTLAB
+    if page_count is not None and page_count > PDF_ENGINE_AUTO_MAX_PAGES:
+        return ENGINE_REPORTLAB
+    return ENGINE_PLAYWRIGHT
+
+
+async def render_pdf(
+    config: PaperConfig,
+    generated_blocks: List[GeneratedBlock],
+    with_answers: bool = False,
+    answers_only: bool = False,
+    engine: str = ENGINE_PLAYWRIGHT
+):
+    """
+    Render a paper with the given (already resolved) engine.
+
+    Returns:
+        Spooled file object containing the PDF (the caller closes it)
+    """
+    if engine == ENGINE_REPORTLAB:
+        # ReportLab is CPU-bound and synchronous; keep it off the event loop
+        return await asyncio.to_thread(generate_pdf_v2, config, generated_blocks, with_answers, answers_only)
+
+    return await generate_pdf_playwright(config, generated_blocks, with_answers, answers_only)
@@ -3,9 +3,9 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.lib import colors
 from reportlab.pdfgen import canvas
-from io import BytesIO
-from typing import List
+from typing import BinaryIO, List
 from schemas import PaperConfig, GeneratedBlock
+from pdf_streaming import new_pdf_spool
 from pdf_layout import (
     PAGE_WIDTH, PAGE_HEIGHT, MARGIN_TOP, MARGIN_BOTTOM, MARGIN_LEFT, MARGIN_RIGHT,
     USABLE_WIDTH, USABLE_HEIGHT, MIN_SPACE_BEFORE_BREAK,
@@ -185,15 +185,15 @@ def generate_pdf(
     generated_blocks: List[GeneratedBlock],
     with_answers: bool = False,
     answers_only: bool = False
-) -> BytesIO:
+) -> BinaryIO:
     """
     Generate professional exam-grade PDF with compact, structured layout.
     Blocks have clear boundaries, questions in table format.
     
     Returns:
-        BytesIO object containing the PDF
+        Spooled file object containing the PDF (positioned at the start)
     """
-    buffer = BytesIO()
+    buffer = new_pdf_spool()
     c = canvas.Canvas(buffer, pagesize=A4)
     
     # Skip question generation if answers_only is True
@@ -4,9 +4,9 @@ Uses headless Chromium to generate pixel-perfect PDFs from HTML
 This matches the preview exactly - no layout duplication!
 """
 from playwright.async_api import async_playwright
-from io import BytesIO
-from typing import List
+from typing import BinaryIO, List
 from schemas import PaperConfig, GeneratedBlock
+from pdf_streaming import new_pdf_spool
 from html_template import generate_html
 
 
@@ -15,7 +15,7 @@ async def generate_pdf_playwright(
     generated_blocks: List[GeneratedBlock],
     with_answers: bool = False,
     answers_only: bool = False
-) -> BytesIO:
+) -> BinaryIO:
     """
     Generate PDF using Playwright (headless Chromium).
     
@@ -33,14 +33,12 @@ async def generate_pdf_playwright(
         answers_only: Whether to generate only answer key
     
     Returns:
-        BytesIO object containing the PDF
+        Spooled file object containing the PDF (positioned at the start)
     """
     # Generate HTML matching preview structure
     html_content = generate_html(config, generated_blocks, with_answers, answers_only)
     
     # Generate PDF using Playwright
-    buffer = BytesIO()
-    
     async with async_playwright() as p:
         # Launch browser
         browser = await p.chromium.launch(headless=True)
@@ -71,9 +69,11 @@ async def generate_pdf_playwright(
                 footer_template='<div style="font-size: 9pt; color: #666666; text-align: center; width: 100%; padding-top: 5mm; font-weight: bold;">Page <span class="pageNumber"></span> of <span class="totalPages"></span></div>',
             )
             
-            # Write to buffer
+            # Spool the bytes (rolls over to disk for large papers) and drop the copy
+            buffer = new_pdf_spool()
             buffer.write(pdf_bytes)
             buffer.seek(0)
+            del pdf_bytes
             
         finally:
             await browser.close()
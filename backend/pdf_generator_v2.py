@@ -1,127 +1,152 @@
 """
-Redesigned PDF Generator - Matches Preview Layout Exactly
-=========================================================
+Native ReportLab PDF Generator - Layout Parity with html_template
+=================================================================
 
-This PDF generator is designed to match the preview layout exactly:
-- Vertical questions: 10-column table layout (matching preview)
-- Horizontal questions: Single column with proper spacing
-- Exact spacing, margins, padding, and typography
-- Professional, clean, exam-ready format
+This PDF generator reproduces the layout of `html_template.generate_html`
+(the HTML that the Playwright engine prints) without launching a browser:
+- Vertical questions: 10-column bordered table (serial, operands, line, answer)
+- Horizontal questions: 2 columns, first column filled completely, then second
+- Blocks are kept together on one page (page-break-inside: avoid)
+- Answer key: 3 columns, filled column by column, on a new page
+- Watermark and "Page X of Y" footer on every page
 
 Design Philosophy:
 ------------------
-1. Match Preview Structure: The PDF should look identical to what users see in preview
+1. Same Structure: Question text, operators, numbering and column order come
+   from the shared helpers in html_template, so both engines print the same paper
 2. Table-Based Layout: Use ReportLab tables for precise control
-3. Consistent Spacing: Match CSS padding/margins (p-1 = 2.83mm, p-1.5 = 4.25mm)
-4. Professional Typography: Clean fonts, proper sizing, readable
-5. Excel-Compatible: Table structure allows easy import to Excel
-
-Layout Specifications:
-----------------------
-- Page: A4 (210mm x 297mm)
-- Margins: 15mm all sides (professional exam format)
-- Vertical Questions: 10 columns, each 10% width
-- Horizontal Questions: Full width, single column
-- Cell Padding: 2.83mm (matching p-1) or 4.25mm (matching p-1.5)
-- Border: 0.5pt gray (#E5E7EB = border-gray-200)
-- Question Numbers: Blue (#1E40AF = text-blue-700), Bold, 12pt
-- Question Text: Gray (#1F2937 = text-gray-800), Monospace, 12pt
-- Answer Text: Gray (#4B5563 = text-gray-600), Monospace, 11pt, Bold
-- Operator: Blue (#2563EB = text-blue-600), Bold, 12pt
+3. Same Page Box: A4 with the margins passed to Chromium (12mm, 20mm at the bottom)
+4. Cheap Rendering: No browser; used for large and bulk jobs
+
+Layout Specifications (from the html_template CSS):
+---------------------------------------------------
+- Page: A4 (210mm x 297mm), margins 12mm (bottom 20mm for the page number)
+- Body: Georgia (Times here) 11pt bold, line-height 1.3
+- Title: 16pt bold centered, 4mm below
+- Block: 2mm padding, 4mm below; section title 12pt bold, 3mm below
+- Vertical table: 1pt black grid, 1mm padding, answer cells 7.5mm high
+- Horizontal question: 1pt black box, 1.5mm padding, 9mm serial column
+  (8mm with answers, question 70% / answer 30%), 4mm column gap, 2mm row gap
+- Question Numbers: Blue (#1E40AF), Bold, 12pt
+- Operator: Blue (#2563EB), Bold, 11pt
+- Answer Text: Gray (#4B5563), Bold, 11pt (10pt in horizontal questions)
 """
 
+import os
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, KeepTogether
+from reportlab.platypus import BaseDocTemplate, PageTemplate, Frame, Table, TableStyle, Paragraph, Spacer, PageBreak, KeepTogether
 from reportlab.platypus.flowables import HRFlowable, Flowable
-from reportlab.platypus.doctemplate import PageTemplate, BaseDocTemplate
-from reportlab.platypus.frames import Frame
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.enums import TA_RIGHT, TA_LEFT, TA_CENTER
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
-from io import BytesIO
-from typing import List, Optional
+from xml.sax.saxutils import escape
+from typing import BinaryIO, List, Optional
 from schemas import PaperConfig, GeneratedBlock
+from pdf_streaming import new_pdf_spool
+from html_template import (
+    format_number, is_vertical_question, vertical_operator, vertical_operand_text,
+    horizontal_question_text, split_columns, collect_answer_key
+)
 
-# ========== DESIGN CONSTANTS (Matching Preview) ==========
+# ========== DESIGN CONSTANTS (Matching html_template) ==========
 
-# Page Setup
+# Page Setup (same margins as the Chromium page.pdf call)
 PAGE_WIDTH, PAGE_HEIGHT = A4
-MARGIN = 12 * mm  # Reduced for more content space
+MARGIN = 12 * mm
+MARGIN_BOTTOM = 20 * mm  # Extra space for page numbers
 USABLE_WIDTH = PAGE_WIDTH - 2 * MARGIN
-USABLE_HEIGHT = PAGE_HEIGHT - 2 * MARGIN
+USABLE_HEIGHT = PAGE_HEIGHT - MARGIN - MARGIN_BOTTOM
 
-# Colors (matching Tailwind CSS)
+# Colors (matching the CSS)
 COLOR_BLUE_700 = colors.HexColor('#1E40AF')  # Question numbers
 COLOR_BLUE_600 = colors.HexColor('#2563EB')  # Operators
 COLOR_GRAY_800 = colors.HexColor('#1F2937')  # Question text
 COLOR_GRAY_600 = colors.HexColor('#4B5563')  # Answer text
-COLOR_GRAY_400 = colors.HexColor('#9CA3AF')  # Borders (line)
-COLOR_GRAY_200 = colors.HexColor('#E5E7EB')  # Cell borders
-COLOR_WHITE = colors.white
-
-# Typography
-FONT_NAME = "Helvetica"
-FONT_BOLD = "Helvetica-Bold"
-FONT_MONO = "Courier"  # Monospace for numbers
-
-# Font Sizes (optimized for compact layout)
-FONT_SIZE_TITLE = 16  # Reduced from 18
-FONT_SIZE_SECTION = 12  # Reduced from 14
-FONT_SIZE_QUESTION_NUM = 11  # Reduced from 12
-FONT_SIZE_QUESTION_TEXT = 10  # Reduced from 12
-FONT_SIZE_ANSWER = 10  # Reduced from 11
-FONT_SIZE_INSTRUCTIONS = 9  # Reduced from 10
-
-# Spacing (reduced for compact layout)
-CELL_PADDING_SMALL = 1.5 * mm  # Reduced from 2.83mm
-CELL_PADDING_MEDIUM = 2 * mm  # Reduced from 4.25mm
-GAP_BETWEEN_QUESTIONS = 2 * mm  # Reduced from 4mm
-SPACE_AFTER_TITLE = 4 * mm  # Reduced from 8mm
-SPACE_AFTER_SECTION = 3 * mm  # Reduced from 6mm
-SPACE_BETWEEN_BLOCKS = 4 * mm  # Reduced from 8mm
+COLOR_GRAY_400 = colors.HexColor('#9CA3AF')  # Answer line
+COLOR_FOOTER = colors.HexColor('#666666')
+COLOR_BLACK = colors.black
+
+
+# Typography: Georgia is not a built-in PDF font. Use DejaVu Serif when it is
+# installed (it has the √ and ∛ glyphs), otherwise the built-in Times.
+def _register_fonts():
+    font_dirs = [
+        os.getenv("PDF_FONT_DIR", ""),
+        "/usr/share/fonts/truetype/dejavu",
+        "/usr/share/fonts/dejavu",
+    ]
+    for font_dir in font_dirs:
+        regular = os.path.join(font_dir, "DejaVuSerif.ttf")
+        bold = os.path.join(font_dir, "DejaVuSerif-Bold.ttf")
+        if font_dir and os.path.exists(regular) and os.path.exists(bold):
+            try:
+                pdfmetrics.registerFont(TTFont("PaperSerif", regular))
+                pdfmetrics.registerFont(TTFont("PaperSerif-Bold", bold))
+                return "PaperSerif", "PaperSerif-Bold"
+            except Exception as e:
+                print(f"⚠️ [PDF_V2] Could not register fonts from {font_dir}: {e}")
+    return "Times-Roman", "Times-Bold"
+
+
+FONT_NAME, FONT_BOLD = _register_fonts()
+FONT_FOOTER = "Helvetica-Bold"
+
+# Font Sizes
+FONT_SIZE_TITLE = 16
+FONT_SIZE_SECTION = 12
+FONT_SIZE_QUESTION_NUM = 12
+FONT_SIZE_QUESTION_TEXT = 11
+FONT_SIZE_ANSWER = 11
+FONT_SIZE_HORIZONTAL_ANSWER = 10
+FONT_SIZE_INFO = 9
+FONT_SIZE_ANSWER_KEY = 10
+FONT_SIZE_FOOTER = 9
+FONT_SIZE_WATERMARK = 80
+
+# Line Height
+LINE_HEIGHT_TIGHT = 1.2  # Operand cells
+LINE_HEIGHT_NORMAL = 1.3  # Body
+
+# Spacing
+SPACE_AFTER_TITLE = 4 * mm
+INFO_ITEM_SPACING = 2 * mm
+SPACE_AFTER_INFO = 3 * mm
+BLOCK_PADDING = 2 * mm
+SPACE_BETWEEN_BLOCKS = 4 * mm
+SPACE_AFTER_SECTION = 3 * mm
+SPACE_AFTER_TABLE = 2 * mm
+HORIZONTAL_COLUMN_GAP = 4 * mm
+ANSWER_KEY_COLUMN_GAP = 8 * mm
+ANSWER_KEY_ITEM_SPACING = 2 * mm
 
 # Table Layout
 VERTICAL_COLUMNS = 10  # 10 questions per row for vertical format
-VERTICAL_COLUMN_WIDTH = USABLE_WIDTH / VERTICAL_COLUMNS
-BORDER_WIDTH = 0.5  # Thin borders for cells
-BLOCK_BORDER_WIDTH = 2.0  # Thick border for blocks (differentiating factor)
-SERIAL_COLUMN_WIDTH = 12 * mm  # Increased from 8mm to prevent wrapping
+BLOCK_WIDTH = USABLE_WIDTH - 2 * BLOCK_PADDING
+VERTICAL_COLUMN_WIDTH = BLOCK_WIDTH / VERTICAL_COLUMNS
+BORDER_WIDTH = 1.0
+VERTICAL_CELL_PADDING = 1 * mm
+ANSWER_CELL_HEIGHT = 7.5 * mm
+ANSWER_CELL_PADDING = 2 * mm
+HORIZONTAL_CELL_PADDING = 1.5 * mm
+SERIAL_COLUMN_WIDTH = 9 * mm
+SERIAL_COLUMN_WIDTH_WITH_ANSWER = 8 * mm
+HORIZONTAL_QUESTION_WIDTH = (BLOCK_WIDTH - HORIZONTAL_COLUMN_GAP) / 2
 
-# Line Height
-LINE_HEIGHT_TIGHT = 1.1  # Reduced for compact layout
-LINE_HEIGHT_NORMAL = 1.3  # Reduced
-
-
-def format_number(num: float) -> str:
-    """Format number without scientific notation (matching frontend formatNumber)."""
-    if isinstance(num, float) and num % 1 == 0:
-        return str(int(num))
-    
-    # Format decimals nicely
-    if isinstance(num, float) and num % 1 != 0:
-        # For 1 decimal place
-        if abs(num * 10 - round(num * 10)) < 0.001:
-            return f"{num:.1f}"
-        # For 2 decimal places
-        return f"{num:.2f}".rstrip('0').rstrip('.')
-    
-    return str(num)
-
-
-def create_paragraph_style(name: str, font_name: str, font_size: float, 
+WATERMARK_TEXT = "TALENT HUB"
+WATERMARK_OPACITY = 0.08
+
+
+def create_paragraph_style(name: str, font_name: str, font_size: float,
                           text_color: colors.Color, alignment: int = TA_LEFT,
                           leading: float = None) -> ParagraphStyle:
-    """Create a paragraph style matching preview typography."""
-    styles = getSampleStyleSheet()
+    """Create a paragraph style matching the HTML typography."""
     leading = leading or (font_size * LINE_HEIGHT_NORMAL)
-    
-    style = ParagraphStyle(
+    return ParagraphStyle(
         name=name,
-        parent=styles['Normal'],
         fontName=font_name,
         fontSize=font_size,
         textColor=text_color,
@@ -130,849 +155,418 @@ def create_paragraph_style(name: str, font_name: str, font_size: float,
         spaceAfter=0,
         spaceBefore=0,
     )
-    return style
 
 
-def render_vertical_questions_table(block: GeneratedBlock, 
-                                   question_counter: int,
-                                   with_answers: bool = False) -> Table:
+# Styles are immutable once built, so share them across renders
+STYLE_TITLE = create_paragraph_style("title", FONT_BOLD, FONT_SIZE_TITLE, COLOR_BLACK, TA_CENTER)
+STYLE_SECTION = create_paragraph_style("section", FONT_BOLD, FONT_SIZE_SECTION, COLOR_BLACK)
+STYLE_ENDING = create_paragraph_style("ending", FONT_BOLD, FONT_SIZE_SECTION, COLOR_BLACK, TA_CENTER)
+
+
+class OperandCell(Flowable):
     """
-    Render vertical questions in 10-column table format (matching preview).
-    
-    Preview structure:
-    - Row 1: Serial numbers (10 columns)
-    - Rows 2-N: Operands (one row per operand)
-    - Line row: Horizontal line
-    - Answer row: Answers (if with_answers)
-    
-    Args:
-        block: Single block containing vertical questions
-        question_counter: Starting question number
-        with_answers: Whether to show answers
+    One operand of a vertical question: operator pinned to the left edge,
+    number centered across the full cell (like .operator-wrapper/.number-wrapper).
     """
-    # Collect all vertical questions from the block
-    all_questions = []
-    for q in block.questions:
-        if getattr(q, 'isVertical', getattr(q, 'is_vertical', False)):
-            all_questions.append(q)
-    
-    if not all_questions:
-        return None
-    
-    # Limit to 10 questions per table (matching preview: 10 columns)
-    questions_to_render = all_questions[:10]
-    
-    if not questions_to_render:
-        return None
-    
-    # Calculate max operands across questions to render
-    max_operands = max(len(q.operands) for q in questions_to_render) if questions_to_render else 0
-    
-    if max_operands == 0:
+    def __init__(self, operator: str, value: str):
+        super().__init__()
+        self.operator = operator
+        self.value = value
+        self.height = FONT_SIZE_QUESTION_TEXT * LINE_HEIGHT_TIGHT
+
+    def wrap(self, avail_width, avail_height):
+        self.width = avail_width
+        return self.width, self.height
+
+    def draw(self):
+        baseline = (self.height - FONT_SIZE_QUESTION_TEXT) / 2 + 0.2 * FONT_SIZE_QUESTION_TEXT
+        self.canv.setFont(FONT_BOLD, FONT_SIZE_QUESTION_TEXT)
+        if self.operator:
+            self.canv.setFillColor(COLOR_BLUE_600)
+            self.canv.drawString(2 * mm, baseline, self.operator)
+        self.canv.setFillColor(COLOR_GRAY_800)
+        self.canv.drawCentredString(self.width / 2, baseline, self.value)
+
+
+class AnswerKeyItem(Flowable):
+    """One answer key line: question in regular weight, answer in bold, never wrapped."""
+    def __init__(self, question: str, answer: str):
+        super().__init__()
+        self.question = question
+        self.answer = answer
+        self.height = FONT_SIZE_ANSWER_KEY * LINE_HEIGHT_NORMAL
+
+    def wrap(self, avail_width, avail_height):
+        self.width = avail_width
+        return self.width, self.height
+
+    def draw(self):
+        baseline = (self.height - FONT_SIZE_ANSWER_KEY) / 2 + 0.2 * FONT_SIZE_ANSWER_KEY
+        self.canv.setFillColor(COLOR_GRAY_800)
+        self.canv.setFont(FONT_NAME, FONT_SIZE_ANSWER_KEY)
+        self.canv.drawString(0, baseline, self.question)
+        answer_x = pdfmetrics.stringWidth(self.question, FONT_NAME, FONT_SIZE_ANSWER_KEY) + 2 * mm
+        self.canv.setFont(FONT_BOLD, FONT_SIZE_ANSWER_KEY)
+        self.canv.drawString(answer_x, baseline, self.answer)
+
+
+class NumberedCanvas(canvas.Canvas):
+    """Canvas that defers page decoration until the total page count is known."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._saved_page_states = []
+
+    def showPage(self):
+        self._saved_page_states.append(dict(self.__dict__))
+        self._startPage()
+
+    def save(self):
+        total_pages = len(self._saved_page_states)
+        for state in self._saved_page_states:
+            self.__dict__.update(state)
+            draw_watermark(self)
+            draw_page_number(self, total_pages)
+            super().showPage()
+        super().save()
+
+
+def draw_watermark(c):
+    """Draw the 'TALENT HUB' watermark rotated across the page center."""
+    c.saveState()
+    c.setFont(FONT_BOLD, FONT_SIZE_WATERMARK)
+    c.setFillColor(COLOR_BLACK)
+    c.setFillAlpha(WATERMARK_OPACITY)
+    c.translate(PAGE_WIDTH / 2, PAGE_HEIGHT / 2)
+    c.rotate(45)
+    c.drawCentredString(0, -FONT_SIZE_WATERMARK * 0.35, WATERMARK_TEXT)
+    c.restoreState()
+
+
+def draw_page_number(c, total_pages: int):
+    """Draw 'Page X of Y' centered in the bottom margin."""
+    c.saveState()
+    c.setFont(FONT_FOOTER, FONT_SIZE_FOOTER)
+    c.setFillColor(COLOR_FOOTER)
+    text = f"Page {c.getPageNumber()} of {total_pages}"
+    c.drawCentredString(PAGE_WIDTH / 2, MARGIN_BOTTOM - 5 * mm - FONT_SIZE_FOOTER, text)
+    c.restoreState()
+
+
+def render_info_section(total_questions: int) -> Table:
+    """Name/Start Time/MM on the left, Date/Stop Time on the right."""
+    table = Table(
+        [
+            ["Name: ", "Date: "],
+            ["Start Time: ", "Stop Time: "],
+            [f"MM: {total_questions}", ""],
+        ],
+        colWidths=[USABLE_WIDTH / 2, USABLE_WIDTH / 2],
+    )
+    table.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('FONT', (0, 0), (-1, -1), FONT_BOLD, FONT_SIZE_INFO, FONT_SIZE_INFO * LINE_HEIGHT_NORMAL),
+        ('TEXTCOLOR', (0, 0), (-1, -1), COLOR_GRAY_800),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('LEFTPADDING', (0, 0), (0, -1), 3 * mm),
+        ('RIGHTPADDING', (0, 0), (0, -1), 0),
+        ('LEFTPADDING', (1, 0), (1, -1), 0),
+        ('RIGHTPADDING', (1, 0), (1, -1), 30 * mm),
+        ('TOPPADDING', (0, 0), (-1, -1), 0),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), INFO_ITEM_SPACING),
+    ]))
+    return table
+
+
+def render_vertical_questions_table(questions: list, with_answers: bool = False) -> Optional[Table]:
+    """
+    Render up to 10 vertical questions as one bordered table (matching
+    .vertical-questions-table).
+
+    Rows:
+    - Serial numbers
+    - One row per operand (operator on the left, number centered)
+    - Line row
+    - Answer row (answers shown only if with_answers)
+    """
+    chunk = questions[:VERTICAL_COLUMNS]
+    if not chunk:
         return None
-    
-    # Build table data
-    table_data = []
-    
-    # Row 1: Serial numbers
-    serial_row = []
-    for i in range(VERTICAL_COLUMNS):
-        if i < len(questions_to_render):
-            q = questions_to_render[i]
-            serial_style = create_paragraph_style(
-                "serial", FONT_BOLD, FONT_SIZE_QUESTION_NUM, COLOR_BLUE_700
-            )
-            serial_row.append(Paragraph(f"{q.id}.", serial_style))
-        else:
-            serial_row.append("")  # Empty cell
-    table_data.append(serial_row)
-    
-    # Rows 2 to (max_operands + 1): Operands
-    for operand_idx in range(max_operands):
-        operand_row = []
-        for i in range(VERTICAL_COLUMNS):
-            if i < len(questions_to_render):
-                q = questions_to_render[i]
-                if operand_idx < len(q.operands):
-                    operand = q.operands[operand_idx]
-                    
-                    # Determine operator
-                    operator = None
-                    if hasattr(q, 'operators') and q.operators and len(q.operators) > 0:
-                        if operand_idx > 0:
-                            operator = q.operators[operand_idx - 1]
-                    elif hasattr(q, 'operator') and q.operator:
-                        if q.operator == "-" and operand_idx > 0:
-                            operator = q.operator
-                        elif q.operator != "-" and operand_idx == len(q.operands) - 1:
-                            operator = q.operator
-                    
-                    # Check for decimal format (decimal_add_sub)
-                    # Only decimal_add_sub stores operands as integers * 10
-                    # Regular add_sub uses "±" operator but stores operands as regular integers
-                    operator_str = str(q.operator) if hasattr(q, 'operator') and q.operator else ""
-                    is_decimal_operator = (
-                        operator_str == "±" or 
-                        operator_str == "\u00B1" or
-                        (len(operator_str) > 0 and ord(operator_str[0]) == 0x00B1)
-                    )
-                    
-                    # Check block type to determine if it's decimal_add_sub
-                    # For decimal_add_sub, operands are stored as integers * 10 (e.g., 70 for 7.0)
-                    # For regular add_sub, operands are regular integers (e.g., 7)
-                    is_decimal = False
-                    if is_decimal_operator and hasattr(block, 'config') and block.config:
-                        block_type = getattr(block.config, 'type', None)
-                        if block_type == "decimal_add_sub":
-                            is_decimal = True
-                        # Also check if operands look like they're stored as integers * 10
-                        # (e.g., if we have digits=1 but operand is >= 10, it's likely decimal)
-                        elif operand >= 10 and operand % 10 == 0:
-                            # Could be decimal, but be conservative - only if all operands in question are like this
-                            all_operands_large = all(op >= 10 for op in q.operands)
-                            if all_operands_large:
-                                is_decimal = True
-                    
-                    # Format operand
-                    if is_decimal:
-                        display_value = f"{float(operand) / 10.0:.1f}"
-                    else:
-                        display_value = format_number(operand)
-                    
-                    # Build cell with operator (left-aligned) and number (center-aligned)
-                    # Use a nested table structure: [operator (left) | number (center)]
-                    if operator:
-                        # Create operator paragraph (left-aligned, blue color)
-                        operator_style = create_paragraph_style(
-                            "operator", FONT_BOLD, FONT_SIZE_QUESTION_TEXT, COLOR_BLUE_600,
-                            TA_LEFT, LINE_HEIGHT_TIGHT * FONT_SIZE_QUESTION_TEXT
-                        )
-                        operator_para = Paragraph(str(operator), operator_style)
-                        
-                        # Create number paragraph (center-aligned, gray color)
-                        number_style = create_paragraph_style(
-                            "operand", FONT_BOLD, FONT_SIZE_QUESTION_TEXT, COLOR_GRAY_800,
-                            TA_CENTER, LINE_HEIGHT_TIGHT * FONT_SIZE_QUESTION_TEXT
-                        )
-                        number_para = Paragraph(display_value, number_style)
-                        
-                        # Create nested table: operator (left, ~15% width) | number (center, ~85% width)
-                        nested_table_data = [[operator_para, number_para]]
-                        # Operator column: enough space for + or - symbol (about 8-10mm)
-                        op_width = max(10 * mm, VERTICAL_COLUMN_WIDTH * 0.15)
-                        # Number column: remaining space
-                        num_width = max(VERTICAL_COLUMN_WIDTH - op_width, VERTICAL_COLUMN_WIDTH * 0.7)
-                        nested_col_widths = [op_width, num_width]
-                        
-                        nested_table = Table(
-                            nested_table_data,
-                            colWidths=nested_col_widths,
-                            style=TableStyle([
-                                ('ALIGN', (0, 0), (0, 0), 'LEFT'),  # Operator left-aligned
-                                ('ALIGN', (1, 0), (1, 0), 'CENTER'),  # Number center-aligned
-                                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                                ('LEFTPADDING', (0, 0), (0, 0), 0),  # No padding for operator
-                                ('RIGHTPADDING', (0, 0), (0, 0), 2*mm),  # Small gap after operator
-                                ('LEFTPADDING', (1, 0), (1, 0), 0),  # No padding for number
-                                ('RIGHTPADDING', (1, 0), (1, 0), 0),
-                                ('TOPPADDING', (0, 0), (-1, -1), 0),
-                                ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-                            ])
-                        )
-                        operand_row.append(nested_table)
-                    else:
-                        # No operator, just center-aligned number
-                        number_style = create_paragraph_style(
-                            "operand", FONT_BOLD, FONT_SIZE_QUESTION_TEXT, COLOR_GRAY_800,
-                            TA_CENTER, LINE_HEIGHT_TIGHT * FONT_SIZE_QUESTION_TEXT
-                        )
-                        operand_row.append(Paragraph(display_value, number_style))
-                else:
-                    operand_row.append("")  # Empty cell
+    padding = [""] * (VERTICAL_COLUMNS - len(chunk))
+
+    table_data = [[f"{q.id}." for q in chunk] + padding]
+
+    max_operands = max(len(q.operands) for q in chunk if hasattr(q, 'operands'))
+    for row_idx in range(max_operands):
+        row = []
+        for q in chunk:
+            if hasattr(q, 'operands') and row_idx < len(q.operands):
+                row.append(OperandCell(
+                    vertical_operator(q, row_idx),
+                    vertical_operand_text(q, q.operands[row_idx])
+                ))
             else:
-                operand_row.append("")  # Empty cell
-        table_data.append(operand_row)
-    
-    # Line row: Horizontal line (empty cells, border will be drawn)
-    line_row = [""] * VERTICAL_COLUMNS
-    table_data.append(line_row)
-    
-    # Answer row
+                row.append("")
+        table_data.append(row + padding)
+
+    # Empty string cells would take the default 12pt leading; keep the line row 1pt high
+    table_data.append([
+        HRFlowable(width="100%", thickness=1, color=COLOR_GRAY_400, spaceBefore=0, spaceAfter=0)
+        for _ in chunk
+    ] + [Spacer(0, 0) for _ in padding])
+
     answer_row = []
-    for i in range(VERTICAL_COLUMNS):
-        if i < len(questions_to_render):
-            q = questions_to_render[i]
-            if with_answers and hasattr(q, 'answer') and q.answer is not None:
-                answer_style = create_paragraph_style(
-                    "answer", FONT_MONO, FONT_SIZE_ANSWER, COLOR_GRAY_600,
-                    TA_RIGHT, LINE_HEIGHT_TIGHT * FONT_SIZE_ANSWER
-                )
-                answer_text = format_number(q.answer)
-                answer_row.append(Paragraph(answer_text, answer_style))
-            else:
-                answer_row.append("")  # Empty space for student to write
+    for q in chunk:
+        if with_answers and hasattr(q, 'answer') and q.answer is not None:
+            answer_row.append(format_number(q.answer))
         else:
             answer_row.append("")
-    table_data.append(answer_row)
-    
-    # Validate table data before creating
-    if not table_data or len(table_data) == 0:
-        return None
-    
-    # Ensure all rows have the correct number of columns
-    for row in table_data:
-        while len(row) < VERTICAL_COLUMNS:
-            row.append("")
-        # Trim if too many
-        if len(row) > VERTICAL_COLUMNS:
-            row[:] = row[:VERTICAL_COLUMNS]
-    
-    # Create table
-    # Ensure column widths are valid and don't exceed available width
-    # ReportLab handles padding internally, so column widths should sum to USABLE_WIDTH
-    col_widths = [VERTICAL_COLUMN_WIDTH] * VERTICAL_COLUMNS
-    total_width = sum(col_widths)
-    
-    # Validate and adjust if needed - ensure total width fits
-    if total_width > USABLE_WIDTH:
-        # Scale down proportionally
-        scale = (USABLE_WIDTH * 0.98) / total_width  # Use 98% to be safe
-        col_widths = [w * scale for w in col_widths]
-    
-    # Ensure no None or invalid values
-    col_widths = [max(w, 1 * mm) if w and w > 0 else 1 * mm for w in col_widths]
-    
-    # Final validation: ensure total fits (ReportLab adds padding internally)
-    final_total = sum(col_widths)
-    if final_total > USABLE_WIDTH:
-        # Emergency scale down
-        emergency_scale = (USABLE_WIDTH * 0.98) / final_total  # Use 98% to be safe
-        col_widths = [w * emergency_scale for w in col_widths]
-    
-    try:
-        table = Table(
-            table_data,
-            colWidths=col_widths,
-            repeatRows=0,
-            style=TableStyle([
-            # Borders
-            ('GRID', (0, 0), (-1, -1), BORDER_WIDTH, COLOR_GRAY_200),
-            # Cell padding
-            ('LEFTPADDING', (0, 0), (-1, -1), CELL_PADDING_SMALL),
-            ('RIGHTPADDING', (0, 0), (-1, -1), CELL_PADDING_SMALL),
-            ('TOPPADDING', (0, 0), (-1, -1), CELL_PADDING_SMALL),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), CELL_PADDING_SMALL),
-            # Alignment
+    table_data.append(answer_row + padding)
+
+    answer_leading = FONT_SIZE_ANSWER * LINE_HEIGHT_NORMAL
+    answer_height = max(ANSWER_CELL_HEIGHT, 2 * ANSWER_CELL_PADDING + answer_leading) if with_answers else ANSWER_CELL_HEIGHT
+    row_heights = [None] * (len(table_data) - 1) + [answer_height]
+
+    return Table(
+        table_data,
+        colWidths=[VERTICAL_COLUMN_WIDTH] * VERTICAL_COLUMNS,
+        rowHeights=row_heights,
+        style=TableStyle([
+            ('GRID', (0, 0), (-1, -1), BORDER_WIDTH, COLOR_BLACK),
+            ('LEFTPADDING', (0, 0), (-1, -1), VERTICAL_CELL_PADDING),
+            ('RIGHTPADDING', (0, 0), (-1, -1), VERTICAL_CELL_PADDING),
+            ('TOPPADDING', (0, 0), (-1, -1), VERTICAL_CELL_PADDING),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), VERTICAL_CELL_PADDING),
             ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            # Serial number row: left align
-            ('ALIGN', (0, 0), (-1, 0), 'LEFT'),
-            # Operand rows: center align (numbers are center-aligned, operators are in nested table)
-            ('ALIGN', (0, 1), (-1, -3), 'CENTER'),
-            # Answer row: center align
+            # Serial numbers
+            ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('FONT', (0, 0), (-1, 0), FONT_BOLD, FONT_SIZE_QUESTION_NUM, FONT_SIZE_QUESTION_NUM * LINE_HEIGHT_NORMAL),
+            ('TEXTCOLOR', (0, 0), (-1, 0), COLOR_BLUE_700),
+            # Answers
             ('ALIGN', (0, -1), (-1, -1), 'CENTER'),
-            # Background
-            ('BACKGROUND', (0, 0), (-1, -1), COLOR_WHITE),
-            # Line row: special styling (thicker bottom border)
-            ('LINEBELOW', (0, -2), (-1, -2), 1, COLOR_GRAY_400),
+            ('FONT', (0, -1), (-1, -1), FONT_BOLD, FONT_SIZE_ANSWER, answer_leading),
+            ('TEXTCOLOR', (0, -1), (-1, -1), COLOR_GRAY_600),
+            ('TOPPADDING', (0, -1), (-1, -1), ANSWER_CELL_PADDING),
+            ('BOTTOMPADDING', (0, -1), (-1, -1), ANSWER_CELL_PADDING),
         ])
-        )
-        return table
-    except Exception as e:
-        # Log error and return None to skip this table
-        print(f"Error creating vertical table: {e}")
-        import traceback
-        traceback.print_exc()
-        return None
+    )
 
 
-def render_horizontal_questions_pair(question1, question_num1: int,
-                                    question2, question_num2: int,
-                                    with_answers: bool = False) -> Table:
+def render_horizontal_question(question, with_answers: bool = False) -> Table:
     """
-    Render two horizontal questions side by side in a 2-column layout.
-    
-    Structure:
-    - Row 1: [Q1 Serial | Q1 Text | Q1 Answer] | [Q2 Serial | Q2 Text | Q2 Answer]
+    Render a single horizontal question as a bordered table (matching
+    .question-horizontal): serial | question text | answer (optional).
     """
-    # Calculate column widths for 2 questions side by side
-    # Each question gets: serial + text + (optional answer)
-    # Total: 2 questions = 2*(serial + text) + 2*(optional answer) = 4 or 6 columns
-    question_width = (USABLE_WIDTH - (1 * mm)) / 2  # Split width, minus gap between questions
-    
-    # Question 1
-    serial_style1 = create_paragraph_style(
-        "serial", FONT_BOLD, FONT_SIZE_QUESTION_NUM, COLOR_BLUE_700
-    )
-    serial_cell1 = Paragraph(f"{question_num1}.", serial_style1)
-    
-    question_text1 = ""
-    if hasattr(question1, 'text') and question1.text:
-        question_text1 = question1.text
-    elif hasattr(question1, 'operands') and len(question1.operands) >= 2:
-        op1 = format_number(question1.operands[0])
-        op2 = format_number(question1.operands[1])
-        operator = getattr(question1, 'operator', '×')
-        question_text1 = f"{op1} {operator} {op2} ="
-    
-    text_style1 = create_paragraph_style(
-        "question", FONT_BOLD, FONT_SIZE_QUESTION_TEXT, COLOR_GRAY_800,
-        TA_LEFT, LINE_HEIGHT_NORMAL * FONT_SIZE_QUESTION_TEXT
-    )
-    question_cell1 = Paragraph(question_text1, text_style1)
-    
-    # Question 2
-    serial_style2 = create_paragraph_style(
-        "serial", FONT_BOLD, FONT_SIZE_QUESTION_NUM, COLOR_BLUE_700
-    )
-    serial_cell2 = Paragraph(f"{question_num2}.", serial_style2)
-    
-    question_text2 = ""
-    if hasattr(question2, 'text') and question2.text:
-        question_text2 = question2.text
-    elif hasattr(question2, 'operands') and len(question2.operands) >= 2:
-        op1 = format_number(question2.operands[0])
-        op2 = format_number(question2.operands[1])
-        operator = getattr(question2, 'operator', '×')
-        question_text2 = f"{op1} {operator} {op2} ="
-    
-    text_style2 = create_paragraph_style(
-        "question", FONT_BOLD, FONT_SIZE_QUESTION_TEXT, COLOR_GRAY_800,
-        TA_LEFT, LINE_HEIGHT_NORMAL * FONT_SIZE_QUESTION_TEXT
-    )
-    question_cell2 = Paragraph(question_text2, text_style2)
-    
-    # Build table data - single row with both questions
-    row = [serial_cell1, question_cell1]
-    
-    # Add answer for question 1 (always include column if with_answers is True for consistent layout)
-    if with_answers:
-        if hasattr(question1, 'answer') and question1.answer is not None:
-            answer_style1 = create_paragraph_style(
-                "answer", FONT_MONO, FONT_SIZE_ANSWER, COLOR_GRAY_600,
-                TA_RIGHT, LINE_HEIGHT_NORMAL * FONT_SIZE_ANSWER
-            )
-            answer_text1 = format_number(question1.answer)
-            answer_cell1 = Paragraph(answer_text1, answer_style1)
-            row.append(answer_cell1)
-        else:
-            row.append("")  # Empty cell if no answer
-    
-    # Add separator column (small gap between questions)
-    row.append("")  # Empty cell for gap
-    
-    # Question 2 columns
-    row.append(serial_cell2)
-    row.append(question_cell2)
-    
-    # Add answer for question 2 (always include column if with_answers is True)
-    if with_answers:
-        if hasattr(question2, 'answer') and question2.answer is not None:
-            answer_style2 = create_paragraph_style(
-                "answer", FONT_MONO, FONT_SIZE_ANSWER, COLOR_GRAY_600,
-                TA_RIGHT, LINE_HEIGHT_NORMAL * FONT_SIZE_ANSWER
-            )
-            answer_text2 = format_number(question2.answer)
-            answer_cell2 = Paragraph(answer_text2, answer_style2)
-            row.append(answer_cell2)
-        else:
-            row.append("")  # Empty cell if no answer
-    
-    table_data = [row]
-    
-    # Calculate column widths
-    # Structure: [Q1 Serial | Q1 Text | Q1 Answer? | Gap | Q2 Serial | Q2 Text | Q2 Answer?]
-    has_answers_col = with_answers
-    
-    if has_answers_col:
-        # 7 columns: Q1 serial, Q1 text, Q1 answer, gap, Q2 serial, Q2 text, Q2 answer
-        # Question text column ends at 80% of question width (separator at 80%)
-        # Answer column is 20% of question width
-        q1_width = question_width
-        q2_width = question_width
-        gap_width = 1 * mm
-        serial_width = SERIAL_COLUMN_WIDTH
-        # Answer width is 20% of each question's width (ensures separator at 80% of question width)
-        answer_width = question_width * 0.20
-        # Question text width: 80% of question width minus serial width
-        q1_text_width = (q1_width * 0.80) - serial_width
-        q2_text_width = (q2_width * 0.80) - serial_width
-        col_widths = [serial_width, max(q1_text_width, 30*mm), answer_width, gap_width, serial_width, max(q2_text_width, 30*mm), answer_width]
+    has_answer = with_answers and hasattr(question, 'answer') and question.answer is not None
+    # Plain string cells do not wrap, like the white-space: nowrap columns
+    row = [f"{question.id}.", horizontal_question_text(question)]
+    if has_answer:
+        row.append(format_number(question.answer))
+        remaining = HORIZONTAL_QUESTION_WIDTH - SERIAL_COLUMN_WIDTH_WITH_ANSWER
+        col_widths = [SERIAL_COLUMN_WIDTH_WITH_ANSWER, remaining * 0.7, remaining * 0.3]
     else:
-        # 5 columns: Q1 serial, Q1 text, gap, Q2 serial, Q2 text
-        q1_width = question_width
-        q2_width = question_width
-        gap_width = 1 * mm
-        serial_width = SERIAL_COLUMN_WIDTH
-        q1_text_width = q1_width - serial_width
-        q2_text_width = q2_width - serial_width
-        col_widths = [serial_width, q1_text_width, gap_width, serial_width, q2_text_width]
-    
-    # Ensure widths fit
-    total_width = sum(col_widths)
-    if total_width > USABLE_WIDTH:
-        scale = (USABLE_WIDTH * 0.98) / total_width
-        col_widths = [w * scale for w in col_widths]
-    
-    col_widths = [max(w, 5*mm) for w in col_widths]
-    
-    # Build table style
+        col_widths = [SERIAL_COLUMN_WIDTH, HORIZONTAL_QUESTION_WIDTH - SERIAL_COLUMN_WIDTH]
+
     table_style = [
-        ('GRID', (0, 0), (-1, -1), BORDER_WIDTH, COLOR_GRAY_200),
-        ('LEFTPADDING', (0, 0), (-1, -1), CELL_PADDING_SMALL),
-        ('RIGHTPADDING', (0, 0), (-1, -1), CELL_PADDING_SMALL),
-        ('TOPPADDING', (0, 0), (-1, -1), CELL_PADDING_SMALL),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), CELL_PADDING_SMALL),
+        ('BOX', (0, 0), (-1, -1), BORDER_WIDTH, COLOR_BLACK),
+        ('LINEAFTER', (0, 0), (-2, 0), BORDER_WIDTH, COLOR_BLACK),
+        ('LEFTPADDING', (0, 0), (-1, -1), HORIZONTAL_CELL_PADDING),
+        ('RIGHTPADDING', (0, 0), (-1, -1), HORIZONTAL_CELL_PADDING),
+        ('TOPPADDING', (0, 0), (-1, -1), HORIZONTAL_CELL_PADDING),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), HORIZONTAL_CELL_PADDING),
         ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('ALIGN', (0, 0), (0, 0), 'LEFT'),  # Q1 Serial
-        ('ALIGN', (1, 0), (1, 0), 'LEFT'),  # Q1 Text
-        ('BACKGROUND', (0, 0), (-1, -1), COLOR_WHITE),
-        ('LINEAFTER', (0, 0), (0, 0), BORDER_WIDTH, COLOR_GRAY_200),  # After Q1 serial
+        ('VALIGN', (0, 0), (0, 0), 'MIDDLE'),
+        # Serial number
+        ('ALIGN', (0, 0), (0, 0), 'CENTER'),
+        ('FONT', (0, 0), (0, 0), FONT_BOLD, FONT_SIZE_QUESTION_NUM, FONT_SIZE_QUESTION_NUM * LINE_HEIGHT_NORMAL),
+        ('TEXTCOLOR', (0, 0), (0, 0), COLOR_BLUE_700),
+        # Question text
+        ('FONT', (1, 0), (1, 0), FONT_BOLD, FONT_SIZE_QUESTION_TEXT, FONT_SIZE_QUESTION_TEXT * LINE_HEIGHT_NORMAL),
+        ('TEXTCOLOR', (1, 0), (1, 0), COLOR_GRAY_800),
     ]
-    
-    # Add Q1 answer column styling if present
-    if has_answers_col:
-        table_style.extend([
-            ('ALIGN', (2, 0), (2, 0), 'RIGHT'),  # Q1 Answer
-            ('LINEAFTER', (2, 0), (2, 0), BORDER_WIDTH, COLOR_GRAY_200),  # After Q1 answer
-        ])
-        # Gap column (no border, invisible)
-        gap_col_idx = 3
+    if has_answer:
         table_style.extend([
-            ('BACKGROUND', (gap_col_idx, 0), (gap_col_idx, 0), COLOR_WHITE),
-            ('GRID', (gap_col_idx, 0), (gap_col_idx, 0), 0, COLOR_WHITE),
-            ('LEFTPADDING', (gap_col_idx, 0), (gap_col_idx, 0), 0),
-            ('RIGHTPADDING', (gap_col_idx, 0), (gap_col_idx, 0), 0),
+            ('ALIGN', (2, 0), (2, 0), 'RIGHT'),
+            ('FONT', (2, 0), (2, 0), FONT_BOLD, FONT_SIZE_HORIZONTAL_ANSWER, FONT_SIZE_HORIZONTAL_ANSWER * LINE_HEIGHT_NORMAL),
+            ('TEXTCOLOR', (2, 0), (2, 0), COLOR_GRAY_600),
         ])
-        # Q2 columns
-        q2_serial_idx = 4
-        q2_text_idx = 5
-        q2_answer_idx = 6
-        table_style.extend([
-            ('ALIGN', (q2_serial_idx, 0), (q2_serial_idx, 0), 'LEFT'),  # Q2 Serial
-            ('ALIGN', (q2_text_idx, 0), (q2_text_idx, 0), 'LEFT'),  # Q2 Text
-            ('ALIGN', (q2_answer_idx, 0), (q2_answer_idx, 0), 'RIGHT'),  # Q2 Answer
-            ('LINEAFTER', (q2_serial_idx, 0), (q2_serial_idx, 0), BORDER_WIDTH, COLOR_GRAY_200),
-            ('LINEAFTER', (q2_answer_idx - 1, 0), (q2_answer_idx - 1, 0), BORDER_WIDTH, COLOR_GRAY_200),
+    return Table([row], colWidths=col_widths, style=TableStyle(table_style))
+
+
+def render_horizontal_row(question1, question2, with_answers: bool = False) -> Table:
+    """Two horizontal questions side by side with the 4mm grid gap."""
+    cells = [
+        render_horizontal_question(question1, with_answers) if question1 is not None else "",
+        "",
+        render_horizontal_question(question2, with_answers) if question2 is not None else "",
+    ]
+    return Table(
+        [cells],
+        colWidths=[HORIZONTAL_QUESTION_WIDTH, HORIZONTAL_COLUMN_GAP, HORIZONTAL_QUESTION_WIDTH],
+        style=TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
         ])
+    )
+
+
+def render_block(block: GeneratedBlock, with_answers: bool = False) -> list:
+    """Flowables for one block (section title plus its questions)."""
+    content = []
+    if block.config.title:
+        content.append(Paragraph(escape(block.config.title), STYLE_SECTION))
+        content.append(Spacer(1, SPACE_AFTER_SECTION))
+
+    has_vertical = any(is_vertical_question(q) for q in block.questions) if block.questions else False
+
+    if has_vertical:
+        vertical_questions = [q for q in block.questions if is_vertical_question(q)]
+        for chunk_start in range(0, len(vertical_questions), VERTICAL_COLUMNS):
+            table = render_vertical_questions_table(
+                vertical_questions[chunk_start:chunk_start + VERTICAL_COLUMNS], with_answers
+            )
+            if table:
+                content.append(table)
+                content.append(Spacer(1, SPACE_AFTER_TABLE))
     else:
-        # No answers - gap is at index 2
-        gap_col_idx = 2
-        table_style.extend([
-            ('BACKGROUND', (gap_col_idx, 0), (gap_col_idx, 0), COLOR_WHITE),
-            ('GRID', (gap_col_idx, 0), (gap_col_idx, 0), 0, COLOR_WHITE),
-            ('LEFTPADDING', (gap_col_idx, 0), (gap_col_idx, 0), 0),
-            ('RIGHTPADDING', (gap_col_idx, 0), (gap_col_idx, 0), 0),
-        ])
-        # Q2 columns
-        q2_serial_idx = 3
-        q2_text_idx = 4
-        table_style.extend([
-            ('ALIGN', (q2_serial_idx, 0), (q2_serial_idx, 0), 'LEFT'),  # Q2 Serial
-            ('ALIGN', (q2_text_idx, 0), (q2_text_idx, 0), 'LEFT'),  # Q2 Text
-            ('LINEAFTER', (q2_serial_idx, 0), (q2_serial_idx, 0), BORDER_WIDTH, COLOR_GRAY_200),
+        horizontal_questions = [q for q in block.questions if not is_vertical_question(q)]
+        column1, column2 = split_columns(horizontal_questions, 2)
+        for row_idx in range(max(len(column1), len(column2))):
+            content.append(render_horizontal_row(
+                column1[row_idx] if row_idx < len(column1) else None,
+                column2[row_idx] if row_idx < len(column2) else None,
+                with_answers
+            ))
+            content.append(Spacer(1, SPACE_AFTER_TABLE))
+
+    if not content:
+        return []
+    # Block padding: inset the content by 2mm on every side
+    wrapper = Table(
+        [[item] for item in content],
+        colWidths=[USABLE_WIDTH],
+        style=TableStyle([
+            ('LEFTPADDING', (0, 0), (-1, -1), BLOCK_PADDING),
+            ('RIGHTPADDING', (0, 0), (-1, -1), BLOCK_PADDING),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+            ('TOPPADDING', (0, 0), (-1, 0), BLOCK_PADDING),
+            ('BOTTOMPADDING', (0, -1), (-1, -1), BLOCK_PADDING),
         ])
-    
-    try:
-        table = Table(
-            table_data,
-            colWidths=col_widths,
-            style=TableStyle(table_style)
-        )
-        return table
-    except Exception as e:
-        print(f"Error creating horizontal questions pair table: {e}")
-        import traceback
-        traceback.print_exc()
+    )
+    return [KeepTogether([wrapper, Spacer(1, SPACE_BETWEEN_BLOCKS)])]
+
+
+def render_answer_key(generated_blocks: List[GeneratedBlock]) -> Optional[Table]:
+    """Answer key in 3 columns, filling the first column, then the second, then the third."""
+    all_answers = collect_answer_key(generated_blocks)
+    if not all_answers:
         return None
+    columns = split_columns(all_answers, 3)
+    column_width = (USABLE_WIDTH - 2 * ANSWER_KEY_COLUMN_GAP) / 3
 
+    rows = []
+    for row_idx in range(len(columns[0])):
+        row = []
+        for column_idx, column in enumerate(columns):
+            if column_idx > 0:
+                row.append("")  # Column gap
+            if row_idx < len(column):
+                item = column[row_idx]
+                row.append(AnswerKeyItem(f"{item['number']}. {item['question']}", item['answer']))
+            else:
+                row.append("")
+        rows.append(row)
 
-def render_horizontal_question_table(question, question_num: int, 
-                                    with_answers: bool = False) -> Table:
-    """
-    Render a single horizontal question in table format (matching MathQuestion component).
-    
-    Preview structure:
-    - Column 1: Serial number (w-8, blue, bold)
-    - Column 2: Question text (monospace, gray-800)
-    - Column 3 (optional): Answer (if with_answers, gray-600, bold)
-    """
-    # Serial number
-    serial_style = create_paragraph_style(
-        "serial", FONT_BOLD, FONT_SIZE_QUESTION_NUM, COLOR_BLUE_700
-    )
-    serial_cell = Paragraph(f"{question_num}.", serial_style)
-    
-    # Question text
-    question_text = ""
-    if hasattr(question, 'text') and question.text:
-        # Use text field directly for special types
-        question_text = question.text
-    elif hasattr(question, 'operands') and len(question.operands) >= 2:
-        # Format: operand1 operator operand2 =
-        op1 = format_number(question.operands[0])
-        op2 = format_number(question.operands[1])
-        operator = getattr(question, 'operator', '×')
-        question_text = f"{op1} {operator} {op2} ="
-    
-    text_style = create_paragraph_style(
-        "question", FONT_BOLD, FONT_SIZE_QUESTION_TEXT, COLOR_GRAY_800,
-        TA_LEFT, LINE_HEIGHT_NORMAL * FONT_SIZE_QUESTION_TEXT
-    )
-    question_cell = Paragraph(question_text, text_style)
-    
-    # Build table data
-    table_data = [[serial_cell, question_cell]]
-    
-    # Add answer column if needed
-    if with_answers and hasattr(question, 'answer') and question.answer is not None:
-        answer_style = create_paragraph_style(
-            "answer", FONT_MONO, FONT_SIZE_ANSWER, COLOR_GRAY_600,
-            TA_RIGHT, LINE_HEIGHT_NORMAL * FONT_SIZE_ANSWER
-        )
-        answer_text = format_number(question.answer)
-        answer_cell = Paragraph(answer_text, answer_style)
-        table_data[0].append(answer_cell)
-        # Column widths: Question text column ends at 80% of total width (separator at 80%)
-        # Answer column is 20% of total width
-        # This ensures consistent separator position regardless of answer length
-        total_width = USABLE_WIDTH
-        answer_col_width = total_width * 0.20  # 20% from right
-        question_text_width = total_width * 0.80 - SERIAL_COLUMN_WIDTH  # 80% total minus serial
-        col_widths = [SERIAL_COLUMN_WIDTH, max(question_text_width, 50*mm), answer_col_width]
-    else:
-        # Column widths: ReportLab handles padding internally, so just ensure widths sum to USABLE_WIDTH
-        available_for_question = USABLE_WIDTH - SERIAL_COLUMN_WIDTH
-        col_widths = [SERIAL_COLUMN_WIDTH, max(available_for_question, 50*mm)]
-    
-    # Final validation: ensure total width fits (ReportLab adds padding internally)
-    total_table_width = sum(col_widths)
-    if total_table_width > USABLE_WIDTH:
-        # Scale down proportionally to fit
-        scale = (USABLE_WIDTH * 0.98) / total_table_width  # Use 98% to be safe
-        col_widths = [w * scale for w in col_widths]
-    
-    # Ensure no column is too small
-    col_widths = [max(w, 10*mm) for w in col_widths]
-    
-    # Build table style
-    table_style = [
-        # Borders
-        ('GRID', (0, 0), (-1, -1), BORDER_WIDTH, COLOR_GRAY_200),
-        # Cell padding (matching p-1.5)
-        ('LEFTPADDING', (0, 0), (-1, -1), CELL_PADDING_MEDIUM),
-        ('RIGHTPADDING', (0, 0), (-1, -1), CELL_PADDING_MEDIUM),
-        ('TOPPADDING', (0, 0), (-1, -1), CELL_PADDING_MEDIUM),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), CELL_PADDING_MEDIUM),
-        # Alignment
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('ALIGN', (0, 0), (0, 0), 'LEFT'),  # Serial number
-        ('ALIGN', (1, 0), (1, 0), 'LEFT'),  # Question text
-        # Background
-        ('BACKGROUND', (0, 0), (-1, -1), COLOR_WHITE),
-        # Border between serial and question
-        ('LINEAFTER', (0, 0), (0, 0), BORDER_WIDTH, COLOR_GRAY_200),
-    ]
-    
-    # Add answer column styling if present
-    if len(col_widths) > 2:
-        table_style.extend([
-            ('ALIGN', (2, 0), (2, 0), 'RIGHT'),  # Answer
-            ('LINEAFTER', (1, 0), (1, 0), BORDER_WIDTH, COLOR_GRAY_200),
+    return Table(
+        rows,
+        colWidths=[column_width, ANSWER_KEY_COLUMN_GAP, column_width, ANSWER_KEY_COLUMN_GAP, column_width],
+        style=TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), ANSWER_KEY_ITEM_SPACING),
         ])
-    
-    # Create table with error handling
-    try:
-        table = Table(
-            table_data,
-            colWidths=col_widths,
-            style=TableStyle(table_style)
-        )
-        return table
-    except Exception as e:
-        # Log error and return a simple fallback table
-        print(f"Error creating horizontal table: {e}")
-        import traceback
-        traceback.print_exc()
-        # Return a minimal valid table
-        try:
-            # Use simpler widths as fallback - ensure they fit
-            simple_padding = len(col_widths) * 2 * CELL_PADDING_MEDIUM
-            available_width = USABLE_WIDTH - simple_padding
-            if len(table_data[0]) > 2:
-                # 3 columns: serial, question, answer
-                simple_col_widths = [
-                    SERIAL_COLUMN_WIDTH,
-                    (available_width - SERIAL_COLUMN_WIDTH - 80*mm) * 0.9,
-                    80*mm
-                ]
-            else:
-                # 2 columns: serial, question
-                simple_col_widths = [
-                    SERIAL_COLUMN_WIDTH,
-                    available_width - SERIAL_COLUMN_WIDTH
-                ]
-            return Table(
-                table_data,
-                colWidths=simple_col_widths,
-                style=TableStyle(table_style)
-            )
-        except:
-            # Ultimate fallback - return None to skip this question
-            print("Failed to create fallback horizontal table")
-            return None
-
-
-def create_block_border_table(inner_content, border_width=BLOCK_BORDER_WIDTH):
-    """Create a table with thick border around block content"""
-    # Create a wrapper table with thick borders
-    border_table_data = [[inner_content]]
-    border_table = Table(border_table_data, colWidths=[USABLE_WIDTH])
-    border_table.setStyle(TableStyle([
-        ('BOX', (0, 0), (-1, -1), border_width, colors.HexColor('#000000')),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ('TOPPADDING', (0, 0), (-1, -1), 0),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-    ]))
-    return border_table
+    )
 
 
-def generate_pdf_v2(
-    config: PaperConfig,
-    generated_blocks: List[GeneratedBlock],
-    with_answers: bool = False,
-    answers_only: bool = False
-) -> BytesIO:
-    """
-    Generate PDF matching preview layout exactly.
-    
-    Design:
-    - Uses ReportLab's Table for precise layout control
-    - Matches preview spacing, padding, borders exactly
-    - Professional typography and colors
-    - Clean, exam-ready format
-    """
-    buffer = BytesIO()
-    
-    def on_first_page(canvas, doc):
-        """Draw watermark and page number on first page"""
-        draw_watermark(canvas)
-        draw_page_number(canvas, doc)
-    
-    def on_later_pages(canvas, doc):
-        """Draw watermark and page number on subsequent pages"""
-        draw_watermark(canvas)
-        draw_page_number(canvas, doc)
-    
-    def draw_watermark(canvas):
-        """Draw 'Talent Hub' watermark in background"""
-        canvas.saveState()
-        canvas.setFont("Helvetica-Bold", 80)  # Larger font
-        canvas.setFillColor(colors.HexColor('#F3F4F6'))  # Very light gray
-        canvas.setFillAlpha(0.15)  # More subtle but visible
-        text = "Talent Hub"
-        text_width = canvas.stringWidth(text, "Helvetica-Bold", 80)
-        text_height = 80
-        # Center on page, rotated 45 degrees
-        canvas.translate(PAGE_WIDTH / 2, PAGE_HEIGHT / 2)
-        canvas.rotate(45)
-        canvas.drawString(-text_width / 2, -text_height / 2, text)
-        canvas.restoreState()
-    
-    def draw_page_number(canvas, doc):
-        """Draw page number in footer"""
-        canvas.saveState()
-        canvas.setFont("Helvetica", 9)
-        canvas.setFillColor(colors.HexColor('#666666'))
-        # Get page number from canvas
-        page_num = canvas.getPageNumber()
-        # Center bottom of page
-        text = f"Page {page_num}"
-        text_width = canvas.stringWidth(text, "Helvetica", 9)
-        canvas.drawString((PAGE_WIDTH - text_width) / 2, 10 * mm, text)
-        canvas.restoreState()
-    
-    doc = SimpleDocTemplate(
-        buffer,
+def create_doc_template(output, title: str = "") -> BaseDocTemplate:
+    """A4 document whose single frame is exactly the printable area (no frame padding)."""
+    doc = BaseDocTemplate(
+        output,
         pagesize=A4,
         leftMargin=MARGIN,
         rightMargin=MARGIN,
         topMargin=MARGIN,
-        bottomMargin=MARGIN,
-        onFirstPage=on_first_page,
-        onLaterPages=on_later_pages
+        bottomMargin=MARGIN_BOTTOM,
+        title=title,
     )
-    
-    # Build story (content)
+    frame = Frame(
+        MARGIN, MARGIN_BOTTOM, USABLE_WIDTH, USABLE_HEIGHT,
+        leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0, id="content"
+    )
+    doc.addPageTemplates([PageTemplate(id="paper", frames=[frame])])
+    return doc
+
+
+def build_story(config: PaperConfig, generated_blocks: List[GeneratedBlock],
+                with_answers: bool = False, answers_only: bool = False) -> list:
+    """Flowables for the whole paper, in the same order as generate_html."""
     story = []
-    
-    # Skip question generation if answers_only is True
+
     if not answers_only:
-        # Title
-        title_style = create_paragraph_style(
-            "title", FONT_BOLD, FONT_SIZE_TITLE, colors.black
-        )
-        story.append(Paragraph(config.title, title_style))
-        story.append(Spacer(1, SPACE_AFTER_TITLE))
-        
-        # Calculate total questions
         total_questions = sum(len(block.questions) for block in generated_blocks)
-        
-        # Student info section - two column layout
-        info_style = create_paragraph_style(
-            "info", FONT_NAME, FONT_SIZE_INSTRUCTIONS, COLOR_GRAY_800
-        )
-        # Left column: Name, Time Start
-        # Right column: Date, Time Stop, MM
-        info_table_data = [
-            [
-                Paragraph("Name: ", info_style),
-                Paragraph("Date: ", info_style)
-            ],
-            [
-                Paragraph("Time Start: ", info_style),
-                Paragraph("Time Stop: ", info_style)
-            ],
-            [
-                Paragraph("", info_style),  # Empty left cell
-                Paragraph(f"MM: {total_questions}", info_style)
-            ]
-        ]
-        info_table = Table(info_table_data, colWidths=[USABLE_WIDTH / 2, USABLE_WIDTH / 2])
-        info_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-            ('TOPPADDING', (0, 0), (-1, -1), 2 * mm),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 2 * mm),
-        ]))
-        story.append(info_table)
-        story.append(Spacer(1, 3 * mm))  # Reduced spacing
-        
-        # Process blocks
-        question_counter = 1
-        
-        for block_index, block in enumerate(generated_blocks):
-            # Collect all content for this block
-            block_content = []
-            
-            # Section title
-            if block.config.title:
-                section_style = create_paragraph_style(
-                    "section", FONT_BOLD, FONT_SIZE_SECTION, colors.black
-                )
-                block_content.append(Spacer(1, SPACE_BETWEEN_BLOCKS if block_index > 0 else 0))
-                block_content.append(Paragraph(block.config.title, section_style))
-                block_content.append(Spacer(1, SPACE_AFTER_SECTION))
-            
-            # Check if block has vertical questions
-            has_vertical = any(
-                getattr(q, 'isVertical', getattr(q, 'is_vertical', False))
-                for q in block.questions
-            ) if block.questions else False
-            
-            if has_vertical:
-                # Render vertical questions in 10-column tables (10 questions per table)
-                vertical_questions = [q for q in block.questions 
-                                     if getattr(q, 'isVertical', getattr(q, 'is_vertical', False))]
-                
-                # Process in chunks of 10
-                for chunk_start in range(0, len(vertical_questions), 10):
-                    chunk = vertical_questions[chunk_start:chunk_start + 10]
-                    # Create a temporary block with just this chunk
-                    chunk_block = GeneratedBlock(
-                        config=block.config,
-                        questions=chunk
-                    )
-                    vertical_table = render_vertical_questions_table(
-                        chunk_block, question_counter, with_answers
-                    )
-                    if vertical_table:
-                        block_content.append(vertical_table)
-                        question_counter += len(chunk)
-                        block_content.append(Spacer(1, GAP_BETWEEN_QUESTIONS))
-            else:
-                # Render horizontal questions in pairs (2 columns)
-                horizontal_questions = [q for q in block.questions 
-                                      if not getattr(q, 'isVertical', getattr(q, 'is_vertical', False))]
-                
-                # Process in pairs of 2
-                for pair_start in range(0, len(horizontal_questions), 2):
-                    if pair_start + 1 < len(horizontal_questions):
-                        # Two questions - render side by side
-                        q1 = horizontal_questions[pair_start]
-                        q2 = horizontal_questions[pair_start + 1]
-                        pair_table = render_horizontal_questions_pair(
-                            q1, question_counter,
-                            q2, question_counter + 1,
-                            with_answers
-                        )
-                        if pair_table:
-                            block_content.append(pair_table)
-                            block_content.append(Spacer(1, GAP_BETWEEN_QUESTIONS))
-                        question_counter += 2
-                    else:
-                        # Single question left - render alone (full width)
-                        q = horizontal_questions[pair_start]
-                        h_table = render_horizontal_question_table(q, question_counter, with_answers)
-                        if h_table:
-                            block_content.append(h_table)
-                            block_content.append(Spacer(1, GAP_BETWEEN_QUESTIONS))
-                        question_counter += 1
-            
-            # Wrap block content in KeepTogether to prevent splitting across pages
-            if block_content:
-                # Wrap all content in KeepTogether to prevent splitting
-                kept_block = KeepTogether(block_content)
-                story.append(kept_block)
-        
-        # Add ending line before answer key
+        story.append(Paragraph(escape(config.title), STYLE_TITLE))
+        story.append(Spacer(1, SPACE_AFTER_TITLE))
+        story.append(render_info_section(total_questions))
+        story.append(Spacer(1, SPACE_AFTER_INFO))
+
+        for block in generated_blocks:
+            story.extend(render_block(block, with_answers))
+
+        # Ending section
         story.append(Spacer(1, 5 * mm))
-        ending_style = create_paragraph_style(
-            "ending", FONT_BOLD, FONT_SIZE_SECTION, colors.black, alignment=TA_CENTER
-        )
-        story.append(HRFlowable(width="100%", thickness=1, color=colors.HexColor('#000000')))
+        story.append(HRFlowable(width="100%", thickness=1, color=COLOR_BLACK, spaceBefore=2 * mm, spaceAfter=2 * mm))
         story.append(Spacer(1, 2 * mm))
-        ending_text = Paragraph("ALL THE BEST", ending_style)
-        story.append(ending_text)
-    
+        story.append(Paragraph("ALL THE BEST!!!", STYLE_ENDING))
+
     # Answer key page (if requested)
     if with_answers or answers_only:
-        # If answers_only, we haven't added any content yet, so no need for PageBreak
         if not answers_only:
             story.append(PageBreak())
-        story.append(PageBreak())
-        
-        # Answer key title
-        answer_title_style = create_paragraph_style(
-            "answer_title", FONT_BOLD, FONT_SIZE_TITLE, colors.black
-        )
-        story.append(Paragraph(f"{config.title} - Answer Key", answer_title_style))
-        story.append(Spacer(1, SPACE_AFTER_TITLE))
-        
-        # List answers
-        answer_counter = 1
-        for block in generated_blocks:
-            if block.config.title:
-                section_style = create_paragraph_style(
-                    "section", FONT_BOLD, FONT_SIZE_SECTION, colors.black
-                )
-                story.append(Paragraph(block.config.title, section_style))
-                story.append(Spacer(1, SPACE_AFTER_SECTION))
-            
-            for q in block.questions:
-                if hasattr(q, 'answer') and q.answer is not None:
-                    answer_text = f"{answer_counter}. {format_number(q.answer)}"
-                    answer_style = create_paragraph_style(
-                        "answer_item", FONT_MONO, FONT_SIZE_ANSWER, COLOR_GRAY_600
-                    )
-                    story.append(Paragraph(answer_text, answer_style))
-                    story.append(Spacer(1, 1 * mm))  # Reduced spacing
-                    answer_counter += 1
-    
-    # Build PDF
-    doc.build(story)
+        story.append(Paragraph(f"{escape(config.title)} - Answer Key", STYLE_TITLE))
+        story.append(Spacer(1, SPACE_AFTER_TITLE + 4 * mm))
+        answer_key = render_answer_key(generated_blocks)
+        if answer_key:
+            story.append(answer_key)
+
+    return story
+
+
+def generate_pdf_v2(
+    config: PaperConfig,
+    generated_blocks: List[GeneratedBlock],
+    with_answers: bool = False,
+    answers_only: bool = False
+) -> BinaryIO:
+    """
+    Generate a PDF with the same layout as the Playwright engine, natively in ReportLab.
+
+    Args:
+        config: Paper configuration
+        generated_blocks: List of generated question blocks
+        with_answers: Whether to include answers in questions and an answer key
+        answers_only: Whether to generate only the answer key
+
+    Returns:
+        Spooled file object containing the PDF (positioned at the start)
+    """
+    buffer = new_pdf_spool()
+    doc = create_doc_template(buffer, config.title)
+    doc.build(build_story(config, generated_blocks, with_answers, answers_only), canvasmaker=NumberedCanvas)
     buffer.seek(0)
     return buffer
-
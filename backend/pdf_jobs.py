@@ -0,0 +1,241 @@
+"""
+Background PDF Job Queue
+Renders PDFs on a bounded pool of asyncio workers so the HTTP request that
+submits a paper returns immediately with a job ID.
+
+- Clients poll the job status or subscribe to server-sent events
+- Finished PDFs live in a local-disk result store (no external broker)
+- Results expire after a TTL and are removed by a cleanup task
+"""
+import asyncio
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+
+# ========== CONFIGURATION ==========
+PDF_JOB_WORKERS = int(os.getenv("PDF_JOB_WORKERS", "2"))
+PDF_JOB_MAX_PENDING = int(os.getenv("PDF_JOB_MAX_PENDING", "100"))
+PDF_JOB_TTL_SECONDS = int(os.getenv("PDF_JOB_TTL_SECONDS", "3600"))
+PDF_JOB_DIR = os.getenv("PDF_JOB_DIR", os.path.join(tempfile.gettempdir(), "abacus_pdf_jobs"))
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+TERMINAL_STATES = (JOB_DONE, JOB_FAILED)
+
+# Result files are named after the job ID; nothing else in PDF_JOB_DIR is ours
+RESULT_FILE_RE = re.compile(r"^[0-9a-f]{32}\.pdf(\.part)?$")
+
+
+class PdfJob:
+    """A single PDF render request and its current state."""
+    def __init__(self, render: Callable[[], Awaitable], filename: str):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = JOB_QUEUED
+        self.error: Optional[str] = None
+        self.path: Optional[str] = None
+        self.size = 0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._render = render
+        self._changed = asyncio.Event()
+
+    def set_status(self, status: str, error: Optional[str] = None):
+        """Move the job to a new state and wake up any SSE listeners."""
+        self.status = status
+        self.error = error
+        if status == JOB_RUNNING:
+            self.started_at = time.time()
+        elif status in TERMINAL_STATES:
+            self.finished_at = time.time()
+            self._render = None  # Drop the closure (config, blocks) once rendered
+        # Replace the event so each waiter sees exactly one change
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    @property
+    def changed_event(self) -> asyncio.Event:
+        """Event that fires on the next state change."""
+        return self._changed
+
+    def to_dict(self) -> dict:
+        """Serialize the job for status responses."""
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == JOB_DONE:
+            data["size"] = self.size
+            data["result_url"] = f"/api/papers/pdf-jobs/{self.id}/result"
+            data["expires_at"] = self.finished_at + PDF_JOB_TTL_SECONDS
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+class PdfJobQueue:
+    """Bounded worker pool with a local-disk result store and TTL cleanup."""
+    def __init__(self, workers: int = PDF_JOB_WORKERS, max_pending: int = PDF_JOB_MAX_PENDING,
+                 ttl_seconds: int = PDF_JOB_TTL_SECONDS, directory: str = PDF_JOB_DIR):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.ttl_seconds = ttl_seconds
+        self.directory = directory
+        self.jobs: Dict[str, PdfJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    async def start(self):
+        """Create the result store and spawn the worker and cleanup tasks."""
+        if self._tasks:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.remove_stale_results()
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        for worker_index in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(worker_index)))
+        self._tasks.append(asyncio.create_task(self._cleanup_loop()))
+        print(f"✅ [PDF_JOBS] Started {self.workers} workers, results in {self.directory}")
+
+    async def stop(self):
+        """Cancel workers and the cleanup task."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, render: Callable[[], Awaitable], filename: str) -> PdfJob:
+        """
+        Queue a render. `render` is an async callable returning a readable,
+        seekable file object containing the PDF.
+
+        Raises:
+            asyncio.QueueFull: if the pending queue is at capacity
+            RuntimeError: if the queue has not been started
+        """
+        if self._queue is None:
+            raise RuntimeError("PDF job queue is not running")
+        job = PdfJob(render, filename)
+        self._queue.put_nowait(job)
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[PdfJob]:
+        """Look up a job by ID (None if unknown or expired)."""
+        return self.jobs.get(job_id)
+
+    def pending(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize() if self._queue else 0
+
+    async def _worker(self, worker_index: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                job.set_status(JOB_RUNNING)
+                pdf_file = await job._render()
+                path = os.path.join(self.directory, f"{job.id}.pdf")
+                job.size = await asyncio.to_thread(write_pdf_file, pdf_file, path)
+                job.path = path
+                job.set_status(JOB_DONE)
+                print(f"✅ [PDF_JOBS] Job {job.id} done on worker {worker_index} ({job.size} bytes)")
+            except asyncio.CancelledError:
+                job.set_status(JOB_FAILED, "Server shutting down")
+                raise
+            except Exception as e:
+                import traceback
+                print(f"❌ [PDF_JOBS] Job {job.id} failed: {str(e)}")
+                print(traceback.format_exc())
+                job.set_status(JOB_FAILED, str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _cleanup_loop(self):
+        interval = max(1, min(60, self.ttl_seconds))
+        while True:
+            await asyncio.sleep(interval)
+            self.cleanup_expired()
+
+    def remove_stale_results(self) -> int:
+        """
+        Delete result files left by a previous process (unreachable, the job
+        table is in memory). Only files named like our results are touched, so
+        a PDF_JOB_DIR shared with other data is safe.
+        """
+        removed = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if RESULT_FILE_RE.match(name) and os.path.isfile(path):
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        if removed:
+            print(f"🧹 [PDF_JOBS] Removed {removed} stale results")
+        return removed
+
+    def cleanup_expired(self) -> int:
+        """Drop finished jobs older than the TTL and delete their files."""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job for job in self.jobs.values()
+            if job.status in TERMINAL_STATES and job.finished_at < cutoff
+        ]
+        for job in expired:
+            self.jobs.pop(job.id, None)
+            if job.path:
+                try:
+                    os.remove(job.path)
+                except FileNotFoundError:
+                    pass
+        if expired:
+            print(f"🧹 [PDF_JOBS] Removed {len(expired)} expired jobs")
+        return len(expired)
+
+
+def write_pdf_file(pdf_file, path: str) -> int:
+    """Copy a rendered PDF into the result store and release the source buffer."""
+    try:
+        pdf_file.seek(0)
+        tmp_path = path + ".part"
+        with open(tmp_path, "wb") as out:
+            shutil.copyfileobj(pdf_file, out)
+            size = out.tell()
+        os.replace(tmp_path, path)
+        return size
+    finally:
+        pdf_file.close()
+
+
+async def job_events(job: PdfJob, heartbeat_seconds: float = 15.0):
+    """Server-sent event stream of job status until the job finishes."""
+    while True:
+        # Grab the event before reporting so a change in between is not missed
+        changed = job.changed_event
+        yield f"event: status\ndata: {json.dumps(job.to_dict())}\n\n"
+        if job.status in TERMINAL_STATES:
+            return
+        while True:
+            try:
+                await asyncio.wait_for(changed.wait(), heartbeat_seconds)
+                break
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+
+
+pdf_job_queue = PdfJobQueue()
@@ -4,7 +4,8 @@ from reportlab.lib.units import mm
 from reportlab.lib import colors
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
-from typing import NamedTuple
+from functools import lru_cache
+from typing import NamedTuple, Tuple
 
 
 # ========== PAGE CONSTANTS ==========
@@ -118,3 +119,222 @@ def draw_page_header(canvas, title: str, level: str):
     
     return y - leading - SPACE_AFTER_TITLE
 
+
+
+# ========== PAGE PLANNER (pdf_generator_v2 / html_template layout) ==========
+class PageRange(NamedTuple):
+    """Questions placed on one page of a planned paper."""
+    page: int  # 1-based
+    section: str  # "questions" or "answer_key"
+    question_ranges: Tuple[Tuple[int, int], ...]  # Inclusive (first, last) question numbers
+
+
+class PaperPlan(NamedTuple):
+    """Result of plan_paper: page count plus what lands on each page."""
+    page_count: int
+    pages: Tuple[PageRange, ...]
+
+
+def _layout_v2():
+    # Imported lazily: pdf_generator_v2 registers fonts on import
+    import pdf_generator_v2
+    return pdf_generator_v2
+
+
+@lru_cache(maxsize=1024)
+def wrapped_line_count(text: str, font_name: str, font_size: float, max_width: float) -> int:
+    """Number of lines a Paragraph needs for `text` (greedy word wrap, like ReportLab)."""
+    words = text.split()
+    if not words:
+        return 1
+    space = pdfmetrics.stringWidth(" ", font_name, font_size)
+    lines = 1
+    line_width = 0.0
+    for word in words:
+        word_width = pdfmetrics.stringWidth(word, font_name, font_size)
+        if line_width and line_width + space + word_width > max_width:
+            lines += 1
+            line_width = word_width
+        else:
+            line_width += (space if line_width else 0) + word_width
+    return lines
+
+
+class _PageFiller:
+    """Minimal model of a ReportLab Frame: places boxes top-down and breaks pages."""
+    def __init__(self, frame_height: float, section: str):
+        self.frame_height = frame_height
+        self.pages = []
+        self.section = section
+        self._new_page()
+
+    def _new_page(self):
+        self.available = self.frame_height
+        self.at_top = True
+        self.pages.append((self.section, []))
+
+    def page_break(self, section: str = None):
+        if section:
+            self.section = section
+        self._new_page()
+
+    def _fits(self, height: float) -> bool:
+        return self.available > 0 and height <= self.available + 1e-6
+
+    def place(self, height: float, question_ids=(), space_before: float = 0, space_after: float = 0):
+        """Place an unsplittable box, moving to a new page if it does not fit."""
+        if not self.at_top:
+            height += space_before
+        if not self._fits(height):
+            self._new_page()
+            height -= space_before
+        self.available -= height + space_after
+        self.pages[-1][1].extend(question_ids)
+        if height:
+            self.at_top = False
+
+    def place_rows(self, rows):
+        """Place a table that may split between rows. rows: [(height, question_ids), ...]"""
+        index = 0
+        while index < len(rows):
+            remaining = sum(height for height, _ in rows[index:])
+            if self._fits(remaining):
+                for height, question_ids in rows[index:]:
+                    self.place(height, question_ids)
+                return
+            placed = 0
+            used = 0.0
+            for height, question_ids in rows[index:]:
+                if used + height > self.available + 1e-6:
+                    break
+                used += height
+                placed += 1
+            if placed == 0:
+                if self.at_top:
+                    raise ValueError("Table row is taller than a page")
+                self._new_page()
+                continue
+            for height, question_ids in rows[index:index + placed]:
+                self.place(height, question_ids)
+            index += placed
+            self._new_page()
+
+    def place_together(self, rows, space_after: float):
+        """KeepTogether([table, Spacer]): start a new page unless it fits or is already at the top."""
+        total = sum(height for height, _ in rows) + space_after
+        if total > self.available and not self.at_top:
+            self._new_page()
+        self.place_rows(rows)
+        self.place(space_after)
+
+
+def _merge_ranges(question_ids) -> Tuple[Tuple[int, int], ...]:
+    ranges = []
+    for number in sorted(set(question_ids)):
+        if ranges and number == ranges[-1][1] + 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return tuple((first, last) for first, last in ranges)
+
+
+def _block_rows(block, with_answers: bool) -> list:
+    """Rows of the padded block wrapper table as (height, question_ids)."""
+    v2 = _layout_v2()
+    from html_template import is_vertical_question, split_columns
+
+    content = []
+    if block.config.title:
+        title_lines = wrapped_line_count(block.config.title, v2.FONT_BOLD, v2.FONT_SIZE_SECTION, v2.BLOCK_WIDTH)
+        content.append((title_lines * v2.STYLE_SECTION.leading, ()))
+        content.append((v2.SPACE_AFTER_SECTION, ()))
+
+    questions = block.questions or []
+    if any(is_vertical_question(q) for q in questions):
+        serial_row = v2.FONT_SIZE_QUESTION_NUM * v2.LINE_HEIGHT_NORMAL + 2 * v2.VERTICAL_CELL_PADDING
+        operand_row = v2.FONT_SIZE_QUESTION_TEXT * v2.LINE_HEIGHT_TIGHT + 2 * v2.VERTICAL_CELL_PADDING
+        line_row = 1 + 2 * v2.VERTICAL_CELL_PADDING
+        answer_row = v2.ANSWER_CELL_HEIGHT
+        if with_answers:
+            answer_row = max(answer_row, 2 * v2.ANSWER_CELL_PADDING + v2.FONT_SIZE_ANSWER * v2.LINE_HEIGHT_NORMAL)
+        vertical = [q for q in questions if is_vertical_question(q)]
+        for start in range(0, len(vertical), v2.VERTICAL_COLUMNS):
+            chunk = vertical[start:start + v2.VERTICAL_COLUMNS]
+            max_operands = max(len(q.operands) for q in chunk)
+            table_height = serial_row + max_operands * operand_row + line_row + answer_row
+            content.append((table_height, tuple(q.id for q in chunk)))
+            content.append((v2.SPACE_AFTER_TABLE, ()))
+    else:
+        row_height = (max(v2.FONT_SIZE_QUESTION_NUM, v2.FONT_SIZE_QUESTION_TEXT, v2.FONT_SIZE_HORIZONTAL_ANSWER)
+                      * v2.LINE_HEIGHT_NORMAL + 2 * v2.HORIZONTAL_CELL_PADDING)
+        column1, column2 = split_columns([q for q in questions if not is_vertical_question(q)], 2)
+        for row_idx in range(max(len(column1), len(column2))):
+            pair = column1[row_idx:row_idx + 1] + column2[row_idx:row_idx + 1]
+            content.append((row_height, tuple(q.id for q in pair)))
+            content.append((v2.SPACE_AFTER_TABLE, ()))
+
+    if not content:
+        return []
+    # Block padding goes on the first and last wrapper rows
+    content[0] = (content[0][0] + v2.BLOCK_PADDING, content[0][1])
+    content[-1] = (content[-1][0] + v2.BLOCK_PADDING, content[-1][1])
+    return content
+
+
+def plan_paper(config, generated_blocks, with_answers: bool = False, answers_only: bool = False) -> PaperPlan:
+    """
+    Predict pagination of a paper without rendering it.
+
+    Mirrors the flowables built by pdf_generator_v2.build_story (which share
+    their layout with html_template), so the page count and the questions on
+    each page match the ReportLab engine. Costs a few stringWidth calls per
+    title plus simple arithmetic per row.
+    """
+    v2 = _layout_v2()
+    title_leading = v2.STYLE_TITLE.leading
+    filler = _PageFiller(v2.USABLE_HEIGHT, "answer_key" if answers_only else "questions")
+
+    if not answers_only:
+        total_questions = sum(len(block.questions) for block in generated_blocks)
+        title_lines = wrapped_line_count(config.title, v2.FONT_BOLD, v2.FONT_SIZE_TITLE, v2.USABLE_WIDTH)
+        filler.place(title_lines * title_leading)
+        filler.place(v2.SPACE_AFTER_TITLE)
+        info_row = v2.FONT_SIZE_INFO * v2.LINE_HEIGHT_NORMAL + v2.INFO_ITEM_SPACING
+        filler.place_rows([(info_row, ())] * 3)
+        filler.place(v2.SPACE_AFTER_INFO)
+        for block in generated_blocks:
+            rows = _block_rows(block, with_answers)
+            if rows:
+                filler.place_together(rows, v2.SPACE_BETWEEN_BLOCKS)
+        # Ending section: spacer, rule, spacer, "ALL THE BEST!!!"
+        filler.place(5 * mm)
+        filler.place(1, space_before=2 * mm, space_after=2 * mm)
+        filler.place(2 * mm)
+        filler.place(v2.STYLE_ENDING.leading)
+
+    if with_answers or answers_only:
+        if not answers_only:
+            filler.page_break("answer_key")
+        answer_key_title = f"{config.title} - Answer Key"
+        title_lines = wrapped_line_count(answer_key_title, v2.FONT_BOLD, v2.FONT_SIZE_TITLE, v2.USABLE_WIDTH)
+        filler.place(title_lines * title_leading)
+        filler.place(v2.SPACE_AFTER_TITLE + 4 * mm)
+        from html_template import split_columns
+        # Answer key entries are numbered 1..N over questions that have an answer
+        answered = sum(
+            1 for block in generated_blocks for q in block.questions
+            if getattr(q, 'answer', None) is not None
+        )
+        numbers = list(range(1, answered + 1))
+        columns = split_columns(numbers, 3)
+        row_height = v2.FONT_SIZE_ANSWER_KEY * v2.LINE_HEIGHT_NORMAL + v2.ANSWER_KEY_ITEM_SPACING
+        filler.place_rows([
+            (row_height, tuple(column[row_idx] for column in columns if row_idx < len(column)))
+            for row_idx in range(len(columns[0]) if numbers else 0)
+        ])
+
+    pages = tuple(
+        PageRange(page_index + 1, section, _merge_ranges(question_ids))
+        for page_index, (section, question_ids) in enumerate(filler.pages)
+    )
+    return PaperPlan(len(pages), pages)
@@ -0,0 +1,65 @@
+"""
+Spooled PDF Buffers and Streaming Responses
+Renderers write into a SpooledTemporaryFile: it stays in memory below
+PDF_SPOOL_MAX_MEMORY bytes and rolls over to a temp file on disk above it.
+Responses read the spool back in fixed-size chunks with a Content-Length
+header and close it as soon as the response has been sent.
+"""
+import os
+import tempfile
+from typing import BinaryIO, Iterator, Optional
+
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+
+# ========== CONFIGURATION ==========
+PDF_SPOOL_MAX_MEMORY = int(os.getenv("PDF_SPOOL_MAX_MEMORY", str(1024 * 1024)))  # 1 MB
+PDF_STREAM_CHUNK_SIZE = int(os.getenv("PDF_STREAM_CHUNK_SIZE", str(64 * 1024)))  # 64 KB
+
+
+def new_pdf_spool() -> BinaryIO:
+    """Writable buffer for a rendered PDF (memory-backed until it grows past the threshold)."""
+    return tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MAX_MEMORY, mode="w+b")
+
+
+def file_size(pdf_file: BinaryIO) -> int:
+    """Size of a seekable file object in bytes (leaves the position at the start)."""
+    pdf_file.seek(0, os.SEEK_END)
+    size = pdf_file.tell()
+    pdf_file.seek(0)
+    return size
+
+
+def iter_file_chunks(pdf_file: BinaryIO, chunk_size: int = PDF_STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the file in fixed-size chunks, closing it when exhausted or abandoned."""
+    try:
+        pdf_file.seek(0)
+        while True:
+            chunk = pdf_file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        pdf_file.close()
+
+
+def pdf_response(pdf_file: BinaryIO, filename: str, headers: Optional[dict] = None) -> StreamingResponse:
+    """
+    Stream a rendered PDF to the client.
+
+    The spool is closed (and any rolled-over temp file deleted) once the
+    response finishes, including when the client disconnects mid-download.
+    """
+    response_headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Content-Length": str(file_size(pdf_file)),
+    }
+    if headers:
+        response_headers.update(headers)
+    return StreamingResponse(
+        iter_file_chunks(pdf_file),
+        media_type="application/pdf",
+        headers=response_headers,
+        background=BackgroundTask(pdf_file.close),
+    )
@@ -240,3 +240,19 @@ def get_preset_blocks(level: str) -> list[BlockConfig]:
     """Get preset blocks for a given level."""
     return PRESETS.get(level, [])
 
+
+def get_level_display_name(level: str) -> str:
+    """Convert level code to display name."""
+    if level == "Custom":
+        return ""
+    if level.startswith("AB-"):
+        try:
+            level_num = int(level.split("-")[1])
+            if 1 <= level_num <= 6:
+                return f"Basic Level {level_num}"
+            elif 7 <= level_num <= 10:
+                return f"Advanced Level {level_num}"
+        except (ValueError, IndexError):
+            pass
+    # Fallback: return level as-is if format is unexpected
+    return level
@@ -0,0 +1,46 @@
+"""
+Content-addressed Question Payloads
+A paper attempt's config and generated questions are stored once per
+distinct payload in question_payloads, keyed by a hash of their content.
+Every student attempting the same paper references the same row.
+
+- Attempts keep only payload_hash; their inline columns hold {} / []
+- Attempts created before this (payload_hash NULL) still read inline data
+  until migrate_attempt_payloads.py moves them over
+"""
+import hashlib
+import json
+from typing import List, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import PaperAttempt, QuestionPayload
+
+
+def payload_hash(paper_config: dict, generated_blocks: List[dict]) -> str:
+    canonical = json.dumps(
+        {"paper_config": paper_config, "generated_blocks": generated_blocks},
+        sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def store_payload(db: Session, paper_config: dict, generated_blocks: List[dict]) -> str:
+    """Insert the payload unless it is already stored; returns its hash."""
+    key = payload_hash(paper_config, generated_blocks)
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    # ON CONFLICT DO NOTHING: two students starting the same paper at once both succeed
+    db.execute(insert(QuestionPayload).values(
+        hash=key, paper_config=paper_config, generated_blocks=generated_blocks
+    ).on_conflict_do_nothing(index_elements=["hash"]))
+    return key
+
+
+def attempt_payload(attempt: PaperAttempt) -> Tuple[dict, List[dict]]:
+    """(paper_config, generated_blocks) of an attempt, wherever they are stored."""
+    if attempt.payload_hash is not None:
+        return attempt.payload.paper_config, attempt.payload.generated_blocks
+    return attempt.paper_config, attempt.generated_blocks
@@ -0,0 +1,97 @@
+"""
+Ranked Board
+In-memory order-statistics structure for one leaderboard: students kept in
+a sorted list keyed by (-points, user_id), so top-K, rank-of-user and
+neighbors-of-user are O(log n) lookups (plus the entries returned).
+
+Ranks are competition ranks, the same as the RANK() rebuild: tied students
+share a rank and the next rank skips past them (1, 2, 2, 4).
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+
+class RankedBoard:
+    """One board's standings; not thread-safe, callers hold their own lock."""
+    def __init__(self, standings: Iterable[Tuple[int, int]] = ()):
+        self._points: Dict[int, int] = {}
+        self._order = SortedList()
+        self.load(standings)
+
+    def load(self, standings: Iterable[Tuple[int, int]]):
+        """Replace the board with (user_id, points) pairs."""
+        self._points = {user_id: int(points or 0) for user_id, points in standings}
+        self._order = SortedList((-points, user_id) for user_id, points in self._points.items())
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._points
+
+    def points(self, user_id: int) -> Optional[int]:
+        return self._points.get(user_id)
+
+    def set(self, user_id: int, points: int):
+        """Add a student or move them to new points."""
+        points = int(points or 0)
+        old_points = self._points.get(user_id)
+        if old_points == points:
+            return
+        if old_points is not None:
+            self._order.remove((-old_points, user_id))
+        self._points[user_id] = points
+        self._order.add((-points, user_id))
+
+    def remove(self, user_id: int) -> bool:
+        points = self._points.pop(user_id, None)
+        if points is None:
+            return False
+        self._order.remove((-points, user_id))
+        return True
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """One more than the number of students with more points."""
+        points = self._points.get(user_id)
+        if points is None:
+            return None
+        # (-points,) sorts before every (-points, user_id)
+        return self._order.bisect_left((-points,)) + 1
+
+    def position(self, user_id: int) -> Optional[int]:
+        """1-based place in board order (ties broken by user id)."""
+        points = self._points.get(user_id)
+        if points is None:
+            return None
+        return self._order.index((-points, user_id)) + 1
+
+    def _ranked(self, start: int, stop: int) -> List[Tuple[int, int, int]]:
+        """(user_id, points, rank) for the positions start..stop-1."""
+        entries = []
+        rank = None
+        previous = None
+        for position, (negative_points, user_id) in enumerate(self._order.islice(start, stop), start=start):
+            points = -negative_points
+            if rank is None:
+                rank = self._order.bisect_left((negative_points,)) + 1
+            elif points != previous:
+                rank = position + 1
+            entries.append((user_id, points, rank))
+            previous = points
+        return entries
+
+    def top(self, count: int) -> List[Tuple[int, int, int]]:
+        return self._ranked(0, count)
+
+    def around(self, user_id: int, count: int) -> List[Tuple[int, int, int]]:
+        """The student with up to count neighbors on each side, in board order."""
+        points = self._points.get(user_id)
+        if points is None:
+            return []
+        position = self._order.index((-points, user_id))
+        return self._ranked(max(0, position - count), position + count + 1)
+
+    def standings(self) -> List[Tuple[int, int, int]]:
+        """Every (user_id, points, rank) in board order."""
+        return self._ranked(0, len(self._order))
@@ -0,0 +1,70 @@
+"""
+Saved Paper Questions
+Saved papers keep their generated questions next to the config, so downloads,
+previews and attempts read them instead of regenerating every block.
+
+- Questions are stored compactly: one list of question dicts per config block
+  (the block configs are already in Paper.config, so they are not repeated)
+- The seed is the md5 of the config, as downloads always used, so papers
+  materialized later get the same questions their links produced before
+"""
+import hashlib
+import json
+from typing import List, Optional, Tuple
+
+from schemas import PaperConfig, GeneratedBlock
+from math_generator import generate_block
+
+
+def default_paper_seed(config: dict) -> int:
+    """Deterministic seed for a saved paper config."""
+    config_json = json.dumps(config, sort_keys=True)
+    config_hash = int(hashlib.md5(config_json.encode()).hexdigest(), 16)
+    return abs(config_hash) % (2**31)
+
+
+def generate_paper_blocks(config: PaperConfig, seed: int) -> List[GeneratedBlock]:
+    question_id_counter = 1
+    generated_blocks = []
+    for block_config in config.blocks:
+        generated_blocks.append(generate_block(block_config, question_id_counter, seed))
+        question_id_counter += block_config.count
+    return generated_blocks
+
+
+def encode_questions(generated_blocks: List[GeneratedBlock]) -> List[List[dict]]:
+    """Compact JSON form stored in Paper.questions."""
+    return [
+        [question.model_dump(mode="json", exclude_none=True) for question in block.questions]
+        for block in generated_blocks
+    ]
+
+
+def decode_questions(config: PaperConfig, questions: List[List[dict]]) -> List[GeneratedBlock]:
+    """Rebuild generated blocks from Paper.questions and the paper's block configs."""
+    return [
+        GeneratedBlock(config=block_config, questions=block_questions)
+        for block_config, block_questions in zip(config.blocks, questions)
+    ]
+
+
+def materialize_paper(config: dict, seed: Optional[int] = None) -> Tuple[int, List[List[dict]]]:
+    """Seed and encoded questions to persist with a saved paper."""
+    if seed is None:
+        seed = default_paper_seed(config)
+    return seed, encode_questions(generate_paper_blocks(PaperConfig(**config), seed))
+
+
+def load_paper(paper, seed: Optional[int] = None) -> Tuple[PaperConfig, List[GeneratedBlock]]:
+    """
+    Config and generated blocks for a saved paper.
+    Uses the materialized questions unless a different seed is asked for
+    (or the paper predates materialization).
+    """
+    config = PaperConfig(**paper.config)
+    materialized = paper.questions is not None and len(paper.questions) == len(config.blocks)
+    if materialized and (seed is None or seed == paper.seed):
+        return config, decode_questions(config, paper.questions)
+    if seed is None:
+        seed = paper.seed if paper.seed is not None else default_paper_seed(paper.config)
+    return config, generate_paper_blocks(config, seed)
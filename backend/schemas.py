@@ -1,5 +1,6 @@
 """Pydantic schemas for request/response validation."""
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, AliasChoices, model_validator
+from pydantic_core import PydanticCustomError
 from typing import Optional, List, Literal
 from datetime import datetime
 
@@ -149,9 +150,53 @@ class PaperResponse(BaseModel):
     createdAt: datetime = Field(alias="created_at")
 
 
+class PaperListItem(BaseModel):
+    """Paper summary for listings (no config)."""
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    
+    id: int
+    title: str
+    level: str
+    blockCount: Optional[int] = Field(default=None, alias="block_count")
+    createdAt: datetime = Field(alias="created_at")
+
+
+class PaperListResponse(BaseModel):
+    """One page of papers, newest first."""
+    items: List[PaperListItem]
+    nextCursor: Optional[str] = None  # Pass back as ?cursor= for the next page
+
+
 class PreviewResponse(BaseModel):
     """Response schema for preview."""
     model_config = ConfigDict(populate_by_name=True)
     
     blocks: List[GeneratedBlock]
     seed: int
+
+
+class BulkPaperItem(BaseModel):
+    """One paper of a bulk PDF: a saved paper, or a generate-pdf body (config, seed, generatedBlocks)."""
+    model_config = ConfigDict(extra="allow")
+    
+    paper_id: Optional[int] = None
+    config: Optional[PaperConfig] = None
+    with_answers: Optional[bool] = Field(default=None, validation_alias=AliasChoices("with_answers", "withAnswers"))
+    answers_only: Optional[bool] = Field(default=None, validation_alias=AliasChoices("answers_only", "answersOnly"))
+    
+    @model_validator(mode="after")
+    def check_source(self):
+        if self.paper_id is None and self.config is None:
+            # (not ValueError: its ctx would hold the exception, which the 422 handler can't serialize)
+            raise PydanticCustomError("paper_source", "Each paper needs a paper_id or a config")
+        return self
+
+
+class BulkPdfRequest(BaseModel):
+    """Request schema for /api/papers/bulk-pdf."""
+    papers: List[BulkPaperItem] = []
+    with_answers: bool = Field(default=False, validation_alias=AliasChoices("with_answers", "withAnswers"))
+    answers_only: bool = Field(default=False, validation_alias=AliasChoices("answers_only", "answersOnly"))
+    bookmarks: bool = True  # One outline entry per paper
+    engine: Optional[str] = None
+    title: Optional[str] = None  # Filename of the merged PDF
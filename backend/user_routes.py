@@ -1,5 +1,6 @@
 """API routes for user authentication, progress tracking, and dashboards."""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query, Path
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 from typing import List
@@ -10,7 +11,8 @@ from auth import get_current_user, get_current_admin, verify_google_token, creat
 from user_schemas import (
     LoginRequest, LoginResponse, UserResponse, PracticeSessionCreate,
     PracticeSessionResponse, StudentStats, LeaderboardEntry, AdminStats,
-    PracticeSessionDetailResponse, AttemptResponse
+    PracticeSessionDetailResponse, AttemptResponse, MyLeaderboardResponse,
+    WeeklyLeaderboardHistory, RankHistoryEntry, SegmentLeaderboardEntry, SegmentStanding
 )
 from pydantic import BaseModel
 from typing import Optional
@@ -20,15 +22,26 @@ class UpdateDisplayNameRequest(BaseModel):
 
 from gamification import calculate_points, check_and_award_badges, update_streak, check_and_award_super_rewards
 from leaderboard_service import (
-    update_leaderboard, update_weekly_leaderboard,
-    get_overall_leaderboard, get_weekly_leaderboard
+    update_user_ranking, remove_from_rankings, reconcile_leaderboards, add_weekly_points,
+    get_overall_leaderboard, get_weekly_leaderboard, get_user_standing
+)
+from leaderboard_cache import leaderboard_cache
+from leaderboard_stream import leaderboard_stream
+from answer_autosave import answer_autosave
+from leaderboard_history import get_week_top, get_rank_history
+from leaderboard_segments import (
+    segment_key, earned_segments, add_segment_points, list_segments, segment_boards,
+    get_segment_leaderboard, get_segment_standing
 )
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
+# Handlers are plain `def`: FastAPI runs them in its threadpool, so the sync
+# SQLAlchemy queries (and the Google token check) don't block the event loop.
+
 
 @router.post("/login", response_model=LoginResponse)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     """Login with Google OAuth token."""
     try:
         print(f"Login attempt received, token length: {len(login_data.token) if login_data.token else 0}")
@@ -104,13 +117,13 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+def get_me(current_user: User = Depends(get_current_user)):
     """Get current user info."""
     return UserResponse.model_validate(current_user)
 
 
 @router.put("/me/display-name", response_model=UserResponse)
-async def update_display_name(
+def update_display_name(
     request: UpdateDisplayNameRequest,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -123,7 +136,7 @@ async def update_display_name(
 
 
 @router.post("/practice-session", response_model=PracticeSessionResponse)
-async def save_practice_session(
+def save_practice_session(
     session_data: PracticeSessionCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -169,8 +182,12 @@ async def save_practice_session(
         )
         db.add(attempt)
     
-    # Update user points and streak
+    # Update user points (and this week's bucket) and streak
     current_user.total_points += points_earned
+    add_weekly_points(db, current_user.id, points_earned)
+    segment_totals = add_segment_points(
+        db, current_user.id, earned_segments("operation", session_data.operation_type), points_earned
+    )
     update_streak(db, current_user, questions_practiced_today=session_data.total_questions)
     
     # Check for badges
@@ -182,15 +199,15 @@ async def save_practice_session(
     db.commit()
     db.refresh(session)
     
-    # Update leaderboards
-    update_leaderboard(db)
-    update_weekly_leaderboard(db)
+    # Move this student on both leaderboards and their segments
+    update_user_ranking(db, current_user, weekly_points_delta=points_earned)
+    segment_boards.update(current_user, segment_totals)
     
     return PracticeSessionResponse.model_validate(session)
 
 
 @router.get("/stats", response_model=StudentStats)
-async def get_student_stats(
+def get_student_stats(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -230,7 +247,7 @@ async def get_student_stats(
 
 
 @router.get("/practice-session/{session_id}", response_model=PracticeSessionDetailResponse)
-async def get_practice_session_detail(
+def get_practice_session_detail(
     session_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -266,23 +283,120 @@ async def get_practice_session_detail(
     )
 
 
+def cached_leaderboard_response(request: Request, board: str, get_entries, db: Session) -> Response:
+    """Serve a board from leaderboard_cache, with a 304 when the client's ETag is current."""
+    cached = leaderboard_cache.get(board)
+    if cached is None:
+        generation = leaderboard_cache.generation(board)
+        entries = [LeaderboardEntry(**entry).model_dump() for entry in get_entries(db, leaderboard_cache.size)]
+        cached = leaderboard_cache.put(board, entries, generation)
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}  # Always revalidate, usually a 304
+    if cached.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+
 @router.get("/leaderboard/overall", response_model=List[LeaderboardEntry])
-async def get_overall_leaderboard_endpoint(db: Session = Depends(get_db)):
+def get_overall_leaderboard_endpoint(request: Request, db: Session = Depends(get_db)):
     """Get overall leaderboard."""
-    entries = get_overall_leaderboard(db)
-    return [LeaderboardEntry(**entry) for entry in entries]
+    return cached_leaderboard_response(request, "overall", get_overall_leaderboard, db)
 
 
 @router.get("/leaderboard/weekly", response_model=List[LeaderboardEntry])
-async def get_weekly_leaderboard_endpoint(db: Session = Depends(get_db)):
+def get_weekly_leaderboard_endpoint(request: Request, db: Session = Depends(get_db)):
     """Get weekly leaderboard."""
-    entries = get_weekly_leaderboard(db)
-    return [LeaderboardEntry(**entry) for entry in entries]
+    return cached_leaderboard_response(request, "weekly", get_weekly_leaderboard, db)
+
+
+@router.get("/leaderboard/stream")
+async def stream_leaderboard_updates():
+    """
+    Server-sent events with the boards' rank deltas (see leaderboard_stream),
+    so dashboards can stop polling /leaderboard/overall and /leaderboard/weekly.
+    """
+    client = leaderboard_stream.subscribe()
+    if client is None:
+        raise HTTPException(status_code=503, detail="Too many live leaderboard connections",
+                            headers={"Retry-After": "30"})
+    return StreamingResponse(
+        leaderboard_stream.events(client),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # No proxy buffering
+    )
+
+
+@router.get("/leaderboard/me", response_model=MyLeaderboardResponse)
+def get_my_leaderboard_standing(
+    window: int = Query(5, ge=0, le=50, description="Neighbors on each side"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Current user's overall and weekly rank with the students around them."""
+    return MyLeaderboardResponse(**get_user_standing(db, current_user.id, window))
+
+
+@router.get("/leaderboard/segments")
+def get_leaderboard_segments(db: Session = Depends(get_db)):
+    """Segments that have a leaderboard, per kind (operation, level, group)."""
+    return list_segments(db)
+
+
+def segment_or_400(kind: str, value: str) -> str:
+    try:
+        return segment_key(kind, value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/leaderboard/segments/{kind}/{value}", response_model=List[SegmentLeaderboardEntry])
+def get_segment_leaderboard_endpoint(
+    kind: str,
+    value: str,
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """Leaderboard of one operation type, paper level or class/group."""
+    return [SegmentLeaderboardEntry(**entry) for entry in get_segment_leaderboard(db, segment_or_400(kind, value), limit)]
+
+
+@router.get("/leaderboard/segments/{kind}/{value}/me", response_model=SegmentStanding)
+def get_my_segment_standing(
+    kind: str,
+    value: str,
+    window: int = Query(5, ge=0, le=50, description="Neighbors on each side"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Current user's rank in a segment with the students around them."""
+    return SegmentStanding(**get_segment_standing(db, segment_or_400(kind, value), current_user.id, window))
+
+
+@router.get("/leaderboard/history/weeks/{iso_week}", response_model=WeeklyLeaderboardHistory)
+def get_weekly_leaderboard_history(
+    iso_week: str = Path(..., pattern=r"^\d{4}-W\d{2}$", description="e.g. 2026-W07"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """Final weekly leaderboard of a finished week."""
+    history = get_week_top(db, iso_week, limit)
+    if history is None:
+        raise HTTPException(status_code=404, detail="No leaderboard archived for this week")
+    return WeeklyLeaderboardHistory(**history)
+
+
+@router.get("/leaderboard/history/me", response_model=List[RankHistoryEntry])
+def get_my_rank_history(
+    weeks: int = Query(12, ge=1, le=104),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Current user's weekly rank over the latest finished weeks, newest first."""
+    return [RankHistoryEntry(**entry) for entry in get_rank_history(db, current_user.id, weeks)]
 
 
 # Admin routes
 @router.get("/admin/stats", response_model=AdminStats)
-async def get_admin_stats(
+def get_admin_stats(
     admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
@@ -319,7 +433,7 @@ async def get_admin_stats(
 
 
 @router.get("/admin/students", response_model=List[UserResponse])
-async def get_all_students(
+def get_all_students(
     admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
@@ -331,7 +445,7 @@ async def get_all_students(
 
 
 @router.get("/admin/students/{student_id}/stats", response_model=StudentStats)
-async def get_student_stats_admin(
+def get_student_stats_admin(
     student_id: int,
     admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
@@ -381,6 +495,10 @@ class UpdatePointsRequest(BaseModel):
     points: int
 
 
+class UpdateGroupRequest(BaseModel):
+    class_group: Optional[str] = None  # None or empty removes the student from their group
+
+
 class DatabaseStatsResponse(BaseModel):
     total_users: int
     total_students: int
@@ -393,7 +511,7 @@ class DatabaseStatsResponse(BaseModel):
 
 
 @router.delete("/admin/students/{student_id}")
-async def delete_student(
+def delete_student(
     student_id: int,
     admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
@@ -408,24 +526,27 @@ async def delete_student(
         raise HTTPException(status_code=404, detail="Student not found")
     
     # Delete associated data (cascade should handle most, but we'll be explicit)
-    # Delete leaderboard entry
+    # Close the student's gap in the rankings, then delete the leaderboard entry
+    remove_from_rankings(db, student_id)
+    segment_boards.remove_user(student_id)
     leaderboard = db.query(Leaderboard).filter(Leaderboard.user_id == student_id).first()
     if leaderboard:
         db.delete(leaderboard)
     
+    # Stop autosaving their attempts so no buffered answer outlives them
+    answer_autosave.drop(attempt_id for (attempt_id,) in db.query(PaperAttempt.id).filter(
+        PaperAttempt.user_id == student_id
+    ))
+    
     # Delete user (cascade will handle sessions, attempts, rewards, paper_attempts)
     db.delete(student)
     db.commit()
     
-    # Refresh leaderboard after deletion
-    update_leaderboard(db)
-    update_weekly_leaderboard(db)
-    
     return {"message": f"Student {student.name} deleted successfully"}
 
 
 @router.put("/admin/students/{student_id}/points")
-async def update_student_points(
+def update_student_points(
     student_id: int,
     request: UpdatePointsRequest,
     admin: User = Depends(get_current_admin),
@@ -444,14 +565,9 @@ async def update_student_points(
     student.total_points = max(0, request.points)  # Ensure non-negative
     db.commit()
     
-    # Update leaderboard entry
-    leaderboard = db.query(Leaderboard).filter(Leaderboard.user_id == student_id).first()
-    if leaderboard:
-        leaderboard.total_points = student.total_points
-        db.commit()
-    
-    # Refresh leaderboard rankings
-    update_leaderboard(db)
+    # Update leaderboard entry and ranking (and their group's board)
+    update_user_ranking(db, student)
+    segment_boards.update(student, {})
     
     return {
         "message": f"Points updated for {student.name}",
@@ -461,18 +577,55 @@ async def update_student_points(
 
 
 @router.post("/admin/leaderboard/refresh")
-async def refresh_leaderboard(
+def refresh_leaderboard(
+    admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Manually refresh both overall and weekly leaderboards (full reconciliation)."""
+    drift = reconcile_leaderboards(db)
+    return {"message": "Leaderboard refreshed successfully", "corrected": drift}
+
+
+@router.put("/admin/students/{student_id}/group", response_model=UserResponse)
+def update_student_group(
+    student_id: int,
+    request: UpdateGroupRequest,
     admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Manually refresh both overall and weekly leaderboards."""
-    update_leaderboard(db)
-    update_weekly_leaderboard(db)
-    return {"message": "Leaderboard refreshed successfully"}
+    """Assign a student to a class/group (for group leaderboards)."""
+    student = db.query(User).filter(
+        User.id == student_id,
+        User.role == "student"
+    ).first()
+    
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+    
+    if student.class_group:
+        segment_boards.remove_user(student.id, segment_key("group", student.class_group))
+    student.class_group = (request.class_group or "").strip() or None
+    db.commit()
+    segment_boards.update(student, {})
+    
+    return UserResponse.model_validate(student)
+
+
+@router.get("/admin/students/{student_id}/rank-history", response_model=List[RankHistoryEntry])
+def get_student_rank_history(
+    student_id: int,
+    weeks: int = Query(12, ge=1, le=104),
+    admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """A student's weekly rank over the latest finished weeks, newest first (admin view)."""
+    if not db.query(User.id).filter(User.id == student_id, User.role == "student").first():
+        raise HTTPException(status_code=404, detail="Student not found")
+    return [RankHistoryEntry(**entry) for entry in get_rank_history(db, student_id, weeks)]
 
 
 @router.get("/admin/database/stats", response_model=DatabaseStatsResponse)
-async def get_database_stats(
+def get_database_stats(
     admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
@@ -510,7 +663,7 @@ async def get_database_stats(
 
 
 @router.post("/admin/promote-self")
-async def promote_self_to_admin(
+def promote_self_to_admin(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
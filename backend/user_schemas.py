@@ -22,6 +22,7 @@ class UserResponse(UserBase):
     total_points: int
     current_streak: int
     longest_streak: int
+    class_group: Optional[str] = None
     created_at: datetime
     
     model_config = {"from_attributes": True}
@@ -106,6 +107,50 @@ class LeaderboardEntry(BaseModel):
     weekly_points: int
 
 
+class LeaderboardStanding(BaseModel):
+    rank: Optional[int]  # None when not placed on the board
+    entries: List[LeaderboardEntry]  # The user and their neighbors, in board order
+
+
+class MyLeaderboardResponse(BaseModel):
+    overall: LeaderboardStanding
+    weekly: LeaderboardStanding
+
+
+class HistoricalLeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    name: Optional[str]  # None once the account is deleted
+    avatar_url: Optional[str]
+    points: int
+
+
+class WeeklyLeaderboardHistory(BaseModel):
+    iso_week: str
+    total_students: int
+    entries: List[HistoricalLeaderboardEntry]
+
+
+class RankHistoryEntry(BaseModel):
+    iso_week: str
+    rank: Optional[int]  # None when the user earned nothing that week
+    points: int
+    total_students: int
+
+
+class SegmentLeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    name: str
+    avatar_url: Optional[str]
+    points: int  # Points within the segment
+
+
+class SegmentStanding(BaseModel):
+    rank: Optional[int]  # None when not on the segment's board
+    entries: List[SegmentLeaderboardEntry]
+
+
 class AdminStats(BaseModel):
     total_students: int
     total_sessions: int
@@ -119,8 +164,9 @@ class PaperAttemptCreate(BaseModel):
     paper_title: str
     paper_level: str
     paper_config: dict
-    generated_blocks: List[dict]
-    seed: int
+    paper_id: Optional[int] = None  # Saved paper: questions and seed come from the paper
+    generated_blocks: Optional[List[dict]] = None
+    seed: Optional[int] = None
     answers: Optional[dict] = None  # {question_id: answer}
     time_taken: Optional[float] = None
 
@@ -149,6 +195,10 @@ class PaperAttemptDetailResponse(PaperAttemptResponse):
     answers: Optional[dict]
 
 
+class PaperAttemptAnswersPatch(BaseModel):
+    answers: dict  # Only the answers that changed: {question_id: answer or null to clear}
+
+
 class PaperAttemptSubmit(BaseModel):
     answers: dict
     time_taken: float
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Event loop blocking benchmark.
+
+Measures /api/health latency while slow database work runs concurrently:
+
+- blocking:   the leaderboard refresh as it used to be served, an `async def`
+              handler calling the sync SQLAlchemy code on the event loop
+- threadpool: the real POST /api/users/admin/leaderboard/refresh, now a plain
+              `def` handler that FastAPI runs in its threadpool
+
+Runs in-process against a temporary SQLite database seeded with students.
+
+Examples:
+    python bench_event_loop.py
+    python bench_event_loop.py --students 5000 --load 4 --duration 10 --output loop.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+# Must be set before models creates its engine
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench_event_loop_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("PDF_CATALOG_ENABLED", "false")
+
+import httpx
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+import main
+from auth import get_current_admin
+from models import User, SessionLocal, get_db, init_db
+from leaderboard_service import update_leaderboard, update_weekly_leaderboard
+
+BLOCKING_PATH = "/bench/blocking-leaderboard-refresh"
+THREADPOOL_PATH = "/api/users/admin/leaderboard/refresh"
+
+
+@main.app.post(BLOCKING_PATH)
+async def blocking_leaderboard_refresh(db: Session = Depends(get_db)):
+    """The refresh handler as it was before: sync queries inside `async def`."""
+    update_leaderboard(db)
+    update_weekly_leaderboard(db)
+    return {"message": "Leaderboards refreshed successfully"}
+
+
+def seed_students(count: int):
+    init_db()
+    db = SessionLocal()
+    try:
+        existing = db.query(User).count()
+        db.add_all([
+            User(google_id=f"bench-{index}", email=f"bench-{index}@example.com", name=f"Student {index}",
+                 role="student", total_points=(index * 7919) % 10000)
+            for index in range(existing, count)
+        ])
+        admin = User(google_id="bench-admin", email="bench-admin@example.com", name="Admin", role="admin")
+        db.add(admin)
+        db.commit()
+        db.refresh(admin)
+        db.expunge(admin)
+        return admin
+    finally:
+        db.close()
+
+
+async def run_mode(client: httpx.AsyncClient, path: str, load: int, duration: float, probe_interval: float):
+    """Keep `load` refresh requests in flight and probe /api/health until `duration` passes."""
+    deadline = time.perf_counter() + duration
+    refreshes = []
+
+    async def load_worker():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.post(path)
+            response.raise_for_status()
+            refreshes.append((time.perf_counter() - started) * 1000)
+
+    async def probe():
+        # Latency is measured from when each probe was due, so time the loop
+        # spent blocked before the probe could even start is counted too
+        latencies = []
+        due = time.perf_counter()
+        while due < deadline:
+            await asyncio.sleep(max(0, due - time.perf_counter()))
+            response = await client.get("/api/health")
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - due) * 1000)
+            due += probe_interval
+        return latencies
+
+    workers = [asyncio.create_task(load_worker()) for _ in range(load)]
+    latencies = await probe()
+    await asyncio.gather(*workers)
+    return latencies, refreshes
+
+
+def summarize(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    return {
+        "count": len(values),
+        "p50_ms": round(values[len(values) // 2], 2),
+        "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+        "p99_ms": round(values[min(len(values) - 1, int(len(values) * 0.99))], 2),
+        "max_ms": round(values[-1], 2),
+        "mean_ms": round(statistics.mean(values), 2),
+    }
+
+
+async def run(args):
+    admin = seed_students(args.students)
+    main.app.dependency_overrides[get_current_admin] = lambda: admin
+    transport = httpx.ASGITransport(app=main.app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        idle, _ = await run_mode(client, THREADPOOL_PATH, 0, min(args.duration, 2), args.probe_interval)
+        results["idle"] = {"health": summarize(idle)}
+        for mode, path in (("blocking", BLOCKING_PATH), ("threadpool", THREADPOOL_PATH)):
+            latencies, refreshes = await run_mode(client, path, args.load, args.duration, args.probe_interval)
+            results[mode] = {"health": summarize(latencies), "refresh": summarize(refreshes)}
+            print(f"{mode}: health p50 {results[mode]['health']['p50_ms']} ms, "
+                  f"p99 {results[mode]['health']['p99_ms']} ms, max {results[mode]['health']['max_ms']} ms; "
+                  f"{len(refreshes)} refreshes", file=sys.stderr)
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark event loop blocking by sync database handlers")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--load", type=int, default=2, help="Concurrent refresh requests")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds per mode")
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="Seconds between health probes")
+    parser.add_argument("--output", default=None, help="Write JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    output = json.dumps({"args": vars(args), "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"✅ Wrote results to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main_cli()
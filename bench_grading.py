@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Paper attempt grading micro-benchmark.
+
+Compares the old submit-time loop (walk generated_blocks, probe answers by
+str and int id, float-compare per question) with answer key grading, on
+both the numpy and pure Python paths.
+
+Examples:
+    python bench_grading.py
+    python bench_grading.py --questions 100,2000 --answered 0.5 --output grading.json
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import os
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import answer_key
+from answer_key import build_answer_key, grade_answers
+
+
+def legacy_grade(generated_blocks, answers):
+    """submit_paper_attempt grading before answer keys."""
+    correct_count = 0
+    wrong_count = 0
+    all_questions = []
+    for block in generated_blocks:
+        for question in block.get("questions", []):
+            all_questions.append(question)
+    for question in all_questions:
+        try:
+            question_id = question.get("id")
+            user_answer = answers.get(str(question_id)) or answers.get(question_id)
+            correct_answer = question.get("answer")
+            if user_answer is not None and correct_answer is not None:
+                try:
+                    if abs(float(user_answer) - float(correct_answer)) < 0.01:
+                        correct_count += 1
+                    else:
+                        wrong_count += 1
+                except (ValueError, TypeError):
+                    wrong_count += 1
+        except Exception:
+            continue
+    return correct_count, wrong_count
+
+
+def build_paper(questions: int, answered: float, seed: int = 1):
+    """Stored generated_blocks JSON (blocks of up to 200) and a submitted answer map."""
+    rng = random.Random(seed)
+    generated_blocks = []
+    for start in range(1, questions + 1, 200):
+        generated_blocks.append({
+            "config": {"id": f"b{start}", "type": "add_sub", "count": min(200, questions - start + 1)},
+            "questions": [
+                {"id": question_id, "text": "", "operands": [rng.randint(10, 99) for _ in range(5)],
+                 "operator": "+", "answer": float(rng.randint(1, 400)), "isVertical": True}
+                for question_id in range(start, min(start + 200, questions + 1))
+            ],
+        })
+    answers = {}
+    for block in generated_blocks:
+        for question in block["questions"]:
+            if rng.random() < answered:
+                # Frontend sends numbers keyed by string ids; ~70% correct
+                answers[str(question["id"])] = question["answer"] if rng.random() < 0.7 else question["answer"] + 1
+    # Round-trip through JSON like the database column does (answers avoid 0,
+    # which the legacy loop skipped as falsy)
+    return json.loads(json.dumps(generated_blocks)), json.loads(json.dumps(answers))
+
+
+def time_it(function, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return {
+        "mean_us": round(statistics.mean(samples), 1),
+        "p50_us": round(samples[len(samples) // 2], 1),
+        "p95_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark paper attempt grading")
+    parser.add_argument("--questions", default="50,500,2000")
+    parser.add_argument("--answered", type=float, default=0.9, help="Fraction of questions answered")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", default=None, help="Write JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    numpy_module = answer_key.np
+    results = []
+    for questions in [int(value) for value in args.questions.split(",") if value.strip()]:
+        generated_blocks, answers = build_paper(questions, args.answered)
+        key = json.loads(json.dumps(build_answer_key(generated_blocks)))
+        expected = legacy_grade(generated_blocks, answers)
+        assert grade_answers(key, answers) == expected
+
+        result = {
+            "questions": questions,
+            "answered": len(answers),
+            "stored_bytes": {
+                "generated_blocks": len(json.dumps(generated_blocks)),
+                "answer_key": len(json.dumps(key)),
+            },
+            "build_answer_key": time_it(lambda: build_answer_key(generated_blocks), args.repeat),
+            "legacy": time_it(lambda: legacy_grade(generated_blocks, answers), args.repeat),
+        }
+        answer_key.np = None
+        result["answer_key_python"] = time_it(lambda: grade_answers(key, answers), args.repeat)
+        answer_key.np = numpy_module
+        if numpy_module is not None:
+            result["answer_key_numpy"] = time_it(lambda: grade_answers(key, answers), args.repeat)
+        results.append(result)
+
+        fastest = min(value["p50_us"] for name, value in result.items() if name.startswith("answer_key_"))
+        print(f"q={questions}: legacy p50 {result['legacy']['p50_us']} us, "
+              f"answer key p50 {fastest} us", file=sys.stderr)
+
+    output = json.dumps({"numpy": numpy_module is not None, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"✅ Wrote {len(results)} results to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
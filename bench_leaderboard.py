@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Leaderboard read/update benchmark.
+
+Compares the database path (leaderboard table queries, SQL incremental
+rank updates) with the in-memory RankedBoards for:
+
+- top:       GET /leaderboard/overall, top 100 with names
+- rank:      one student's current rank
+- neighbors: the students ranked around one student (GET /leaderboard/me)
+- update:    moving one student after a points change
+
+Runs against a temporary SQLite database seeded with students.
+
+Examples:
+    python bench_leaderboard.py
+    python bench_leaderboard.py --students 1000,20000 --repeat 300 --output leaderboard.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from sqlalchemy import create_engine, desc, func
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, User, Leaderboard
+import leaderboard_service
+from leaderboard_service import (
+    LiveLeaderboards, update_leaderboard, update_user_ranking, get_overall_leaderboard, _standing_from_table,
+    OVERALL
+)
+
+
+def seed(count: int):
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_leaderboard_"), "bench.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    db = session_factory()
+    db.execute(User.__table__.insert(), [
+        {"google_id": f"bench-{index}", "email": f"bench-{index}@example.com", "name": f"Student {index}",
+         "role": "student", "total_points": (index * 7919) % 10000, "current_streak": 0, "longest_streak": 0}
+        for index in range(count)
+    ])
+    db.commit()
+    update_leaderboard(db)
+    return session_factory, db
+
+
+def db_rank(db, user_id):
+    points = db.query(Leaderboard.total_points).filter(Leaderboard.user_id == user_id).scalar()
+    return db.query(func.count(Leaderboard.id)).filter(Leaderboard.total_points > points).scalar() + 1
+
+
+def db_neighbors(db, user_id, count):
+    """The database fallback of GET /leaderboard/me (stored rank, keyset neighbors)."""
+    return _standing_from_table(db, OVERALL, user_id, count)
+
+
+def time_it(function, repeat: int):
+    samples = []
+    for index in range(repeat):
+        started = time.perf_counter()
+        function(index)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return {
+        "mean_us": round(statistics.mean(samples), 1),
+        "p50_us": round(samples[len(samples) // 2], 1),
+        "p95_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1),
+    }
+
+
+def run(students: int, repeat: int, neighbors: int):
+    rng = random.Random(students)
+    session_factory, db = seed(students)
+    user_ids = [user_id for (user_id,) in db.query(User.id)]
+    picks = [rng.choice(user_ids) for _ in range(repeat)]
+    new_points = [rng.randint(0, 10000) for _ in range(repeat)]
+    users = {user.id: user for user in db.query(User).filter(User.id.in_(set(picks)))}
+
+    def set_points(index):
+        user = users[picks[index]]
+        user.total_points = new_points[index]
+        return user
+
+    result = {"students": students}
+    live = LiveLeaderboards(session_factory=session_factory)
+    leaderboard_service.live_leaderboards = LiveLeaderboards()  # Not loaded: the database path
+    result["database"] = {
+        "top": time_it(lambda index: get_overall_leaderboard(db), max(1, repeat // 10)),
+        "rank": time_it(lambda index: db_rank(db, picks[index]), repeat),
+        "neighbors": time_it(lambda index: db_neighbors(db, picks[index], neighbors), repeat),
+        "update": time_it(lambda index: update_user_ranking(db, set_points(index)), repeat),
+    }
+
+    started = time.perf_counter()
+    live.load(db)
+    load_ms = (time.perf_counter() - started) * 1000
+    leaderboard_service.live_leaderboards = live
+    result["memory"] = {
+        "load_ms": round(load_ms, 1),
+        "top": time_it(lambda index: get_overall_leaderboard(db), max(1, repeat // 10)),
+        "rank": time_it(lambda index: live.overall.rank(picks[index]), repeat),
+        "neighbors": time_it(lambda index: live.overall.around(picks[index], neighbors), repeat),
+        "update": time_it(lambda index: update_user_ranking(db, set_points(index)), repeat),
+    }
+    db.commit()
+    started = time.perf_counter()
+    written = live.snapshot()
+    result["memory"]["snapshot"] = {"rows": written, "ms": round((time.perf_counter() - started) * 1000, 1)}
+    db.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark leaderboard reads and updates")
+    parser.add_argument("--students", default="1000,10000,50000")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--neighbors", type=int, default=5, help="Students on each side")
+    parser.add_argument("--output", default=None, help="Write JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    results = []
+    for students in [int(value) for value in args.students.split(",") if value.strip()]:
+        result = run(students, args.repeat, args.neighbors)
+        results.append(result)
+        print(f"n={students}: " + ", ".join(
+            f"{operation} {result['database'][operation]['p50_us']} -> {result['memory'][operation]['p50_us']} us"
+            for operation in ("top", "rank", "neighbors", "update")
+        ), file=sys.stderr)
+
+    output = json.dumps({"args": vars(args), "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"✅ Wrote {len(results)} results to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
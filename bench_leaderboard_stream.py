@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Live leaderboard stream load test.
+
+Starts the app under uvicorn (in a subprocess, on a temporary SQLite
+database seeded with students), connects many simulated dashboards to
+GET /api/users/leaderboard/stream and measures:
+
+- connect:  time until each client has its "ready" event
+- single:   one practice session submitted at a time; time from the POST
+            returning until every client has the student's delta
+- burst:    many sessions submitted at once (a class finishing together);
+            time from the last POST returning until every client has seen
+            every student, and how many events the hub coalesced them into
+- slow:     clients that never read, to check they don't hold up the rest
+            (the hub resets them once their queue is full)
+
+Examples:
+    python bench_leaderboard_stream.py
+    python bench_leaderboard_stream.py --clients 2000 --slow 50 --flush 0.1 --output stream.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+sys.path.append(BACKEND)
+
+# Must be set before models creates its engine
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="bench_leaderboard_stream_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("PDF_CATALOG_ENABLED", "false")
+
+import httpx
+
+from models import User, SessionLocal, init_db
+from auth import create_access_token
+
+STREAM_PATH = "/api/users/leaderboard/stream"
+
+
+def seed_students(count: int):
+    """Students with distinct points; returns (user_id, token) of the top 50."""
+    init_db()
+    db = SessionLocal()
+    try:
+        db.add_all([
+            User(google_id=f"bench-{index}", email=f"bench-{index}@example.com", name=f"Student {index}",
+                 role="student", total_points=(index * 7919) % 100000)
+            for index in range(count)
+        ])
+        db.commit()
+        top = db.query(User.id).order_by(User.total_points.desc()).limit(50).all()
+        return [(user_id, create_access_token({"sub": str(user_id)})) for (user_id,) in top]
+    finally:
+        db.close()
+
+
+def start_server(port: int, flush: float, log_path: str):
+    env = dict(os.environ, LEADERBOARD_STREAM_FLUSH_SECONDS=str(flush),
+               LEADERBOARD_STREAM_MAX_CLIENTS=str(100000))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--backlog", "4096"],
+        cwd=BACKEND, env=env, stdout=open(log_path, "w"), stderr=subprocess.STDOUT,
+    )
+
+
+class StreamReader:
+    """A simulated dashboard: raw HTTP/1.1, chunked SSE body."""
+    def __init__(self, port: int, slow: bool = False):
+        self.port = port
+        self.slow = slow
+        self.ready = asyncio.Event()
+        self.seen = {}  # user_id -> receive times of their overall deltas
+        self.events = 0
+        self.resets = 0
+        self.changed = asyncio.Condition()
+        self.writer = None
+
+    async def run(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if self.slow:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", self.port))
+        reader, self.writer = await asyncio.open_connection(sock=sock, limit=2 ** 20)
+        self.writer.write(f"GET {STREAM_PATH} HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n".encode())
+        await self.writer.drain()
+        status = await reader.readline()
+        if b" 200 " not in status:
+            raise RuntimeError(f"Stream rejected: {status!r}")
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        if self.slow:
+            self.ready.set()
+            await asyncio.Event().wait()  # Never read again
+        buffer = b""
+        while True:
+            size = int((await reader.readline()).strip() or b"0", 16)
+            if size == 0:
+                return
+            buffer += (await reader.readexactly(size + 2))[:-2]
+            while b"\n\n" in buffer:
+                message, buffer = buffer.split(b"\n\n", 1)
+                await self.handle(message, time.perf_counter())
+
+    async def handle(self, message: bytes, received: float):
+        fields = dict(line.split(b": ", 1) for line in message.split(b"\n") if b": " in line and not line.startswith(b":"))
+        event = fields.get(b"event")
+        if event == b"ready":
+            self.ready.set()
+        elif event == b"reset":
+            self.resets += 1
+        elif event == b"deltas":
+            self.events += 1
+            data = json.loads(fields[b"data"])
+            if data["board"] == "overall":  # Weekly moves arrive alongside, in their own event
+                for entry in data["entries"]:
+                    self.seen.setdefault(entry["user_id"], []).append(received)
+            async with self.changed:
+                self.changed.notify_all()
+
+    async def wait_seen(self, expected: dict):
+        """Wait until this client has the expected number of deltas per student; returns when the last arrived."""
+        async with self.changed:
+            await self.changed.wait_for(lambda: all(
+                len(self.seen.get(user_id, ())) >= count for user_id, count in expected.items()
+            ))
+        return max(self.seen[user_id][count - 1] for user_id, count in expected.items())
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+
+
+def summarize(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    return {
+        "count": len(values),
+        "p50_ms": round(values[len(values) // 2], 2),
+        "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+        "p99_ms": round(values[min(len(values) - 1, int(len(values) * 0.99))], 2),
+        "max_ms": round(values[-1], 2),
+        "mean_ms": round(statistics.mean(values), 2),
+    }
+
+
+SESSION = {"operation_type": "multiplication", "difficulty_mode": "custom", "total_questions": 5,
+           "correct_answers": 5, "wrong_answers": 0, "accuracy": 100, "score": 5, "time_taken": 20,
+           "points_earned": 0, "attempts": []}
+
+
+async def submit(http: httpx.AsyncClient, token: str) -> float:
+    response = await http.post("/api/users/practice-session", json=SESSION,
+                               headers={"Authorization": f"Bearer {token}"})
+    response.raise_for_status()
+    return time.perf_counter()
+
+
+async def run(args):
+    students = seed_students(args.students)
+    port = args.port
+    log_path = os.path.join(os.path.dirname(DB_PATH), "server.log")
+    server = start_server(port, args.flush, log_path)
+    rng = random.Random(args.clients)
+    expected = {}  # user_id -> deltas every client should have
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as http:
+            for _ in range(300):
+                try:
+                    if (await http.get("/api/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError(f"Server did not start, see {log_path}")
+
+            clients = [StreamReader(port) for _ in range(args.clients)]
+            slow = [StreamReader(port, slow=True) for _ in range(args.slow)]
+            started = time.perf_counter()
+            tasks = [asyncio.create_task(client.run()) for client in clients + slow]
+            connect = []
+            for client in clients:
+                await asyncio.wait_for(client.ready.wait(), 60)
+                connect.append((time.perf_counter() - started) * 1000)
+            await asyncio.gather(*(client.ready.wait() for client in slow))
+            print(f"✅ {len(clients)} clients (+{len(slow)} slow) connected in {max(connect):.0f} ms", file=sys.stderr)
+
+            async def delivered(user_ids, since: float):
+                """Per client: ms from since until it had the deltas of every one of user_ids."""
+                for user_id in user_ids:
+                    expected[user_id] = expected.get(user_id, 0) + 1
+                waiting = {user_id: expected[user_id] for user_id in user_ids}
+                times = await asyncio.wait_for(asyncio.gather(
+                    *(client.wait_seen(waiting) for client in clients)), 60)
+                return [(received - since) * 1000 for received in times]
+
+            single = []
+            for _ in range(args.updates):
+                user_id, token = rng.choice(students)
+                single.extend(await delivered([user_id], await submit(http, token)))
+            print(f"single: p50 {summarize(single)['p50_ms']} ms, max {summarize(single)['max_ms']} ms "
+                  f"to all {len(clients)} clients", file=sys.stderr)
+
+            events_before = clients[0].events
+            burst_started = time.perf_counter()
+            burst = students[:args.burst]
+            submitted = max(await asyncio.gather(*(submit(http, token) for _, token in burst)))
+            burst_all = await delivered([user_id for user_id, _ in burst], submitted)
+            burst_events = clients[0].events - events_before
+            print(f"burst: {len(burst)} sessions submitted in {(submitted - burst_started) * 1000:.0f} ms, "
+                  f"{burst_events} overall event(s), all clients had them {summarize(burst_all)['max_ms']} ms "
+                  f"after the last one", file=sys.stderr)
+
+            metrics = (await http.get("/api/metrics/leaderboard")).json()["stream"]
+
+            for client in clients + slow:
+                client.close()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return {
+        "clients": args.clients,
+        "slow_clients": args.slow,
+        "flush_seconds": args.flush,
+        "connect": summarize(connect),
+        "single": summarize(single),
+        "burst": {"sessions": len(burst), "submit_ms": round((submitted - burst_started) * 1000, 1),
+                  "overall_events": burst_events, "all_delivered": summarize(burst_all)},
+        "polling_equivalent_rps": round(args.clients * 2 / args.poll_interval, 1),  # Both boards
+        "server": metrics,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the live leaderboard stream")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--slow", type=int, default=20, help="Clients that never read")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--updates", type=int, default=30, help="Sessions submitted one at a time")
+    parser.add_argument("--burst", type=int, default=50, help="Sessions submitted at once (at most 50)")
+    parser.add_argument("--flush", type=float, default=0.5, help="Server coalescing window in seconds")
+    parser.add_argument("--poll-interval", type=float, default=5, help="Dashboard polling interval it replaces")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", default=None, help="Write JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    output = json.dumps({"args": vars(args), "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"✅ Wrote results to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
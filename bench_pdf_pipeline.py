@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+End-to-end PDF pipeline benchmark.
+
+config -> generate_block -> generate_html / build_story -> Playwright or ReportLab -> bytes
+
+Sweeps question counts, block counts, answers and concurrency, and reports
+per-stage latency, peak RSS and pages/second per engine as JSON. Orientation
+is not swept: neither engine reads PaperConfig.orientation, so every paper
+renders portrait.
+
+Examples:
+    python bench_pdf_pipeline.py --quick
+    python bench_pdf_pipeline.py --engines reportlab --questions 10,100,2000 --output bench.json
+
+Each case runs in a fresh subprocess (unless --no-isolate) so peak RSS is per case.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import platform
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+MAX_BLOCK_COUNT = 200  # BlockConfig.count upper bound
+BLOCK_TYPES = [
+    ("add_sub", {"digits": 2, "rows": 5}),  # vertical
+    ("multiplication", {"multiplicandDigits": 2, "multiplierDigits": 1}),  # horizontal
+    ("division", {"dividendDigits": 3, "divisorDigits": 1}),  # horizontal
+    ("decimal_add_sub", {"digits": 2, "rows": 4}),  # vertical
+]
+PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?!s)")
+
+
+def parse_list(value, cast=str):
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+
+def build_config(questions: int, blocks: int):
+    """Paper config with `questions` spread over `blocks` blocks of mixed types."""
+    from schemas import PaperConfig, BlockConfig, Constraints
+
+    blocks = max(blocks, math.ceil(questions / MAX_BLOCK_COUNT))
+    block_configs = []
+    for index in range(blocks):
+        count = questions // blocks + (1 if index < questions % blocks else 0)
+        if count == 0:
+            continue
+        block_type, constraints = BLOCK_TYPES[index % len(BLOCK_TYPES)]
+        block_configs.append(BlockConfig(
+            id=f"bench-{index}", type=block_type, count=count,
+            constraints=Constraints(**constraints), title=f"Section {index + 1}"
+        ))
+    return PaperConfig(level="Custom", title="Benchmark Paper", blocks=block_configs)
+
+
+def peak_rss_mb():
+    """High-water RSS of this process and its waited-for children (MB)."""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # bytes on macOS, KB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1024 * 1024)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / (1024 * 1024)
+    return round(own, 1), round(children, 1)
+
+
+async def run_once(engine: str, config, with_answers: bool, seed: int):
+    """One pass through the pipeline, timing each stage (ms)."""
+    from math_generator import generate_block
+    from pdf_engines import render_pdf
+
+    timings = {}
+    started = time.perf_counter()
+    generated_blocks = []
+    question_id = 1
+    for block in config.blocks:
+        generated_blocks.append(generate_block(block, question_id, seed))
+        question_id += block.count
+    timings["generate_ms"] = (time.perf_counter() - started) * 1000
+
+    # Layout stage on its own (each engine repeats it internally during render)
+    started = time.perf_counter()
+    if engine == "playwright":
+        from html_template import generate_html
+        generate_html(config, generated_blocks, with_answers, False)
+    else:
+        from pdf_generator_v2 import build_story
+        build_story(config, generated_blocks, with_answers, False)
+    timings["layout_ms"] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    pdf_file = await render_pdf(config, generated_blocks, with_answers, False, engine)
+    timings["render_ms"] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    pdf_file.seek(0)
+    pdf_bytes = pdf_file.read()
+    pdf_file.close()
+    timings["read_ms"] = (time.perf_counter() - started) * 1000
+
+    # layout_ms is informational: render_ms already includes it
+    timings["total_ms"] = timings["generate_ms"] + timings["render_ms"] + timings["read_ms"]
+    return timings, len(PAGE_PATTERN.findall(pdf_bytes)), len(pdf_bytes)
+
+
+async def run_case(case: dict, repeat: int):
+    """Run `repeat` rounds of `concurrency` simultaneous renders for one case."""
+    config = build_config(case["questions"], case["blocks"])
+    runs = []
+    wall_times = []
+    pages = size = 0
+    for round_index in range(repeat):
+        started = time.perf_counter()
+        results = await asyncio.gather(*[
+            run_once(case["engine"], config, case["with_answers"], seed=1000 + round_index * 100 + worker)
+            for worker in range(case["concurrency"])
+        ])
+        wall_times.append(time.perf_counter() - started)
+        for timings, pages, size in results:
+            runs.append(timings)
+
+    stages = {}
+    for stage in runs[0]:
+        values = sorted(run[stage] for run in runs)
+        stages[stage] = {
+            "mean": round(statistics.mean(values), 2),
+            "p50": round(values[len(values) // 2], 2),
+            "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+        }
+    total_pages = pages * case["concurrency"] * repeat
+    own_rss, children_rss = peak_rss_mb()
+    return {
+        **case,
+        "blocks": len(config.blocks),
+        "pages": pages,
+        "pdf_bytes": size,
+        "stages_ms": stages,
+        "pages_per_second": round(total_pages / sum(wall_times), 2),
+        "papers_per_second": round(case["concurrency"] * repeat / sum(wall_times), 2),
+        "peak_rss_mb": own_rss,
+        "peak_rss_children_mb": children_rss,
+    }
+
+
+def case_worker(case: dict, repeat: int, queue):
+    try:
+        queue.put(asyncio.run(run_case(case, repeat)))
+    except Exception as e:
+        queue.put({**case, "error": f"{type(e).__name__}: {e}"})
+
+
+def run_isolated(case: dict, repeat: int, timeout: float):
+    """Run a case in a fresh process so ru_maxrss is not inherited from earlier cases."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=case_worker, args=(case, repeat, queue))
+    process.start()
+    try:
+        return queue.get(timeout=timeout)
+    except Exception:
+        return {**case, "error": f"timed out after {timeout}s"}
+    finally:
+        process.join(5)
+        if process.is_alive():
+            process.kill()
+
+
+def engine_available(engine: str) -> bool:
+    """Playwright needs a Chromium install; check once instead of failing every case."""
+    if engine != "playwright":
+        return True
+    try:
+        from playwright.async_api import async_playwright
+
+        async def launch():
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=True)
+                await browser.close()
+
+        asyncio.run(launch())
+        return True
+    except Exception as e:
+        print(f"⚠️  Skipping playwright: {e}".splitlines()[0], file=sys.stderr)
+        return False
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PDF generation pipeline")
+    parser.add_argument("--engines", default="playwright,reportlab")
+    parser.add_argument("--questions", default="10,50,200,500,1000,2000")
+    parser.add_argument("--blocks", default="1,5,20", help="Blocks per paper (raised to fit 200 questions/block)")
+    parser.add_argument("--answers", default="false,true")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--repeat", type=int, default=3, help="Rounds per case")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds per case")
+    parser.add_argument("--no-isolate", action="store_true", help="Run cases in this process")
+    parser.add_argument("--quick", action="store_true", help="Small sweep for a smoke run")
+    parser.add_argument("--output", default=None, help="Write JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.questions, args.blocks = "10,200", "1,5"
+        args.concurrency, args.repeat = "1,4", 1
+
+    engines = [engine for engine in parse_list(args.engines) if engine_available(engine)]
+    cases = [
+        {"engine": engine, "questions": questions, "blocks": blocks,
+         "with_answers": with_answers, "concurrency": concurrency}
+        for engine in engines
+        for questions in parse_list(args.questions, int)
+        for blocks in parse_list(args.blocks, int)
+        for with_answers in [value.lower() == "true" for value in parse_list(args.answers)]
+        for concurrency in parse_list(args.concurrency, int)
+    ]
+
+    results = []
+    for index, case in enumerate(cases, 1):
+        if args.no_isolate:
+            try:
+                result = asyncio.run(run_case(case, args.repeat))
+            except Exception as e:
+                result = {**case, "error": f"{type(e).__name__}: {e}"}
+        else:
+            result = run_isolated(case, args.repeat, args.timeout)
+        results.append(result)
+        summary = result.get("error") or (
+            f"{result['pages']} pages, total p50 {result['stages_ms']['total_ms']['p50']} ms, "
+            f"{result['pages_per_second']} pages/s, peak RSS {result['peak_rss_mb']} MB"
+        )
+        print(f"[{index}/{len(cases)}] {case['engine']} q={case['questions']} b={case['blocks']} "
+              f"answers={case['with_answers']} c={case['concurrency']}: {summary}",
+              file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "isolated": not args.no_isolate,
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"✅ Wrote {len(results)} results to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
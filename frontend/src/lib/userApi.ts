@@ -422,6 +422,66 @@ export async function getWeeklyLeaderboard(): Promise<LeaderboardEntry[]> {
   return readResponse<LeaderboardEntry[]>(res);
 }
 
+export interface LeaderboardDelta {
+  user_id: number;
+  rank: number | null; // null once removed from the board
+  total_points: number | null;
+  weekly_points: number | null;
+}
+
+// Live leaderboard updates (server-sent events); returns a function that closes the stream
+export function subscribeLeaderboard(handlers: {
+  onReady: () => void; // Connected (or reconnected): fetch the boards
+  onDeltas: (board: "overall" | "weekly", deltas: LeaderboardDelta[]) => void;
+  onReset: () => void; // Boards were rebuilt or we fell behind: fetch the boards
+  onError?: () => void;
+}): () => void {
+  const source = new EventSource(apiUrl(`/users/leaderboard/stream`));
+  source.addEventListener("ready", () => handlers.onReady());
+  source.addEventListener("deltas", (event) => {
+    const data = JSON.parse((event as MessageEvent).data);
+    handlers.onDeltas(data.board, data.entries);
+  });
+  source.addEventListener("reset", () => handlers.onReset());
+  source.onerror = () => handlers.onError?.();
+  return () => source.close();
+}
+
+// Apply pushed deltas to a loaded board. Returns null when the board has to be
+// refetched instead: a student we have no entry for joined it, or one left a
+// full board (the next one in line is unknown).
+export function applyLeaderboardDeltas(
+  board: "overall" | "weekly",
+  entries: LeaderboardEntry[],
+  deltas: LeaderboardDelta[],
+  size: number = 100
+): LeaderboardEntry[] | null {
+  const pointsKey = board === "overall" ? "total_points" : "weekly_points";
+  const byId = new Map(entries.map((entry) => [entry.user_id, { ...entry }]));
+  for (const delta of deltas) {
+    const entry = byId.get(delta.user_id);
+    if (delta.rank === null || delta.rank > size) {
+      if (entry && entries.length >= size) return null;
+      byId.delete(delta.user_id);
+    } else if (entry) {
+      // Both boards' points, so entries don't keep a stale value for the other board
+      entry.total_points = delta.total_points ?? 0;
+      entry.weekly_points = delta.weekly_points ?? 0;
+    } else {
+      return null;
+    }
+  }
+  const updated = Array.from(byId.values()).sort(
+    (a, b) => (b[pointsKey] || 0) - (a[pointsKey] || 0) || a.user_id - b.user_id
+  );
+  // Competition ranks: tied students share one (1, 2, 2, 4)
+  updated.forEach((entry, index) => {
+    const previous = updated[index - 1];
+    entry.rank = previous && (previous[pointsKey] || 0) === (entry[pointsKey] || 0) ? previous.rank : index + 1;
+  });
+  return updated.slice(0, size);
+}
+
 // Admin: Get all students
 export async function getAllStudents(): Promise<User[]> {
   const res = await fetch(apiUrl(`/users/admin/students`), {
@@ -1,6 +1,6 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { useAuth } from "../contexts/AuthContext";
-import { getStudentStats, getOverallLeaderboard, getWeeklyLeaderboard, getPracticeSessionDetail, StudentStats, LeaderboardEntry, PracticeSessionDetail } from "../lib/userApi";
+import { getStudentStats, getOverallLeaderboard, getWeeklyLeaderboard, getPracticeSessionDetail, subscribeLeaderboard, applyLeaderboardDeltas, StudentStats, LeaderboardEntry, PracticeSessionDetail } from "../lib/userApi";
 import { getPaperAttempts, PaperAttempt, getPaperAttempt, PaperAttemptDetail } from "../lib/api";
 import { Trophy, Target, Zap, Award, CheckCircle2, XCircle, BarChart3, History, X, Eye, ChevronDown, ChevronUp, Gift, RotateCcw } from "lucide-react";
 import { Link, useLocation } from "wouter";
@@ -48,6 +48,38 @@ export default function StudentDashboard() {
   const [sessionFilter, setSessionFilter] = useState<SessionFilter>("overall");
   const [unifiedSessions, setUnifiedSessions] = useState<UnifiedSession[]>([]);
   const [reAttempting, setReAttempting] = useState<number | null>(null);
+  const liveLeaderboardRef = useRef(false);
+  const leaderboardsRef = useRef<Record<"overall" | "weekly", LeaderboardEntry[]>>({ overall: [], weekly: [] });
+
+  const loadOverallLeaderboard = async (isInitialLoad: boolean = false) => {
+    try {
+      const overallData = await getOverallLeaderboard();
+      console.log("✅ [DASHBOARD] Overall leaderboard loaded:", overallData.length, "entries");
+      leaderboardsRef.current.overall = overallData;
+      setOverallLeaderboard(overallData);
+    } catch (overallError: any) {
+      console.error("❌ [DASHBOARD] Failed to load overall leaderboard:", overallError);
+      // Only clear on initial load
+      if (isInitialLoad) {
+        setOverallLeaderboard([]);
+      }
+    }
+  };
+
+  const loadWeeklyLeaderboard = async (isInitialLoad: boolean = false) => {
+    try {
+      const weeklyData = await getWeeklyLeaderboard();
+      console.log("✅ [DASHBOARD] Weekly leaderboard loaded:", weeklyData.length, "entries");
+      leaderboardsRef.current.weekly = weeklyData;
+      setWeeklyLeaderboard(weeklyData);
+    } catch (weeklyError: any) {
+      console.error("❌ [DASHBOARD] Failed to load weekly leaderboard:", weeklyError);
+      // Only clear on initial load
+      if (isInitialLoad) {
+        setWeeklyLeaderboard([]);
+      }
+    }
+  };
 
   const loadData = async (isInitialLoad: boolean = false) => {
     // Only show loading screen on initial load, not on refreshes
@@ -98,28 +130,10 @@ export default function StudentDashboard() {
       }
       
       // Load leaderboards independently - don't fail if these error
-      try {
-        const overallData = await getOverallLeaderboard();
-        console.log("✅ [DASHBOARD] Overall leaderboard loaded:", overallData.length, "entries");
-        setOverallLeaderboard(overallData);
-      } catch (overallError: any) {
-        console.error("❌ [DASHBOARD] Failed to load overall leaderboard:", overallError);
-        // Only clear on initial load
-        if (isInitialLoad) {
-          setOverallLeaderboard([]);
-        }
-      }
-      
-      try {
-        const weeklyData = await getWeeklyLeaderboard();
-        console.log("✅ [DASHBOARD] Weekly leaderboard loaded:", weeklyData.length, "entries");
-        setWeeklyLeaderboard(weeklyData);
-      } catch (weeklyError: any) {
-        console.error("❌ [DASHBOARD] Failed to load weekly leaderboard:", weeklyError);
-        // Only clear on initial load
-        if (isInitialLoad) {
-          setWeeklyLeaderboard([]);
-        }
+      // (while the live stream is connected they are pushed instead of polled)
+      if (isInitialLoad || !liveLeaderboardRef.current) {
+        await loadOverallLeaderboard(isInitialLoad);
+        await loadWeeklyLeaderboard(isInitialLoad);
       }
       
       // Load paper attempts
@@ -167,6 +181,39 @@ export default function StudentDashboard() {
     return () => clearInterval(interval);
   }, []);
 
+  useEffect(() => {
+    // Live leaderboard: rank changes are pushed, so the boards drop out of the
+    // 5 second refresh while the stream is connected
+    const unsubscribe = subscribeLeaderboard({
+      onReady: () => {
+        console.log("✅ [DASHBOARD] Live leaderboard connected");
+        liveLeaderboardRef.current = true;
+        loadOverallLeaderboard();
+        loadWeeklyLeaderboard();
+      },
+      onDeltas: (board, deltas) => {
+        const updated = applyLeaderboardDeltas(board, leaderboardsRef.current[board], deltas);
+        if (updated === null) {
+          // Someone we don't have joined the board: one (usually cached) fetch
+          (board === "overall" ? loadOverallLeaderboard : loadWeeklyLeaderboard)();
+          return;
+        }
+        leaderboardsRef.current[board] = updated;
+        (board === "overall" ? setOverallLeaderboard : setWeeklyLeaderboard)(updated);
+      },
+      onReset: () => {
+        loadOverallLeaderboard();
+        loadWeeklyLeaderboard();
+      },
+      onError: () => {
+        // EventSource reconnects by itself; poll until it does
+        liveLeaderboardRef.current = false;
+      },
+    });
+    
+    return () => unsubscribe();
+  }, []);
+
   const getOperationName = (op: string) => {
     const names: Record<string, string> = {
       add_sub: "Add/Subtract",
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Answer autosave buffer: coalescing, read-your-writes and closing on submit."""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models import Base, PaperAttempt, PaperAttemptAnswer, User
+from answer_autosave import AnswerAutosaveBuffer, normalize_answer
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def test_normalize_answer():
+    assert normalize_answer(12.0) == "12"
+    assert normalize_answer(" 3.5 ") == "3.5"
+    assert normalize_answer("") is None and normalize_answer(None) is None
+    with pytest.raises(ValueError):
+        normalize_answer(True)
+    with pytest.raises(ValueError):
+        normalize_answer("9" * 40)
+
+
+def test_deltas_coalesce_into_one_row_per_question(session_factory):
+    buffer = AnswerAutosaveBuffer(session_factory=session_factory)
+    buffer.open(1, user_id=7, question_ids=["1", "2", "3"])
+    assert buffer.is_open(1, 7) and not buffer.is_open(1, 8)
+    buffer.add(1, {"1": 1})
+    buffer.add(1, {"1": 12, 2: "3.5"})
+    with pytest.raises(ValueError):
+        buffer.add(1, {"4": 1})
+
+    db = session_factory()
+    assert buffer.saved_answers(db, 1) == {"1": 12, "2": 3.5}  # Still buffered
+    assert buffer.flush() == 2
+    assert buffer.flush() == 0
+    buffer.add(1, {"2": None, "3": "x"})  # Clear one answer, add another
+    assert buffer.saved_answers(db, 1) == {"1": 12, "3": "x"}
+    buffer.flush()
+    assert buffer.saved_answers(db, 1) == {"1": 12, "3": "x"}
+    assert db.query(PaperAttemptAnswer).count() == 3
+
+
+def test_close_returns_answers_and_stops_autosave(session_factory):
+    buffer = AnswerAutosaveBuffer(session_factory=session_factory)
+    buffer.open(1, user_id=7, question_ids=["1", "2"])
+    buffer.add(1, {"1": 5})
+    buffer.flush()
+    buffer.add(1, {"2": 6})
+
+    db = session_factory()
+    assert buffer.close(db, 1) == {"1": 5, "2": 6}
+    assert not buffer.is_open(1, 7)
+    with pytest.raises(KeyError):
+        buffer.add(1, {"1": 1})
+    buffer.open(1, user_id=7, question_ids=["1", "2"])  # A PATCH racing the submit
+    assert not buffer.is_open(1, 7)
+    assert buffer.flush() == 0  # Buffered until the submit commits
+    db.commit()
+    buffer.closed(1)
+    assert db.query(PaperAttemptAnswer).count() == 0
+    assert buffer.flush() == 0
+
+
+def test_failed_submit_keeps_autosaved_answers(session_factory):
+    buffer = AnswerAutosaveBuffer(session_factory=session_factory)
+    buffer.open(1, user_id=7, question_ids=["1", "2"])
+    buffer.add(1, {"1": 5})
+    buffer.flush()
+    buffer.add(1, {"2": 6})
+
+    db = session_factory()
+    assert buffer.close(db, 1) == {"1": 5, "2": 6}
+    db.rollback()  # The submit failed
+    buffer.reopen(1)
+    assert buffer.is_open(1, 7)
+    assert buffer.flush() == 1
+    assert buffer.saved_answers(db, 1) == {"1": 5, "2": 6}
+    assert db.query(PaperAttemptAnswer).count() == 2
+
+
+def test_reads_hold_up_only_their_own_attempt(session_factory):
+    buffer = AnswerAutosaveBuffer(session_factory=session_factory)
+    for attempt_id in (1, 2):
+        buffer.open(attempt_id, user_id=7, question_ids=["1"])
+        buffer.add(attempt_id, {"1": attempt_id})
+    querying, release = threading.Event(), threading.Event()
+
+    class SlowSession(Session):
+        def query(self, *entities, **kwargs):
+            querying.set()
+            release.wait(5)
+            return super().query(*entities, **kwargs)
+
+    results = {}
+    reader = threading.Thread(target=lambda: results.update(
+        answers=buffer.close(sessionmaker(bind=session_factory.kw["bind"], class_=SlowSession)(), 1)))
+    reader.start()
+    assert querying.wait(5)
+    flusher = threading.Thread(target=lambda: results.update(flushed=buffer.flush()))
+    flusher.start()
+    flusher.join(2)
+    assert results.get("flushed") == 1  # Attempt 2 is written while attempt 1 is being read
+    release.set()
+    reader.join(5)
+    assert results["answers"] == {"1": 1}
+
+
+def test_deleted_attempts_do_not_block_other_writes():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    event.listen(engine, "connect", lambda connection, _: connection.execute("PRAGMA foreign_keys=ON"))
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    db.add(User(id=7, google_id="g", email="s@example.com", name="S", role="student"))
+    db.add_all([PaperAttempt(id=attempt_id, user_id=7, paper_title="P", paper_level="Custom", paper_config={},
+                             generated_blocks=[], seed=1, total_questions=2) for attempt_id in (1, 2)])
+    db.commit()
+
+    buffer = AnswerAutosaveBuffer(session_factory=session_factory, idle_seconds=0)
+    for attempt_id in (1, 2, 3):  # 3 was deleted after it was opened
+        buffer.open(attempt_id, user_id=7, question_ids=["1"])
+        buffer.add(attempt_id, {"1": attempt_id})
+    with pytest.raises(Exception):
+        buffer.flush()
+    assert not buffer.is_open(3, 7)
+    assert buffer.flush() == 2  # The others are written on the next flush
+    assert db.query(PaperAttemptAnswer).count() == 2
+
+    buffer.add(2, {"1": 9})
+    buffer.drop([2])  # Deleting the student
+    assert buffer.flush() == 0 and not buffer.is_open(2, 7)
+
+    assert buffer.evict_idle() == 1  # Attempt 1: nothing buffered, idle
+    assert not buffer.is_open(1, 7)
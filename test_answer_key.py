@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Answer key grading matches per-question comparison, with and without numpy."""
+
+import random
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import pytest
+import answer_key
+from answer_key import build_answer_key, grade_answers
+
+BLOCKS = [
+    {"questions": [{"id": 1, "answer": 12}, {"id": 2, "answer": 0}, {"id": 3, "answer": 2.5}]},
+    {"questions": [{"id": 4, "answer": -7}, {"id": 5, "answer": None}, {"id": 6, "answer": 100}]},
+]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def grading_path(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(answer_key, "np", None)
+    elif answer_key.np is None:
+        pytest.skip("numpy not installed")
+
+
+def test_build_answer_key():
+    key = build_answer_key(BLOCKS)
+    assert key == {"ids": ["1", "2", "3", "4", "5", "6"], "answers": [12.0, 0.0, 2.5, -7.0, None, 100.0]}
+
+
+def test_grade_answers(grading_path):
+    key = build_answer_key(BLOCKS)
+    answers = {
+        "1": 12,        # correct (string key)
+        2: 0,           # correct zero (int key)
+        "3": "2.504",   # correct within tolerance
+        "4": "abc",     # unparseable: wrong
+        "5": 3,         # no correct answer: not graded
+        # 6 skipped: not graded
+    }
+    assert grade_answers(key, answers) == (3, 1)
+    assert grade_answers(key, {}) == (0, 0)
+    assert grade_answers(key, {"6": 99, "1": ""}) == (0, 1)
+
+
+def test_zero_answers_are_graded(grading_path):
+    # Submitting 0 used to be skipped like a blank answer; it is graded now
+    key = build_answer_key(BLOCKS)
+    assert grade_answers(key, {"2": 0}) == (1, 0)
+    assert grade_answers(key, {"1": 0, "4": "0"}) == (0, 2)
+
+
+def test_non_finite_answers_are_wrong(grading_path):
+    key = build_answer_key(BLOCKS)
+    assert grade_answers(key, {"1": "nan", "2": "NaN", "3": float("nan")}) == (0, 3)
+    assert grade_answers(key, {"4": "inf", "6": "-Infinity"}) == (0, 2)
+    assert grade_answers(key, {"1": "nan", "4": "abc"}) == (0, 2)
+
+
+def test_paths_agree_on_random_papers(monkeypatch):
+    if answer_key.np is None:
+        pytest.skip("numpy not installed")
+    rng = random.Random(7)
+    blocks = [{"questions": [{"id": i, "answer": rng.randint(-50, 50)} for i in range(1, 501)]}]
+    key = build_answer_key(blocks)
+    answers = {str(i): rng.choice([rng.randint(-50, 50), None, "x", "nan", i % 101 - 50]) for i in range(1, 501)}
+    vectorized = grade_answers(key, answers)
+    monkeypatch.setattr(answer_key, "np", None)
+    assert grade_answers(key, answers) == vectorized
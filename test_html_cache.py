@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""HTML preview cache: encodings, strong ETags and LRU bounds."""
+
+import gzip
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from html_cache import HtmlPreview, HtmlPreviewCache, brotli
+
+
+def test_encodings_and_etags():
+    preview = HtmlPreview("<html>" + "<td>12.</td>" * 500 + "</html>")
+    assert gzip.decompress(preview.encodings["gzip"]) == preview.identity
+    assert preview.negotiate("gzip, deflate") == "gzip"
+    assert preview.negotiate("gzip;q=0, identity") == "identity"
+    assert preview.negotiate(None) == "identity"
+    if brotli is not None:
+        assert brotli.decompress(preview.encodings["br"]) == preview.identity
+        assert preview.negotiate("gzip, br") == "br"
+
+    # One strong ETag per representation, all of them revalidate
+    assert preview.etag("identity") != preview.etag("gzip")
+    assert preview.matches(preview.etag("gzip"))
+    assert preview.matches(f'"other", {preview.etag("identity")}')
+    assert not preview.matches('"other"')
+    assert not preview.matches(None)
+    # Same HTML, same ETag (safe across processes and restarts)
+    assert HtmlPreview(preview.identity.decode()).etag("gzip") == preview.etag("gzip")
+
+
+def test_lru_eviction():
+    cache = HtmlPreviewCache(max_entries=2)
+    keys = [HtmlPreviewCache.key({"paper": n}, None, False, False) for n in range(3)]
+    for index, key in enumerate(keys):
+        cache.put(key, HtmlPreview(f"<p>{index}</p>"))
+        if index == 1:
+            assert cache.get(keys[0]) is not None  # Touch: keys[1] becomes least recent
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
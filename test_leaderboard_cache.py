@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Leaderboard response cache: ETags, TTL and invalidation on top-N changes."""
+
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import leaderboard_service
+from leaderboard_cache import LeaderboardCache
+from leaderboard_service import LiveLeaderboards
+from ranked_board import RankedBoard
+
+
+def test_etag_ttl_and_stale_puts():
+    cache = LeaderboardCache(ttl=0.05, size=2)
+    generation = cache.generation("overall")
+    cached = cache.put("overall", [{"user_id": 1}], generation)
+    assert cache.get("overall") is cached
+    assert cached.matches(cached.etag) and cached.matches(f'"other", {cached.etag}') and not cached.matches('"other"')
+
+    time.sleep(0.06)
+    assert cache.get("overall") is None  # Expired
+
+    # A response built before an invalidation is served once but not cached
+    generation = cache.generation("weekly")
+    cache.invalidate("weekly")
+    cache.put("weekly", [], generation)
+    assert cache.get("weekly") is None
+
+    # Places beyond the served top N leave the cache alone
+    cached = cache.put("overall", [], cache.generation("overall"))
+    cache.invalidate("overall", position=3)
+    assert cache.get("overall") is cached
+    cache.invalidate("overall", position=2)
+    assert cache.get("overall") is None
+
+
+def test_live_changes_invalidate_only_boards_they_touch():
+    cache = LeaderboardCache(size=2)
+    leaderboard_service.leaderboard_cache, original = cache, leaderboard_service.leaderboard_cache
+    try:
+        live = LiveLeaderboards()
+        live.overall = RankedBoard([(1, 300), (2, 200), (3, 100)])
+        live.weekly = RankedBoard([(1, 10), (2, 30), (3, 20)])
+
+        def cache_both():
+            for board in ("overall", "weekly"):
+                cache.put(board, [], cache.generation(board))
+
+        cache_both()
+        live.apply(3, 150)  # Third overall either way, second on the weekly board
+        assert cache.get("overall") is not None and cache.get("weekly") is None
+
+        cache_both()
+        live.apply(3, 250, weekly_points_delta=-15)  # Into the overall top 2, out of the weekly one
+        assert cache.get("overall") is None and cache.get("weekly") is None
+    finally:
+        leaderboard_service.leaderboard_cache = original
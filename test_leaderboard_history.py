@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Finished weeks are archived from the points buckets and read back with ranks."""
+
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, User, WeeklyLeaderboardSnapshot
+from leaderboard_service import add_weekly_points, iso_week
+from leaderboard_history import archive_finished_weeks, get_week_top, get_rank_history
+
+
+def test_archive_top_and_rank_history():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    users = [User(google_id=f"g{index}", email=f"s{index}@example.com", name=f"S{index}", role="student")
+             for index in range(4)]
+    users.append(User(google_id="admin", email="a@example.com", name="Admin", role="admin"))
+    db.add_all(users)
+    db.commit()
+
+    now = datetime.utcnow()
+    two_weeks_ago, last_week = now - timedelta(weeks=2), now - timedelta(weeks=1)
+    for user, points in zip(users, [30, 50, 30, 10, 99]):
+        add_weekly_points(db, user.id, points, now=last_week)
+    add_weekly_points(db, users[0].id, 5, now=two_weeks_ago)
+    add_weekly_points(db, users[1].id, 40, now=now)  # This week: not finished yet
+    db.commit()
+
+    assert archive_finished_weeks(db) == [iso_week(two_weeks_ago), iso_week(last_week)]
+    assert archive_finished_weeks(db) == []  # Already archived
+    assert db.get(WeeklyLeaderboardSnapshot, iso_week(now)) is None
+
+    top = get_week_top(db, iso_week(last_week), limit=3)
+    assert top["total_students"] == 4  # Admins are not archived
+    assert [(entry["user_id"], entry["rank"], entry["points"]) for entry in top["entries"]] == [
+        (users[1].id, 1, 50), (users[0].id, 2, 30), (users[2].id, 2, 30)
+    ]
+    assert get_week_top(db, "2000-W01") is None
+
+    assert [(entry["iso_week"], entry["rank"], entry["points"]) for entry in get_rank_history(db, users[0].id)] == [
+        (iso_week(last_week), 2, 30), (iso_week(two_weeks_ago), 1, 5)
+    ]
+    assert [entry["rank"] for entry in get_rank_history(db, users[3].id, weeks=2)] == [4, None]
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Incremental leaderboard updates agree with a full recompute."""
+
+import random
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, User, Leaderboard, WeeklyPoints
+from leaderboard_service import (
+    update_user_ranking, remove_from_rankings, update_leaderboard, update_weekly_leaderboard, add_weekly_points,
+    iso_week
+)
+
+
+def make_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def add_student(db, index):
+    user = User(google_id=f"g{index}", email=f"s{index}@example.com", name=f"S{index}", role="student")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def practice(db, user, points):
+    """What save_practice_session does to points and the leaderboard."""
+    user.total_points += points
+    add_weekly_points(db, user.id, points)
+    db.commit()
+    update_user_ranking(db, user, weekly_points_delta=points)
+
+
+def ranks(db):
+    return {entry.user_id: (entry.rank, entry.weekly_rank) for entry in db.query(Leaderboard).all()}
+
+
+def test_random_operations_match_full_recompute():
+    rng = random.Random(3)
+    db = make_session()
+    students = [add_student(db, index) for index in range(12)]
+    admin = User(google_id="admin", email="a@example.com", name="Admin", role="admin", total_points=999)
+    db.add(admin)
+    db.commit()
+
+    for step in range(150):
+        operation = rng.random()
+        if operation < 0.6:
+            practice(db, rng.choice(students), rng.choice([0, 10, 10, 20, 50]))
+        elif operation < 0.75:
+            student = rng.choice(students)
+            student.total_points = rng.choice([0, 10, 40, student.total_points // 2])  # Admin points edit
+            db.commit()
+            update_user_ranking(db, student)
+        elif operation < 0.85:
+            students.append(add_student(db, 100 + step))
+        elif len(students) > 3:
+            student = students.pop(rng.randrange(len(students)))
+            remove_from_rankings(db, student.id)
+            db.query(Leaderboard).filter(Leaderboard.user_id == student.id).delete()
+            db.query(WeeklyPoints).filter(WeeklyPoints.user_id == student.id).delete()
+            db.delete(student)
+            db.commit()
+        update_user_ranking(db, admin)  # Admins are never ranked
+
+        # Students that have been placed hold competition ranks (ties share one)
+        incremental = ranks(db)
+        placed = [user for user in students if incremental.get(user.id, (None,))[0] is not None]
+        for user in placed:
+            ahead = sum(1 for other in placed if other.total_points > user.total_points)
+            assert incremental[user.id][0] == ahead + 1
+
+    # Once every student has been placed, a full recompute has nothing to fix
+    for student in students:
+        update_user_ranking(db, student)
+    assert update_leaderboard(db) == 0
+    assert update_weekly_leaderboard(db) == 0
+    assert ranks(db).get(admin.id, (None, None)) == (None, None)
+
+
+def test_reconciliation_repairs_drift():
+    db = make_session()
+    students = [add_student(db, index) for index in range(5)]
+    for points, student in zip([50, 40, 30, 20, 10], students):
+        practice(db, student, points)
+    # Corrupt two rows
+    db.query(Leaderboard).filter(Leaderboard.user_id == students[0].id).update({"rank": 4})
+    db.query(Leaderboard).filter(Leaderboard.user_id == students[1].id).update({"weekly_points": 0})
+    db.commit()
+    assert update_leaderboard(db) == 1
+    assert update_weekly_leaderboard(db) == 1  # Stored rank was right, points were not
+    assert update_leaderboard(db) == 0 and update_weekly_leaderboard(db) == 0
+
+
+def test_rebuild_shares_ranks_between_ties():
+    db = make_session()
+    students = [add_student(db, index) for index in range(5)]
+    for points, student in zip([30, 50, 30, 10, 50], students):
+        student.total_points = points
+    db.commit()
+    assert update_leaderboard(db) == 5  # Rows are created by the rebuild
+    assert update_weekly_leaderboard(db) == 5
+    assert [ranks(db)[student.id] for student in students] == [(3, 1), (1, 1), (3, 1), (5, 1), (1, 1)]
+
+
+def test_weekly_points_buckets():
+    db = make_session()
+    student = add_student(db, 0)
+    monday = datetime(2026, 1, 5, 0, 0)
+    sunday = datetime(2026, 1, 4, 23, 59)
+    add_weekly_points(db, student.id, 10, now=sunday)
+    add_weekly_points(db, student.id, 15, now=monday)
+    add_weekly_points(db, student.id, 5, now=monday)
+    add_weekly_points(db, student.id, 0, now=monday)  # Nothing earned, nothing written
+    db.commit()
+    buckets = dict(db.query(WeeklyPoints.iso_week, WeeklyPoints.points).filter(WeeklyPoints.user_id == student.id))
+    assert buckets == {iso_week(sunday): 10, iso_week(monday): 20} and iso_week(monday) == "2026-W02"
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Segment boards rank per operation/level/group and keep a bounded LRU of hot segments."""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, User
+import leaderboard_segments
+from leaderboard_segments import SegmentBoards, segment_key, earned_segments, add_segment_points, list_segments
+
+
+def test_segment_points_groups_and_lru():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    users = [User(google_id=f"g{index}", email=f"s{index}@example.com", name=f"S{index}", role="student",
+                  total_points=points, class_group="A" if index < 2 else None)
+             for index, points in enumerate([40, 10, 25])]
+    db.add_all(users)
+    db.commit()
+
+    multiplication = segment_key("operation", "multiplication")
+    assert add_segment_points(db, users[0].id, [multiplication], 5) == {multiplication: 5}
+    assert add_segment_points(db, users[1].id, [multiplication], 9) == {multiplication: 9}
+    db.commit()
+
+    boards = SegmentBoards(max_segments=2)
+    assert boards.top(db, multiplication, 10) == [(users[1].id, 9, 1), (users[0].id, 5, 2)]
+
+    totals = add_segment_points(db, users[0].id, [multiplication], 7)
+    db.commit()
+    boards.update(users[0], totals)  # Cached board follows without a reload
+    assert boards.around(db, multiplication, users[0].id, 1)[0] == 1
+
+    group = segment_key("group", "A")
+    assert [user_id for user_id, _, _ in boards.top(db, group, 10)] == [users[0].id, users[1].id]
+    users[1].total_points = 50
+    db.commit()
+    boards.update(users[1], {})
+    assert boards.around(db, group, users[1].id, 0) == (1, [(users[1].id, 50, 1)])
+
+    assert boards.top(db, segment_key("level", "nobody-has-this"), 10) == []  # Empty: not cached
+    assert boards.metrics()["cached_segments"] == 2 and boards.metrics()["evictions"] == 0
+    junior = segment_key("level", "junior")
+    db.commit()
+    add_segment_points(db, users[2].id, [junior], 3)
+    db.commit()
+    boards.top(db, junior, 10)  # Third segment evicts the least recent
+    assert boards.metrics()["cached_segments"] == 2 and boards.metrics()["evictions"] == 1
+
+    assert list_segments(db) == {"operation": ["multiplication"], "level": ["junior"], "group": ["A"]}
+    with pytest.raises(ValueError):
+        segment_key("school", "x")
+    assert earned_segments("operation", " ") == [] and earned_segments("level", None) == []
+
+
+def test_loads_run_outside_the_lock(monkeypatch):
+    boards = SegmentBoards()
+    user = User(id=5, role="student", total_points=0)
+
+    def standings(db, segment):
+        # Other segments' updates don't wait for this query, and updates to
+        # this segment are replayed once it is loaded
+        assert boards._lock.acquire(blocking=False)
+        boards._lock.release()
+        boards.update(user, {segment: 42})
+        return [(6, 10)]
+    monkeypatch.setattr(leaderboard_segments, "segment_standings", standings)
+    assert boards.top(None, "operation:division", 10) == [(5, 42, 1), (6, 10, 2)]
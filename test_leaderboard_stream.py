@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Leaderboard stream hub: coalesced deltas, top-N filter, heartbeat and slow-client resets."""
+
+import sys
+import os
+import asyncio
+import json
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from leaderboard_stream import LeaderboardStream, HEARTBEAT, RESET_EVENT
+
+
+def parse(message: bytes):
+    lines = dict(line.split(": ", 1) for line in message.decode().strip().split("\n"))
+    return lines["event"], json.loads(lines["data"])
+
+
+def test_deltas_fan_out_with_backpressure():
+    async def scenario():
+        hub = LeaderboardStream(flush_seconds=0.01, heartbeat_seconds=0.2, queue_size=2, size=3)
+        await hub.start()
+        fast, slow = hub.subscribe(), hub.subscribe()
+        stream = hub.events(fast)
+        assert b"event: ready" in await stream.__anext__()
+
+        def submissions():  # Request threads
+            hub.publish("overall", 1, 2, None, 10, 10)
+            hub.publish("overall", 1, 1, 2, 30, 30)  # Same student again: one entry
+            hub.publish("overall", 2, 9, 8, 5, 0)  # Below the top 3 before and after
+        await asyncio.to_thread(submissions)
+        assert parse(await asyncio.wait_for(stream.__anext__(), 1)) == (
+            "deltas", {"board": "overall", "entries": [
+                {"user_id": 1, "rank": 1, "total_points": 30, "weekly_points": 30}
+            ]}
+        )
+
+        for points in range(3):  # slow never reads: its queue overflows
+            hub.publish("weekly", 3, 1, None, points, points)
+            await asyncio.wait_for(stream.__anext__(), 1)
+        assert hub.metrics()["slow_client_resets"] == 1
+        assert [slow.queue.get_nowait() for _ in range(slow.queue.qsize())][0] == RESET_EVENT
+
+        assert await asyncio.wait_for(stream.__anext__(), 1) == HEARTBEAT  # Idle
+
+        await stream.aclose()
+        assert hub.metrics()["clients"] == 1
+        await hub.stop()
+        assert slow.queue.get_nowait() is None  # Streams end on shutdown
+
+    asyncio.run(scenario())
+
+
+def test_max_clients():
+    async def scenario():
+        hub = LeaderboardStream(max_clients=1)
+        assert hub.subscribe() is not None
+        assert hub.subscribe() is None
+        assert hub.metrics()["rejected"] == 1
+
+    asyncio.run(scenario())
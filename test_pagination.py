@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""Keyset pagination cursors."""
+
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import pytest
+from pagination import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 3, 4, 5, 6, 7, 891011)
+    cursor = encode_cursor(created_at, 42)
+    assert "=" not in cursor and "|" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "zzz", encode_cursor(datetime(2025, 1, 1), 1)[:-3]])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Admission control: in-flight cap, bounded queue, deadlines and metrics."""
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import pytest
+
+from pdf_admission import AdmissionController, AdmissionRejected
+
+
+def test_limits_queue_and_deadline():
+    async def scenario():
+        controller = AdmissionController(max_inflight=2, max_queue=1, queue_timeout=0.2, retry_after=7)
+        release = asyncio.Event()
+        running = []
+
+        async def render(name):
+            async with controller.slot():
+                running.append(name)
+                await release.wait()
+
+        holders = [asyncio.create_task(render(i)) for i in range(2)]
+        await asyncio.sleep(0)
+        assert controller.in_flight == 2
+
+        queued = asyncio.create_task(render("queued"))
+        await asyncio.sleep(0)
+        assert controller.queue_depth == 1
+
+        # Queue full: rejected immediately
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        assert rejected.value.status_code == 429 and rejected.value.retry_after == 7
+
+        # Deadline passes while the holders keep their slots
+        with pytest.raises(AdmissionRejected) as rejected:
+            await queued
+        assert rejected.value.status_code == 503
+
+        # A released slot is handed to the next waiter in FIFO order
+        waiter = asyncio.create_task(render("next"))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(*holders, waiter)
+        assert running == [0, 1, "next"]
+        assert controller.in_flight == 0
+
+        metrics = controller.metrics()
+        assert metrics["admitted"] == 3
+        assert metrics["rejected_queue_full"] == 1
+        assert metrics["rejected_timeout"] == 1
+        assert metrics["peak_in_flight"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    async def scenario():
+        controller = AdmissionController(max_inflight=1, max_queue=4, queue_timeout=5)
+        await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        controller.release()
+        assert controller.in_flight == 0
+        # Background work waits without counting against the request queue
+        await controller.acquire(background=True)
+        assert controller.in_flight == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Bulk class-pack merge: order, bookmarks and bounded concurrency."""
+
+import asyncio
+import io
+import struct
+import sys
+import os
+import zlib
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import pytest
+
+pypdf = pytest.importorskip("pypdf")
+
+from pdf_catalog import build_preset_paper
+from pdf_engines import render_pdf, ENGINE_REPORTLAB
+from pdf_bulk import merge_papers
+
+
+def test_merge_in_order_with_bookmarks():
+    levels = ["Junior", "AB-1", "AB-4", "AB-2", "AB-9"]
+    in_flight = 0
+    max_in_flight = 0
+    rendered = []
+
+    def make_render(level):
+        async def render():
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            config, blocks = build_preset_paper(level, seed=5)
+            pdf_file = await render_pdf(config, blocks, False, False, ENGINE_REPORTLAB)
+            rendered.append(pdf_file)
+            in_flight -= 1
+            return pdf_file
+        return render
+
+    papers = [(level, make_render(level)) for level in levels]
+    merged = asyncio.run(merge_papers(papers, bookmarks=True, concurrency=2))
+    reader = pypdf.PdfReader(merged)
+
+    expected_pages = [len(pypdf.PdfReader(render_pdf_sync(level)).pages) for level in levels]
+    assert len(reader.pages) == sum(expected_pages)
+    assert [item.title for item in reader.outline] == levels
+    starts = [reader.get_destination_page_number(item) for item in reader.outline]
+    assert starts == [sum(expected_pages[:index]) for index in range(len(levels))]
+    assert max_in_flight <= 2
+    assert all(pdf_file.closed for pdf_file in rendered)
+
+
+def render_pdf_sync(level):
+    config, blocks = build_preset_paper(level, seed=5)
+    return asyncio.run(render_pdf(config, blocks, False, False, ENGINE_REPORTLAB))
+
+
+def chromium_style_pdf(text: str) -> io.BytesIO:
+    """
+    A one-page PDF laid out the way Chromium (Skia) writes them: objects in a
+    compressed object stream, a cross-reference stream instead of a table,
+    and the media box and resources inherited from the page tree.
+    """
+    objects = {
+        1: b"<</Type /Catalog /Pages 2 0 R>>",
+        2: b"<</Type /Pages /Kids [3 0 R] /Count 1 /MediaBox [0 0 300 200] /Resources <</Font <</F1 5 0 R>>>>>>",
+        3: b"<</Type /Page /Parent 2 0 R /Contents 4 0 R>>",
+        5: b"<</Type /Font /Subtype /Type1 /BaseFont /Helvetica>>",
+    }
+    output = io.BytesIO()
+    output.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+
+    def write_stream(number, dictionary: bytes, data: bytes):
+        offsets[number] = output.tell()
+        output.write(b"%d 0 obj\n<<%s /Filter /FlateDecode /Length %d>>\nstream\n" % (number, dictionary, len(data)))
+        output.write(data + b"\nendstream\nendobj\n")
+
+    write_stream(4, b"", zlib.compress(f"BT /F1 18 Tf 20 100 Td ({text}) Tj ET".encode()))
+    header, body = b"", b""
+    for number, source in objects.items():
+        header += b"%d %d " % (number, len(body))
+        body += source + b"\n"
+    write_stream(6, b"/Type /ObjStm /N %d /First %d" % (len(objects), len(header)), zlib.compress(header + body))
+    entries = {0: (0, 0, 65535)}
+    entries.update({number: (2, 6, index) for index, number in enumerate(objects)})
+    entries.update({number: (1, offset, 0) for number, offset in offsets.items()})
+    entries[7] = (1, output.tell(), 0)
+    xref = b"".join(struct.pack(">BIH", *entries[number]) for number in range(8))
+    write_stream(7, b"/Type /XRef /Size 8 /W [1 4 2] /Root 1 0 R", zlib.compress(xref))
+    output.write(b"startxref\n%d\n%%%%EOF\n" % entries[7][1])
+    output.seek(0)
+    return output
+
+
+def test_merge_chromium_style_papers():
+    async def chromium(text):
+        return chromium_style_pdf(text)
+
+    async def reportlab():
+        config, blocks = build_preset_paper("AB-1", seed=5)
+        return await render_pdf(config, blocks, False, False, ENGINE_REPORTLAB)
+
+    papers = [("First", lambda: chromium("First paper")), ("Second", reportlab),
+              ("Third", lambda: chromium("Third paper"))]
+    merged = asyncio.run(merge_papers(papers, bookmarks=True, concurrency=2))
+    reader = pypdf.PdfReader(merged, strict=True)
+
+    middle = len(pypdf.PdfReader(render_pdf_sync("AB-1")).pages)
+    assert len(reader.pages) == middle + 2
+    assert "First paper" in reader.pages[0].extract_text()
+    assert "Third paper" in reader.pages[-1].extract_text()
+    assert [float(value) for value in reader.pages[0].mediabox] == [0, 0, 300, 200]  # Inherited box kept
+    assert [reader.get_destination_page_number(item) for item in reader.outline] == [0, 1, middle + 1]
+
+
+def test_failed_paper_releases_the_rendered_ones():
+    rendered = []
+
+    def make_render(level):
+        async def render():
+            pdf_file = await asyncio.to_thread(render_pdf_sync, level)
+            rendered.append(pdf_file)
+            return pdf_file
+        return render
+
+    async def failing():
+        while len(rendered) < 2:  # Fail once the papers after it have finished
+            await asyncio.sleep(0.01)
+        raise RuntimeError("render failed")
+
+    async def never():
+        await asyncio.Event().wait()
+
+    papers = [("Broken", failing), ("AB-1", make_render("AB-1")), ("AB-2", make_render("AB-2")), ("Slow", never)]
+    with pytest.raises(RuntimeError, match="render failed"):
+        asyncio.run(merge_papers(papers, concurrency=4))
+    assert len(rendered) == 2 and all(pdf_file.closed for pdf_file in rendered)
+
+
+def test_bulk_endpoint_rejects_malformed_papers():
+    from fastapi.testclient import TestClient
+    import main
+    from auth import get_current_admin
+
+    main.app.dependency_overrides[get_current_admin] = lambda: None
+    try:
+        client = TestClient(main.app)
+        for papers in (["Junior"], [{"paper_id": 1}, 3], {"paper_id": 1}, [{"paper_id": "first"}], [{"seed": 5}]):
+            assert client.post("/api/papers/bulk-pdf", json={"papers": papers}).status_code == 422
+
+        config = {"level": "AB-1", "title": "Pack", "blocks": []}
+        response = client.post("/api/papers/bulk-pdf", json={
+            "papers": [{"config": config, "seed": 5}, {"config": config, "seed": 6, "withAnswers": True}],
+            "engine": "reportlab", "title": "Class pack",
+        })
+        assert response.status_code == 200 and response.headers["x-pdf-papers"] == "2"
+        reader = pypdf.PdfReader(io.BytesIO(response.content))
+        with_answers = asyncio.run(render_pdf(*build_preset_paper("AB-1", 6, "Pack"), True, False, ENGINE_REPORTLAB))
+        assert len(reader.pages) == len(pypdf.PdfReader(render_pdf_sync("AB-1")).pages) + len(
+            pypdf.PdfReader(with_answers).pages)
+    finally:
+        main.app.dependency_overrides.pop(get_current_admin, None)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Pre-rendered preset catalog: warm-up, reuse and daily rotation."""
+
+import asyncio
+import sys
+import os
+from datetime import date, timedelta
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from presets import PRESETS
+from pdf_catalog import PdfCatalog, build_preset_paper, catalog_seeds, pdf_cache_key
+
+
+def test_warm_reuse_and_rotate(tmp_path):
+    catalog = PdfCatalog(directory=str(tmp_path), seeds_per_level=1)
+    today = date(2026, 1, 5)
+
+    assert asyncio.run(catalog.warm(today)) == 2 * len(PRESETS)
+    assert len(os.listdir(tmp_path)) == 2 * len(PRESETS)
+
+    # Same day again: everything is already on disk
+    assert asyncio.run(catalog.warm(today)) == 0
+
+    # Catalog papers are requested by level and seed; files are named by content hash
+    seed = catalog_seeds("AB-3", today, 1)[0]
+    config, blocks = build_preset_paper("AB-3", seed)
+    path = catalog.get("AB-3", seed, True)["path"]
+    assert os.path.basename(path) == f"{pdf_cache_key(config, blocks, with_answers=True)}.pdf"
+    assert open(path, "rb").read(5) == b"%PDF-"
+    assert catalog.get("AB-3", seed + 1, True) is None
+
+    # Next day: new seeds, yesterday's files are removed; files the catalog didn't write stay
+    (tmp_path / "report.pdf").write_bytes(b"%PDF-")
+    (tmp_path / f"{'0' * 64}.pdf.part").write_bytes(b"%PDF-")  # Interrupted write
+    asyncio.run(catalog.warm(today + timedelta(days=1)))
+    assert not os.path.exists(path)
+    assert catalog.get("AB-3", seed, True) is None
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [os.path.basename(entry["path"]) for entry in catalog.entries.values()] + ["report.pdf"])
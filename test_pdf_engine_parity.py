@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Layout parity between the Playwright and ReportLab PDF engines."""
+
+import asyncio
+import re
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import pytest
+
+pypdf = pytest.importorskip("pypdf")
+
+from schemas import PaperConfig
+from presets import get_preset_blocks
+from math_generator import generate_block
+from html_template import generate_html
+from pdf_layout import plan_paper, _block_rows
+from pdf_engines import (
+    select_engine, render_pdf, ENGINE_PLAYWRIGHT, ENGINE_REPORTLAB, PDF_ENGINE_AUTO_THRESHOLD
+)
+
+# "12." serial numbers, but not decimals like "1.5" or "0.25"
+SERIAL_PATTERN = re.compile(r"(?<![\d.])(\d+)\.(?!\d)")
+PARITY_LEVELS = ["Junior", "AB-3", "AB-7", "Advanced"]
+# Unsplittable units of the Playwright HTML: one vertical table or one horizontal row
+HTML_UNIT_PATTERN = re.compile(r'<table class="vertical-questions-table">|<div class="horizontal-questions-container">')
+HTML_QUESTION_NUMBER = re.compile(r'<span class="question-number">(\d+)\.</span>')
+
+
+def build_paper(level: str, seed: int = 1234):
+    """Generate a preset paper deterministically."""
+    config = PaperConfig(level=level, title=f"Paper {level}", totalQuestions="20", blocks=[])
+    blocks = []
+    question_id = 1
+    for block in get_preset_blocks(level):
+        blocks.append(generate_block(block, question_id, seed))
+        question_id += block.count
+    return config, blocks
+
+
+def render(level: str, engine: str, with_answers: bool = False):
+    config, blocks = build_paper(level)
+    return asyncio.run(render_pdf(config, blocks, with_answers, False, engine))
+
+
+def question_pages(pdf_file, total_questions: int) -> dict:
+    """Map each question number to the first page it appears on (question pages only)."""
+    reader = pypdf.PdfReader(pdf_file)
+    positions = {}
+    for page_index, page in enumerate(reader.pages):
+        text = page.extract_text() or ""
+        if "Answer Key" in text:
+            break
+        for match in SERIAL_PATTERN.finditer(text):
+            number = int(match.group(1))
+            if 1 <= number <= total_questions:
+                positions.setdefault(number, page_index)
+    return positions
+
+
+def html_units(html: str) -> list:
+    """Question numbers of each unsplittable unit in the Playwright HTML, grouped by block."""
+    body = html.split('<div class="ending-section">', 1)[0]
+    return [
+        [tuple(int(number) for number in HTML_QUESTION_NUMBER.findall(unit))
+         for unit in HTML_UNIT_PATTERN.split(block)[1:]]
+        for block in body.split('<div class="block-container">')[1:]
+    ]
+
+
+def chromium_available() -> bool:
+    try:
+        from playwright.async_api import async_playwright
+
+        async def launch():
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=True)
+                await browser.close()
+
+        asyncio.run(launch())
+        return True
+    except Exception:
+        return False
+
+
+def test_select_engine():
+    """Explicit choices win; auto picks ReportLab for large and bulk papers."""
+    assert select_engine("reportlab", 10) == ENGINE_REPORTLAB
+    assert select_engine("Playwright", 10_000) == ENGINE_PLAYWRIGHT
+    assert select_engine("auto", 10) == ENGINE_PLAYWRIGHT
+    assert select_engine("auto", PDF_ENGINE_AUTO_THRESHOLD + 1) == ENGINE_REPORTLAB
+    assert select_engine("auto", 10, bulk=True) == ENGINE_REPORTLAB
+    with pytest.raises(ValueError):
+        select_engine("wkhtmltopdf", 10)
+
+
+@pytest.mark.parametrize("level", PARITY_LEVELS)
+def test_reportlab_question_order(level):
+    """Every question appears once, in order, before the answer key."""
+    config, blocks = build_paper(level)
+    total = sum(len(block.questions) for block in blocks)
+    positions = question_pages(render(level, ENGINE_REPORTLAB, with_answers=True), total)
+
+    assert sorted(positions) == list(range(1, total + 1))
+    pages = [positions[number] for number in range(1, total + 1)]
+    assert pages == sorted(pages)
+
+
+@pytest.mark.parametrize("level", PARITY_LEVELS)
+@pytest.mark.parametrize("with_answers", [False, True])
+def test_playwright_html_follows_the_plan(level, with_answers):
+    """
+    Runs without Chromium: the HTML the Playwright engine prints keeps the same
+    questions together as the page planner (and so the ReportLab engine) does,
+    and breaks before the answer key where the plan does.
+    """
+    config, blocks = build_paper(level)
+    html = generate_html(config, blocks, with_answers, False)
+
+    planned_units = [[ids for _, ids in _block_rows(block, with_answers) if ids] for block in blocks]
+    assert html_units(html) == planned_units
+
+    plan = plan_paper(config, blocks, with_answers)
+    answer_key_pages = [page.page for page in plan.pages if page.section == "answer_key"]
+    if with_answers:
+        # One forced break after the questions; every page after it belongs to the answer key
+        assert html.count("page-break-before: always") == 1
+        assert html.index("ending-section") < html.index("page-break-before: always")
+        assert answer_key_pages == list(range(answer_key_pages[0], plan.page_count + 1))
+        assert all(page.section == "questions" for page in plan.pages[:answer_key_pages[0] - 1])
+    else:
+        assert "page-break-before: always" not in html and not answer_key_pages
+
+
+@pytest.mark.parametrize("level", PARITY_LEVELS)
+def test_engine_parity(level):
+    """Both engines produce the same page count and put each question on the same page."""
+    if not chromium_available():
+        pytest.skip("Chromium is not installed (run `playwright install chromium`)")
+
+    config, blocks = build_paper(level)
+    total = sum(len(block.questions) for block in blocks)
+    for with_answers in (False, True):
+        playwright_pdf = render(level, ENGINE_PLAYWRIGHT, with_answers)
+        reportlab_pdf = render(level, ENGINE_REPORTLAB, with_answers)
+
+        assert len(pypdf.PdfReader(reportlab_pdf).pages) == len(pypdf.PdfReader(playwright_pdf).pages)
+        assert question_pages(reportlab_pdf, total) == question_pages(playwright_pdf, total)
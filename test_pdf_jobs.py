@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Background PDF jobs: submit/result endpoints, queue limit, SSE status, TTL cleanup and the result store."""
+
+import asyncio
+import io
+import json
+import sys
+import os
+import uuid
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+
+import main
+from pdf_jobs import PdfJobQueue, JOB_DONE, JOB_QUEUED, JOB_RUNNING
+
+BODY = {"config": {"level": "AB-3", "title": "Job Paper", "blocks": []}, "seed": 5, "engine": "reportlab"}
+
+
+def run_with_queue(monkeypatch, queue: PdfJobQueue, scenario):
+    """Run scenario(http) against the app, with the endpoints using queue."""
+    monkeypatch.setattr(main, "pdf_job_queue", queue)
+
+    async def wrapper():
+        await queue.start()
+        try:
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                await scenario(http)
+        finally:
+            await queue.stop()
+
+    asyncio.run(wrapper())
+
+
+def gated_render(gate: asyncio.Event):
+    async def render():
+        await gate.wait()
+        return io.BytesIO(b"%PDF-1.4 test")
+    return render
+
+
+async def wait_for_status(job, status):
+    for _ in range(500):
+        if job.status == status:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job stayed {job.status}, expected {status}")
+
+
+def test_submit_poll_and_download(monkeypatch, tmp_path):
+    queue = PdfJobQueue(workers=1, max_pending=4, directory=str(tmp_path))
+
+    async def scenario(http):
+        submitted = await http.post("/api/papers/pdf-jobs", json=BODY)
+        assert submitted.status_code == 202
+        job_id = submitted.json()["job_id"]
+        assert submitted.json()["engine"] == "reportlab"
+
+        await wait_for_status(queue.get(job_id), JOB_DONE)
+        status = (await http.get(f"/api/papers/pdf-jobs/{job_id}")).json()
+        assert status["status"] == JOB_DONE and status["result_url"].endswith(f"/{job_id}/result")
+
+        result = await http.get(status["result_url"])
+        assert result.status_code == 200
+        assert result.headers["content-type"] == "application/pdf"
+        assert result.content.startswith(b"%PDF-") and len(result.content) == status["size"]
+        assert status["filename"] in result.headers["content-disposition"]
+
+        assert (await http.get("/api/papers/pdf-jobs/unknown")).status_code == 404
+
+    run_with_queue(monkeypatch, queue, scenario)
+
+
+def test_full_queue_returns_503(monkeypatch, tmp_path):
+    queue = PdfJobQueue(workers=1, max_pending=1, directory=str(tmp_path))
+    gate = asyncio.Event()
+
+    async def scenario(http):
+        running = queue.submit(gated_render(gate), "running.pdf")
+        await wait_for_status(running, JOB_RUNNING)
+        queued = queue.submit(gated_render(gate), "queued.pdf")  # Takes the only pending slot
+
+        rejected = await http.post("/api/papers/pdf-jobs", json=BODY)
+        assert rejected.status_code == 503
+        assert rejected.headers["retry-after"] == "10"
+        assert len(queue.jobs) == 2
+
+        # Result of an unfinished job is a conflict, not a download
+        assert (await http.get(f"/api/papers/pdf-jobs/{queued.id}/result")).status_code == 409
+        gate.set()
+        await wait_for_status(queued, JOB_DONE)
+
+    run_with_queue(monkeypatch, queue, scenario)
+
+
+def test_events_follow_the_job_to_done(monkeypatch, tmp_path):
+    queue = PdfJobQueue(workers=1, max_pending=4, directory=str(tmp_path))
+    first_gate, second_gate = asyncio.Event(), asyncio.Event()
+
+    async def scenario(http):
+        first = queue.submit(gated_render(first_gate), "first.pdf")
+        await wait_for_status(first, JOB_RUNNING)
+        job = queue.submit(gated_render(second_gate), "second.pdf")
+
+        stream = asyncio.create_task(http.get(f"/api/papers/pdf-jobs/{job.id}/events"))
+        await asyncio.sleep(0.05)
+        first_gate.set()  # The worker picks up our job
+        await wait_for_status(job, JOB_RUNNING)
+        await asyncio.sleep(0.05)
+        second_gate.set()
+
+        response = await asyncio.wait_for(stream, 5)
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [message for message in response.text.split("\n\n") if message]
+        assert all(message.startswith("event: status\ndata: ") for message in events)
+        statuses = [json.loads(message.split("data: ", 1)[1])["status"] for message in events]
+        assert statuses == [JOB_QUEUED, JOB_RUNNING, JOB_DONE]
+        assert json.loads(events[-1].split("data: ", 1)[1])["job_id"] == job.id
+
+    run_with_queue(monkeypatch, queue, scenario)
+
+
+def test_expired_jobs_and_files_are_removed(monkeypatch, tmp_path):
+    queue = PdfJobQueue(workers=1, max_pending=4, ttl_seconds=60, directory=str(tmp_path))
+    gate = asyncio.Event()
+
+    async def scenario(http):
+        done = queue.submit(gated_render(gate), "done.pdf")
+        gate.set()
+        await wait_for_status(done, JOB_DONE)
+        assert os.path.exists(done.path)
+        waiting = queue.submit(gated_render(asyncio.Event()), "waiting.pdf")  # Never finishes
+
+        assert queue.cleanup_expired() == 0  # Within the TTL
+        done.finished_at -= 61
+        assert queue.cleanup_expired() == 1
+        assert not os.path.exists(done.path)
+        assert queue.get(done.id) is None and queue.get(waiting.id) is waiting
+        assert (await http.get(f"/api/papers/pdf-jobs/{done.id}/result")).status_code == 404
+
+    run_with_queue(monkeypatch, queue, scenario)
+
+
+def test_start_only_removes_its_own_results(tmp_path):
+    stale = uuid.uuid4().hex
+    (tmp_path / f"{stale}.pdf").write_bytes(b"%PDF-")
+    (tmp_path / f"{stale}.pdf.part").write_bytes(b"%PDF-")
+    (tmp_path / "report.pdf").write_bytes(b"%PDF-")
+    (tmp_path / "notes.txt").write_text("keep")
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / f"{uuid.uuid4().hex}.pdf").write_bytes(b"%PDF-")
+
+    async def scenario():
+        queue = PdfJobQueue(workers=1, directory=str(tmp_path))
+        await queue.start()
+        await queue.stop()
+
+    asyncio.run(scenario())
+    assert sorted(os.listdir(tmp_path)) == ["nested", "notes.txt", "report.pdf"]
+    assert len(os.listdir(tmp_path / "nested")) == 1
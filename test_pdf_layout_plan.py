@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Page planner predictions against real ReportLab renders."""
+
+import re
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import pytest
+
+pypdf = pytest.importorskip("pypdf")
+
+from schemas import PaperConfig, BlockConfig, Constraints
+from presets import get_preset_blocks, PRESETS
+from math_generator import generate_block
+from pdf_generator_v2 import generate_pdf_v2
+from pdf_layout import plan_paper
+
+SERIAL_PATTERN = re.compile(r"(?<![\d.])(\d+)\.(?!\d)")
+
+
+def build_blocks(block_configs, seed: int = 7):
+    blocks = []
+    question_id = 1
+    for block in block_configs:
+        blocks.append(generate_block(block, question_id, seed))
+        question_id += block.count
+    return blocks
+
+
+def assert_plan_matches_render(config, blocks, with_answers, answers_only):
+    plan = plan_paper(config, blocks, with_answers, answers_only)
+    reader = pypdf.PdfReader(generate_pdf_v2(config, blocks, with_answers, answers_only))
+
+    assert plan.page_count == len(plan.pages) == len(reader.pages)
+    question_ids = {question.id for block in blocks for question in block.questions}
+    planned_ids = {n for page in plan.pages for first, last in page.question_ranges for n in range(first, last + 1)}
+    assert planned_ids == question_ids  # No question left off the plan
+    for page, pdf_page in zip(plan.pages, reader.pages):
+        printed = {int(m.group(1)) for m in SERIAL_PATTERN.finditer(pdf_page.extract_text() or "")}
+        planned = {n for first, last in page.question_ranges for n in range(first, last + 1)}
+        assert planned == printed, (f"page {page.page}: planned but not printed {sorted(planned - printed)[:5]}, "
+                                    f"printed but not planned {sorted(printed - planned)[:5]}")
+
+
+@pytest.mark.parametrize("level", list(PRESETS))
+@pytest.mark.parametrize("with_answers,answers_only", [(False, False), (True, False), (False, True)])
+def test_presets(level, with_answers, answers_only):
+    config = PaperConfig(level=level, title=f"Paper {level}", totalQuestions="20", blocks=[])
+    assert_plan_matches_render(config, build_blocks(get_preset_blocks(level)), with_answers, answers_only)
+
+
+def test_long_blocks_split_across_pages():
+    """Blocks taller than a page split between table rows; partial vertical chunks included."""
+    block_configs = [
+        BlockConfig(id="a", type="add_sub", count=57, constraints=Constraints(digits=2, rows=9), title="Long " * 30),
+        BlockConfig(id="b", type="multiplication", count=123,
+                    constraints=Constraints(multiplicandDigits=3, multiplierDigits=1), title="Multiply"),
+        BlockConfig(id="c", type="direct_add_sub", count=33, constraints=Constraints(digits=1, rows=12)),
+    ]
+    config = PaperConfig(level="Custom", title="Stress " * 20, totalQuestions="20", blocks=[])
+    assert_plan_matches_render(config, build_blocks(block_configs), True, False)
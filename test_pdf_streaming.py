@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Spooled PDF buffers and chunked streaming responses."""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import pdf_streaming
+from pdf_streaming import new_pdf_spool, iter_file_chunks, pdf_response, PDF_STREAM_CHUNK_SIZE
+
+
+def test_spool_rolls_over_to_disk(monkeypatch):
+    """Small PDFs stay in memory, large ones move to a temp file."""
+    monkeypatch.setattr(pdf_streaming, "PDF_SPOOL_MAX_MEMORY", 1024)
+    small = new_pdf_spool()
+    small.write(b"x" * 512)
+    assert not small._rolled
+    large = new_pdf_spool()
+    large.write(b"x" * 4096)
+    assert large._rolled
+    small.close()
+    large.close()
+
+
+def test_chunks_and_close():
+    """The stream yields fixed-size chunks and closes the spool when done."""
+    spool = new_pdf_spool()
+    data = os.urandom(PDF_STREAM_CHUNK_SIZE * 2 + 100)
+    spool.write(data)
+    chunks = list(iter_file_chunks(spool))
+    assert [len(c) for c in chunks] == [PDF_STREAM_CHUNK_SIZE, PDF_STREAM_CHUNK_SIZE, 100]
+    assert b"".join(chunks) == data
+    assert spool.closed
+
+
+def test_response_headers():
+    """Responses carry Content-Length and the attachment filename."""
+    spool = new_pdf_spool()
+    spool.write(b"%PDF-1.4 test")
+    response = pdf_response(spool, "paper.pdf", {"X-PDF-Engine": "reportlab"})
+    assert response.headers["content-length"] == "13"
+    assert response.headers["content-disposition"] == "attachment; filename=paper.pdf"
+    assert response.headers["x-pdf-engine"] == "reportlab"
+    spool.close()
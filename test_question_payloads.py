@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Content-addressed question payloads are stored once per distinct paper."""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, User, PaperAttempt, QuestionPayload
+from question_payloads import payload_hash, store_payload, attempt_payload
+
+CONFIG = {"level": "AB-1", "title": "Paper", "blocks": [{"id": "b1", "count": 2}]}
+BLOCKS = [{"config": {"id": "b1"}, "questions": [{"id": 1, "answer": 3}, {"id": 2, "answer": 4}]}]
+
+
+def make_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_hash_is_canonical():
+    reordered = {"blocks": CONFIG["blocks"], "title": "Paper", "level": "AB-1"}
+    assert payload_hash(CONFIG, BLOCKS) == payload_hash(reordered, BLOCKS)
+    assert payload_hash(CONFIG, BLOCKS) != payload_hash({**CONFIG, "title": "Other"}, BLOCKS)
+
+
+def test_attempts_share_one_payload():
+    db = make_session()
+    user = User(google_id="g", email="s@example.com", name="Student")
+    db.add(user)
+    db.flush()
+    for _ in range(3):
+        db.add(PaperAttempt(user_id=user.id, paper_title="Paper", paper_level="AB-1", paper_config={},
+                            generated_blocks=[], payload_hash=store_payload(db, CONFIG, BLOCKS),
+                            seed=1, total_questions=2))
+    legacy = PaperAttempt(user_id=user.id, paper_title="Paper", paper_level="AB-1", paper_config=CONFIG,
+                          generated_blocks=BLOCKS, seed=1, total_questions=2)
+    db.add(legacy)
+    db.commit()
+
+    assert db.query(QuestionPayload).count() == 1
+    for attempt in db.query(PaperAttempt).all():
+        assert attempt_payload(attempt) == (CONFIG, BLOCKS)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""In-memory ranked boards agree with the SQL rebuild and snapshot into the table."""
+
+import asyncio
+import random
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models import Base, User, Leaderboard
+from ranked_board import RankedBoard
+from leaderboard_service import (
+    LiveLeaderboards, update_leaderboard, update_weekly_leaderboard, add_weekly_points, _standing_from_table,
+    OVERALL, WEEKLY
+)
+
+
+def test_ranks_top_and_neighbors():
+    board = RankedBoard([(1, 30), (2, 50), (3, 30), (4, 10), (5, 50)])
+    assert board.top(3) == [(2, 50, 1), (5, 50, 1), (1, 30, 3)]
+    assert [board.rank(user_id) for user_id in (1, 2, 3, 4, 5)] == [3, 1, 3, 5, 1]
+    assert board.around(3, 1) == [(1, 30, 3), (3, 30, 3), (4, 10, 5)]
+    assert board.around(2, 1) == [(2, 50, 1), (5, 50, 1)]
+
+    board.set(4, 60)
+    board.remove(2)
+    assert board.standings() == [(4, 60, 1), (5, 50, 2), (1, 30, 3), (3, 30, 3)]
+    assert board.rank(2) is None and board.around(2, 3) == []
+
+
+def make_session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def test_random_updates_match_sql_rebuild():
+    rng = random.Random(7)
+    session_factory = make_session_factory()
+    db = session_factory()
+    students = [User(google_id=f"g{index}", email=f"s{index}@example.com", name=f"S{index}",
+                     role="student", total_points=rng.choice([0, 10, 20])) for index in range(30)]
+    db.add_all(students)
+    db.commit()
+
+    live = LiveLeaderboards(session_factory=session_factory)
+    live.load(db)
+    for _ in range(200):
+        student = rng.choice(students)
+        student.total_points = rng.choice([0, 10, 20, 30, 40])
+        live.apply(student.id, student.total_points)
+    db.commit()
+    assert live.snapshot() > 0
+    assert live.snapshot() == 0  # Nothing changed since
+
+    # The table written from memory is exactly what a full SQL rebuild produces
+    db.expire_all()
+    snapshot = {entry.user_id: (entry.total_points, entry.rank) for entry in db.query(Leaderboard).all()}
+    assert update_leaderboard(db) == 0
+    for student in students:
+        assert snapshot[student.id] == (student.total_points, live.overall.rank(student.id))
+
+
+def test_neighbors_from_memory_match_the_table():
+    rng = random.Random(11)
+    db = make_session_factory()()
+    students = [User(google_id=f"g{index}", email=f"s{index}@example.com", name=f"S{index}",
+                     role="student", total_points=rng.choice([0, 10, 20, 30])) for index in range(40)]
+    db.add_all(students)
+    db.commit()
+    for student in students:
+        add_weekly_points(db, student.id, rng.choice([0, 5, 5, 15]))
+    db.commit()
+    update_leaderboard(db)
+    update_weekly_leaderboard(db)
+    live = LiveLeaderboards()
+    live.load(db)
+
+    def key(entries):
+        return [(entry["user_id"], entry["rank"], entry["total_points"], entry["weekly_points"]) for entry in entries]
+
+    for student in students[::3]:
+        for name, board in (("overall", OVERALL), ("weekly", WEEKLY)):
+            for window in (0, 2, 50):
+                rank, entries = live.around(name, student.id, window)
+                table_rank, table_entries = _standing_from_table(db, board, student.id, window)
+                assert rank == table_rank and key(entries) == key(table_entries)
+                assert student.id in [entry["user_id"] for entry in entries]
+                assert len(entries) <= 2 * window + 1
+
+
+def test_snapshots_are_debounced():
+    async def scenario():
+        session_factory = make_session_factory()
+        db = session_factory()
+        db.add_all([User(google_id=f"g{index}", email=f"s{index}@example.com", name=f"S{index}",
+                         role="student") for index in range(10)])
+        db.commit()
+        db.close()
+
+        live = LiveLeaderboards(snapshot_seconds=0.3, max_changes=5, session_factory=session_factory)
+        await live.start()
+        await asyncio.sleep(0.4)
+        assert live.snapshots == 1 and live.last_snapshot_rows == 10  # Initial ranks written
+
+        # A burst below max_changes is written once, after snapshot_seconds
+        for user_id in (1, 2, 3):
+            live.apply(user_id, 10 * user_id)
+        await asyncio.sleep(0.1)
+        assert live.snapshots == 1 and live.metrics()["pending_changes"] == 3
+        await asyncio.sleep(0.35)
+        assert live.snapshots == 2 and live.metrics()["pending_changes"] == 0
+
+        # Reaching max_changes writes right away
+        for user_id in range(1, 6):
+            live.apply(user_id, 100 + user_id)
+        await asyncio.sleep(0.1)
+        assert live.snapshots == 3
+
+        # Shutdown flushes what is left
+        live.apply(6, 500)
+        await live.stop()
+        assert live.snapshots == 4 and live.metrics()["staleness_ms"] == 0
+        db = session_factory()
+        assert db.query(Leaderboard.rank).filter(Leaderboard.user_id == 6).scalar() == 1
+
+    asyncio.run(scenario())
+
+
+def test_changes_during_a_load_are_not_lost(monkeypatch):
+    import leaderboard_service
+
+    session_factory = make_session_factory()
+    db = session_factory()
+    students = [User(google_id=f"g{index}", email=f"s{index}@example.com", name=f"S{index}",
+                     role="student", total_points=10 * index) for index in range(4)]
+    db.add_all(students)
+    db.commit()
+    live = LiveLeaderboards(session_factory=session_factory)
+    live.load(db)
+    missed, seen, removed = students[0], students[1], students[3]
+
+    def practice(student, points):
+        """A submission: commit, then apply() (as update_user_ranking does)."""
+        student.total_points += points
+        add_weekly_points(db, student.id, points)
+        db.commit()
+        live.apply(student.id, student.total_points, points)
+
+    original_overall, original_weekly = leaderboard_service.overall_standings, leaderboard_service.weekly_standings
+
+    def overall_standings(session, user_ids=None):
+        rows = original_overall(session, user_ids)
+        if user_ids is None:
+            practice(missed, 25)  # Committed after the query read it
+            live.remove(removed.id)
+        return rows
+
+    def weekly_standings(session, user_ids=None):
+        if user_ids is None:
+            practice(seen, 40)  # Committed before the query: replaying the delta would count it twice
+        return original_weekly(session, user_ids)
+
+    monkeypatch.setattr(leaderboard_service, "overall_standings", overall_standings)
+    monkeypatch.setattr(leaderboard_service, "weekly_standings", weekly_standings)
+    assert live.load(db) == {"overall": 0, "weekly": 0}
+
+    assert live.overall.points(missed.id) == 25 and live.weekly.points(missed.id) == 25
+    assert live.overall.points(seen.id) == 50 and live.weekly.points(seen.id) == 40
+    assert removed.id not in live.overall and removed.id not in live.weekly
+    assert live.overall.rank(seen.id) == 1 and live.weekly.rank(seen.id) == 1
+
+    # Nothing left to fix: a reload with no concurrent changes agrees
+    monkeypatch.undo()
+    db.delete(removed)
+    db.commit()
+    assert live.load(db) == {"overall": 0, "weekly": 0}
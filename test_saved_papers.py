@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Saved papers: materialized questions match what downloads used to regenerate."""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from presets import get_preset_blocks
+from schemas import PaperConfig
+from saved_papers import materialize_paper, load_paper, generate_paper_blocks, default_paper_seed
+
+
+class FakePaper:
+    def __init__(self, config, seed=None, questions=None):
+        self.config = config
+        self.seed = seed
+        self.questions = questions
+
+
+def make_config():
+    return PaperConfig(level="AB-2", title="Saved", blocks=get_preset_blocks("AB-2")).model_dump()
+
+
+def test_materialized_questions_round_trip():
+    config = make_config()
+    seed, questions = materialize_paper(config)
+    assert seed == default_paper_seed(config)
+    assert len(questions) == len(config["blocks"])
+
+    regenerated = generate_paper_blocks(PaperConfig(**config), seed)
+    _, loaded = load_paper(FakePaper(config, seed, questions))
+    assert [block.model_dump() for block in loaded] == [block.model_dump() for block in regenerated]
+
+
+def test_unmaterialized_and_other_seeds_regenerate():
+    config = make_config()
+    seed, questions = materialize_paper(config)
+    _, legacy = load_paper(FakePaper(config))
+    _, stored = load_paper(FakePaper(config, seed, questions))
+    assert [b.model_dump() for b in legacy] == [b.model_dump() for b in stored]
+
+    _, other = load_paper(FakePaper(config, seed, questions), seed=seed + 1)
+    assert [b.model_dump() for b in other] != [b.model_dump() for b in stored]
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Database handlers are plain `def` endpoints: concurrent requests run side by side in the threadpool."""
+
+import asyncio
+import sys
+import os
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+import main
+from models import Base, Paper, get_db
+
+CONCURRENT = 6
+
+
+def test_concurrent_requests_do_not_block_the_event_loop(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'papers.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    # Every request waits here inside its handler until all of them have arrived.
+    # Handlers running on the event loop would hold it while waiting, the
+    # others would never start, and the barrier would time out.
+    barrier = threading.Barrier(CONCURRENT, timeout=5)
+
+    class BarrierSession(Session):
+        def query(self, *entities, **kwargs):
+            barrier.wait()
+            return super().query(*entities, **kwargs)
+
+    TestSession = sessionmaker(bind=engine, class_=BarrierSession, autocommit=False, autoflush=False)
+    with sessionmaker(bind=engine)() as db:
+        config = {"level": "AB-1", "title": "Paper", "totalQuestions": "20", "blocks": []}
+        db.add_all([Paper(title=f"Paper {index}", level="AB-1", config=config, block_count=0)
+                    for index in range(3)])
+        db.commit()
+
+    def get_test_db():
+        db = TestSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            paths = [f"/api/papers/{paper_id}" for paper_id in (1, 2, 3)] + ["/api/papers?limit=2"] * 3
+            return await asyncio.wait_for(asyncio.gather(*(http.get(path) for path in paths)), 10)
+
+    main.app.dependency_overrides[get_db] = get_test_db
+    try:
+        responses = asyncio.run(scenario())
+    finally:
+        main.app.dependency_overrides.pop(get_db, None)
+        engine.dispose()
+
+    assert [response.status_code for response in responses] == [200] * CONCURRENT
+    assert [response.json()["title"] for response in responses[:3]] == ["Paper 0", "Paper 1", "Paper 2"]
+    assert all(len(response.json()["items"]) == 2 and response.json()["nextCursor"] for response in responses[3:])
+    assert not barrier.broken